@@ -1,18 +1,41 @@
 import asyncio
 import logging
+import time
 from contextlib import asynccontextmanager
 
 import uvicorn
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
 from rchat import migration_runner
-from rchat.conf import ENVIRONMENT, RELOAD_ENABLED
+from rchat.conf import (
+    APPLY_MIGRATIONS_ON_STARTUP,
+    DB_READY_TIMEOUT_SEC,
+    HTTP_COMPRESSION_LEVEL,
+    HTTP_COMPRESSION_MIN_SIZE,
+    LOOP_MONITOR_ENABLED,
+    PROFILING_TOKEN,
+    RELOAD_ENABLED,
+    SERVER_BACKLOG,
+    SERVER_HTTP,
+    SERVER_LOOP,
+    SERVER_WORKERS,
+    SERVER_WS,
+    WS_COMPRESSION_LEVEL,
+)
 from rchat.exceptions import register_exception_handlers
 from rchat.helpers import create_storage_folders
 from rchat.log import setup_logging
-from rchat.middlewares import access_log_middleware
+from rchat.loop_monitor import LoopMonitor
+from rchat.metrics import mark_process_dead
+from rchat.middlewares import CompressionMiddleware, access_log_middleware
+from rchat.profiling import profiling_middleware
+from rchat.schema_check import wait_for_current_schema, wait_for_database
 from rchat.state import app_state
 from rchat.views import include_routers_and_sio
+from rchat.views.media.helpers import run_upload_sessions_sweeper
+from rchat.views.update.helpers import run_updates_sweeper
+from rchat.ws_protocol import DeflateWSProtocol
 
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -20,19 +43,43 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
-    migration_runner.apply_migrations()
+    loop_monitor = LoopMonitor()
+    if LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    if APPLY_MIGRATIONS_ON_STARTUP:
+        conn = await wait_for_database(
+            deadline=time.monotonic() + DB_READY_TIMEOUT_SEC
+        )
+        await conn.close()
+        await asyncio.to_thread(migration_runner.apply_migrations)
+    else:
+        await wait_for_current_schema()
     create_storage_folders()
-    if ENVIRONMENT == "dev":
-        await asyncio.sleep(5)
     await app_state.startup()
+    upload_sessions_sweeper = asyncio.create_task(
+        run_upload_sessions_sweeper()
+    )
+    updates_sweeper = asyncio.create_task(run_updates_sweeper())
     yield
+    upload_sessions_sweeper.cancel()
+    updates_sweeper.cancel()
+    loop_monitor.stop()
     await app_state.shutdown()
+    mark_process_dead()
 
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 include_routers_and_sio(app)
 register_exception_handlers(app)
+if HTTP_COMPRESSION_LEVEL:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=HTTP_COMPRESSION_MIN_SIZE,
+        compresslevel=HTTP_COMPRESSION_LEVEL,
+    )
+if PROFILING_TOKEN:
+    app.middleware("http")(profiling_middleware)
 app.middleware("http")(access_log_middleware)
 
 
@@ -43,5 +90,10 @@ if __name__ == "__main__":
         port=8080,
         host="0.0.0.0",
         access_log=False,
-        http="h11",
+        workers=SERVER_WORKERS,
+        loop=SERVER_LOOP,
+        http=SERVER_HTTP,
+        ws=DeflateWSProtocol if SERVER_WS == "wsproto" else SERVER_WS,
+        ws_per_message_deflate=bool(WS_COMPRESSION_LEVEL),
+        backlog=SERVER_BACKLOG,
     )
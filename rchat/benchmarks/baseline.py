@@ -0,0 +1,157 @@
+"""
+Общие результаты бенчмарков и сравнение с базовой линией.
+
+Все наборы бенчмарков пишут результаты в один JSON файл
+(ключ - "<набор>/<сценарий>"). С --update-baseline результаты
+сохраняются как новая базовая линия, без него - сравниваются с ней,
+и при замедлении больше чем на --threshold процесс завершается с кодом 1.
+"""
+
+import argparse
+import json
+import os
+import statistics
+from pathlib import Path
+
+from pydantic import BaseModel
+
+DEFAULT_BASELINE_PATH = os.environ.get(
+    "RCHAT_BENCHMARK_BASELINE", "benchmark_baseline.json"
+)
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+
+
+class BenchmarkResult(BaseModel):
+    name: str
+    iterations: int
+    p50_ms: float
+    p99_ms: float
+    rows_per_sec: float | None = None
+    extra: dict[str, float] = {}
+
+
+def get_percentile(timings: list[float], percent: int) -> float:
+    if len(timings) == 1:
+        return timings[0]
+    return statistics.quantiles(timings, n=100)[percent - 1]
+
+
+def summarize(
+    name: str,
+    timings: list[float],
+    rows: int | None = None,
+    extra: dict[str, float] | None = None,
+) -> BenchmarkResult:
+    """
+    Считает перцентили по замерам времени (в секундах).
+
+    :param rows: количество обработанных строк за все итерации
+    :param extra: дополнительные метрики сценария
+    """
+    total_time = sum(timings)
+    return BenchmarkResult(
+        name=name,
+        iterations=len(timings),
+        p50_ms=get_percentile(timings, 50) * 1000,
+        p99_ms=get_percentile(timings, 99) * 1000,
+        rows_per_sec=rows / total_time if rows is not None else None,
+        extra=extra or {},
+    )
+
+
+def load_baseline(path: str) -> dict[str, BenchmarkResult]:
+    if not Path(path).exists():
+        return {}
+
+    with open(path) as f:
+        data = json.load(f)
+    return {name: BenchmarkResult(**result) for name, result in data.items()}
+
+
+def save_baseline(path: str, results: list[BenchmarkResult]):
+    """
+    Обновляет результаты в файле базовой линии,
+    результаты других наборов сохраняются.
+    """
+    baseline = load_baseline(path)
+    baseline.update({result.name: result for result in results})
+    with open(path, "w") as f:
+        json.dump(
+            {name: result.model_dump() for name, result in baseline.items()},
+            f,
+            indent=2,
+            sort_keys=True,
+        )
+
+
+def find_regressions(
+    results: list[BenchmarkResult],
+    baseline: dict[str, BenchmarkResult],
+    threshold: float,
+) -> list[str]:
+    """
+    :returns: описания сценариев, p50 или p99 которых
+     выросли больше чем на threshold относительно базовой линии
+    """
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if not base:
+            continue
+        for field in ("p50_ms", "p99_ms"):
+            current, previous = getattr(result, field), getattr(base, field)
+            if previous and current > previous * (1 + threshold):
+                regressions.append(
+                    f"{result.name} {field}: {previous:.3f} -> {current:.3f}"
+                )
+    return regressions
+
+
+def print_results(results: list[BenchmarkResult]):
+    for result in results:
+        line = (
+            f"{result.name}: n={result.iterations}"
+            f" p50={result.p50_ms:.3f}ms p99={result.p99_ms:.3f}ms"
+        )
+        if result.rows_per_sec is not None:
+            line += f" rows/s={result.rows_per_sec:.0f}"
+        for key, value in result.extra.items():
+            line += f" {key}={value:.2f}"
+        print(line)
+
+
+def add_baseline_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="сохранить результаты как новую базовую линию",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_REGRESSION_THRESHOLD,
+        help="допустимое относительное замедление",
+    )
+
+
+def check_results(
+    results: list[BenchmarkResult], args: argparse.Namespace
+) -> int:
+    """
+    Выводит результаты и сохраняет или сравнивает их с базовой линией.
+
+    :returns: код завершения процесса
+    """
+    print_results(results)
+    if args.update_baseline:
+        save_baseline(args.baseline, results)
+        print(f"Baseline updated. path={args.baseline}")
+        return 0
+
+    regressions = find_regressions(
+        results, load_baseline(args.baseline), args.threshold
+    )
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
@@ -0,0 +1,163 @@
+"""
+Стоимость сжатия ответов по CPU и экономия трафика.
+
+Ответы /message/list и /chat/list разного размера сжимаются gzip
+(как CompressionMiddleware), поток событий _new_message_ - deflate
+с общим контекстом, как permessage-deflate в одном websocket:
+    python -m rchat.benchmarks.compression --levels 1 6 9
+
+Для каждого уровня выводятся время сжатия, размер и доля от исходного
+размера (ratio) и сэкономленные килобайты на миллисекунду CPU.
+"""
+
+import argparse
+import gzip
+import sys
+import time
+import zlib
+
+from rchat.benchmarks.baseline import (
+    BenchmarkResult,
+    add_baseline_arguments,
+    check_results,
+    summarize,
+)
+from rchat.benchmarks.serialization import (
+    get_chat_list_item_data,
+    get_message_data,
+    get_new_message_data,
+)
+from rchat.clients import socketio_json
+from rchat.views.chat.models import ChatListItem, ChatListResponse
+from rchat.views.message.models import (
+    ChatMessagesResponse,
+    MessageResponse,
+    NewMessageResponse,
+)
+
+RESPONSE_SIZES = [20, 100, 500]
+NEW_MESSAGE_EVENTS_COUNT = 100
+
+
+def get_payloads(size: int) -> dict[str, bytes]:
+    """
+    Тела ответов в том виде, в котором их отдаёт ORJSONResponse.
+    Каждое третье сообщение - с ответом и пересылкой.
+    """
+    messages = ChatMessagesResponse(
+        messages=[
+            MessageResponse(**get_message_data(nested=i % 3 == 0))
+            for i in range(size)
+        ]
+    )
+    chat_list = ChatListResponse(
+        chat_list=[
+            ChatListItem(**get_chat_list_item_data(nested=True))
+            for _ in range(size)
+        ]
+    )
+    return {
+        f"message_list.{size}": messages.model_dump_json().encode(),
+        f"chat_list.{size}": chat_list.model_dump_json().encode(),
+    }
+
+
+def get_new_message_events() -> list[bytes]:
+    return [
+        socketio_json.dumps(
+            [
+                "_new_message_",
+                NewMessageResponse(**get_new_message_data(nested=i % 3 == 0)),
+            ]
+        ).encode()
+        for i in range(NEW_MESSAGE_EVENTS_COUNT)
+    ]
+
+
+def deflate_stream(events: list[bytes], level: int) -> int:
+    """
+    Сжимает события одним компрессором (context takeover),
+    каждое событие завершается Z_SYNC_FLUSH, как в permessage-deflate.
+
+    :returns: суммарный размер сжатых событий
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    size = 0
+    for event in events:
+        data = compressor.compress(event)
+        data += compressor.flush(zlib.Z_SYNC_FLUSH)
+        size += len(data) - 4
+    return size
+
+
+def measure(
+    name: str, compress, original_size: int, repeat: int
+) -> BenchmarkResult:
+    timings = []
+    compressed_size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        compressed_size = compress()
+        timings.append(time.perf_counter() - start)
+    result = summarize(
+        name,
+        timings,
+        extra={
+            "bytes": compressed_size,
+            "ratio": compressed_size / original_size,
+        },
+    )
+    result.extra["saved_kb_per_cpu_ms"] = (
+        (original_size - compressed_size) / 1024 / result.p50_ms
+    )
+    return result
+
+
+def run(levels: list[int], repeat: int) -> list[BenchmarkResult]:
+    results = []
+    payloads = {}
+    for size in RESPONSE_SIZES:
+        payloads.update(get_payloads(size))
+    for name, body in payloads.items():
+        print(f"{name}: {len(body)} bytes")
+        for level in levels:
+            results.append(
+                measure(
+                    f"compression/gzip.{name}.level{level}",
+                    lambda: len(gzip.compress(body, compresslevel=level)),
+                    len(body),
+                    repeat,
+                )
+            )
+
+    events = get_new_message_events()
+    events_size = sum(len(event) for event in events)
+    print(f"new_message.x{len(events)}: {events_size} bytes")
+    for level in levels:
+        results.append(
+            measure(
+                f"compression/deflate.new_message.x{len(events)}.level{level}",
+                lambda: deflate_stream(events, level),
+                events_size,
+                repeat,
+            )
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 6, 9])
+    parser.add_argument("--repeat", type=int, default=30)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    results = run(args.levels, args.repeat)
+    sys.exit(check_results(results, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,444 @@
+"""
+Генератор синтетических данных для нагрузочного тестирования.
+
+Создаёт пользователей, сессии, личные и групповые чаты
+(размер групп - распределение Парето), сообщения с ответами
+и пересылками и отметки о прочтении. Данные загружаются через COPY
+(asyncpg copy_records_to_table) в схему из rchat/migrations:
+    python -m rchat.benchmarks.dataset --users 100000 --messages 10000000
+
+У всех пользователей логин user<N> и пароль из --password.
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from asyncpg import connect
+from bcrypt import gensalt, hashpw
+
+from rchat.conf import DATABASE_DSN
+from rchat.schemas.chat import ChatTypeEnum, UserChatRole
+from rchat.schemas.message import MessageTypeEnum
+
+USER_COLUMNS = [
+    "id",
+    "public_id",
+    "password",
+    "email",
+    "first_name",
+    "last_name",
+    "created_timestamp",
+]
+SESSION_COLUMNS = [
+    "id",
+    "user_id",
+    "ip",
+    "user_agent",
+    "is_active",
+    "device_fingerprint",
+    "created_timestamp",
+]
+CHAT_COLUMNS = ["id", "type", "name", "created_by", "created_timestamp"]
+CHAT_USER_COLUMNS = [
+    "chat_id",
+    "user_id",
+    "added_by_user",
+    "role",
+    "created_timestamp",
+]
+MESSAGE_COLUMNS = [
+    "id",
+    "type",
+    "chat_id",
+    "sender_user_id",
+    "sender_chat_id",
+    "message_text",
+    "reply_to_message_id",
+    "forwarded_message_id",
+    "user_initiated_action_id",
+    "created_timestamp",
+]
+MESSAGE_READ_COLUMNS = ["message_id", "user_id", "created_timestamp"]
+
+FIRST_NAMES = ["Иван", "Анна", "Пётр", "Мария", "Алексей", "Ольга", "Олег"]
+LAST_NAMES = ["Иванов", "Смирнова", "Кузнецов", "Попова", None]
+USER_AGENTS = ["Mozilla/5.0 (X11; Linux x86_64)", "rchat-android/1.0"]
+SYLLABLES = ["ка", "ро", "ми", "ла", "то", "ne", "ra", "so", "li", "du"]
+VOCABULARY_SIZE = 5000
+MESSAGE_WORDS_MAX = 20
+# Количество последних сообщений чата, на которые можно ответить
+REPLY_WINDOW = 50
+# Количество сообщений, из которых выбираются пересылаемые
+FORWARD_POOL_SIZE = 10000
+
+# Готовые размеры наборов для бенчмарков
+DATASET_SIZES = {
+    "small": {"users": 1000, "group_chats": 100, "messages": 100000},
+    "medium": {"users": 10000, "group_chats": 1000, "messages": 1000000},
+    "large": {"users": 100000, "group_chats": 10000, "messages": 10000000},
+}
+
+
+class DatasetGenerator:
+    def __init__(self, args: argparse.Namespace):
+        self._args = args
+        self._random = random.Random(args.seed)
+        self._end_time = datetime.now()
+        self._start_time = self._end_time - timedelta(days=args.days)
+        self._user_ids = []
+        # Участники каждого чата, индекс в списке - номер чата
+        self._chat_ids = []
+        self._chat_members = []
+        # Владелец группы, для личных чатов - None
+        self._chat_owners = []
+        self._vocabulary = self._make_vocabulary()
+        self._word_weights = list(
+            itertools.accumulate(
+                1 / rank for rank in range(1, VOCABULARY_SIZE + 1)
+            )
+        )
+
+    def _make_vocabulary(self) -> list[str]:
+        words = set()
+        while len(words) < VOCABULARY_SIZE:
+            length = self._random.randint(2, 5)
+            words.add("".join(self._random.choices(SYLLABLES, k=length)))
+        return list(words)
+
+    def _random_timestamp(self) -> datetime:
+        return (
+            self._start_time
+            + (self._end_time - self._start_time) * self._random.random()
+        )
+
+    def _message_text(self) -> str:
+        words = self._random.choices(
+            self._vocabulary,
+            cum_weights=self._word_weights,
+            k=self._random.randint(1, MESSAGE_WORDS_MAX),
+        )
+        return " ".join(words)
+
+    def users(self):
+        password = hashpw(
+            password=self._args.password.encode(), salt=gensalt()
+        ).decode("utf-8")
+        for i in range(self._args.users):
+            public_id = f"user{i}"
+            user_id = uuid.uuid5(uuid.NAMESPACE_DNS, public_id)
+            self._user_ids.append(user_id)
+            yield (
+                user_id,
+                public_id,
+                password,
+                f"{public_id}@example.com",
+                self._random.choice(FIRST_NAMES),
+                self._random.choice(LAST_NAMES),
+                self._start_time,
+            )
+
+    def sessions(self):
+        for user_id in self._user_ids:
+            for _ in range(self._args.sessions_per_user):
+                yield (
+                    uuid.uuid4(),
+                    user_id,
+                    ".".join(
+                        str(self._random.randint(1, 254)) for _ in range(4)
+                    ),
+                    self._random.choice(USER_AGENTS),
+                    True,
+                    uuid.uuid4().hex,
+                    self._random_timestamp(),
+                )
+
+    def _group_size(self) -> int:
+        """
+        Размер группы с "тяжёлым хвостом":
+        большинство групп маленькие, редкие - очень большие.
+        """
+        size = int(
+            self._args.min_group_size
+            * self._random.paretovariate(self._args.group_size_alpha)
+        )
+        return min(size, self._args.max_group_size, len(self._user_ids))
+
+    def chats(self):
+        private_pairs = set()
+        for i, user_id in enumerate(self._user_ids):
+            for _ in range(self._args.private_chats_per_user):
+                other = self._random.randrange(len(self._user_ids))
+                pair = (min(i, other), max(i, other))
+                if other == i or pair in private_pairs:
+                    continue
+                private_pairs.add(pair)
+                self._chat_ids.append(uuid.uuid4())
+                self._chat_members.append([user_id, self._user_ids[other]])
+                self._chat_owners.append(None)
+                yield (
+                    self._chat_ids[-1],
+                    ChatTypeEnum.private,
+                    None,
+                    None,
+                    self._start_time,
+                )
+
+        for i in range(self._args.group_chats):
+            members = self._random.sample(self._user_ids, self._group_size())
+            self._chat_ids.append(uuid.uuid4())
+            self._chat_members.append(members)
+            self._chat_owners.append(members[0])
+            yield (
+                self._chat_ids[-1],
+                ChatTypeEnum.group,
+                f"group{i}",
+                members[0],
+                self._start_time,
+            )
+
+    def chat_users(self):
+        for chat_id, members, owner in zip(
+            self._chat_ids, self._chat_members, self._chat_owners
+        ):
+            # Участников группы добавляет её владелец
+            for user_id in members:
+                if owner is None:
+                    role, added_by = UserChatRole.member, None
+                elif user_id == owner:
+                    role, added_by = UserChatRole.owner, None
+                else:
+                    role, added_by = UserChatRole.member, owner
+                yield chat_id, user_id, added_by, role, self._start_time
+
+    def message_batches(self):
+        """
+        Генерирует сообщения и отметки о прочтении пачками.
+        Сообщения идут в порядке времени создания,
+        чтобы order_id из последовательности совпадал с этим порядком.
+        Активность чатов распределена по Парето пропорционально
+        количеству участников.
+        """
+        args = self._args
+        chat_weights = list(
+            itertools.accumulate(
+                len(members) * self._random.paretovariate(1.5)
+                for members in self._chat_members
+            )
+        )
+        recent_messages = [[] for _ in self._chat_ids]
+        forward_pool = []
+        step = (self._end_time - self._start_time) / max(
+            args.messages + len(self._chat_ids), 1
+        )
+        timestamp = self._start_time
+
+        messages, reads = [], []
+        for chat_id, owner in zip(self._chat_ids, self._chat_owners):
+            if owner is None:
+                continue
+            messages.append(
+                (
+                    uuid.uuid4(),
+                    MessageTypeEnum.created_chat,
+                    chat_id,
+                    None,
+                    chat_id,
+                    None,
+                    None,
+                    None,
+                    owner,
+                    timestamp,
+                )
+            )
+            timestamp += step
+        yield messages, reads
+        messages = []
+
+        for left in range(args.messages, 0, -args.batch_size):
+            chat_indexes = self._random.choices(
+                range(len(self._chat_ids)),
+                cum_weights=chat_weights,
+                k=min(left, args.batch_size),
+            )
+            for chat_index in chat_indexes:
+                members = self._chat_members[chat_index]
+                recent = recent_messages[chat_index]
+                sender = self._random.choice(members)
+                message_id = uuid.uuid4()
+                reply_to, forwarded, text = None, None, None
+                if forward_pool and self._random.random() < args.forwards:
+                    forwarded = self._random.choice(forward_pool)
+                else:
+                    text = self._message_text()
+                    if recent and self._random.random() < args.replies:
+                        reply_to = self._random.choice(recent)
+                messages.append(
+                    (
+                        message_id,
+                        MessageTypeEnum.text,
+                        self._chat_ids[chat_index],
+                        sender,
+                        None,
+                        text,
+                        reply_to,
+                        forwarded,
+                        None,
+                        timestamp,
+                    )
+                )
+
+                if self._chat_owners[chat_index] is None:
+                    readers = [
+                        member
+                        for member in members
+                        if member != sender
+                        and self._random.random() < args.read_ratio
+                    ]
+                else:
+                    readers_count = min(
+                        int(len(members) * args.read_ratio) + 1,
+                        args.max_readers + 1,
+                        len(members),
+                    )
+                    readers = [
+                        member
+                        for member in self._random.sample(
+                            members, readers_count
+                        )
+                        if member != sender
+                    ][: args.max_readers]
+                for reader in readers:
+                    reads.append((message_id, reader, timestamp + step))
+
+                recent.append(message_id)
+                if len(recent) > REPLY_WINDOW:
+                    recent.pop(0)
+                if len(forward_pool) < FORWARD_POOL_SIZE:
+                    forward_pool.append(message_id)
+                else:
+                    forward_pool[self._random.randrange(FORWARD_POOL_SIZE)] = (
+                        message_id
+                    )
+                timestamp += step
+
+            yield messages, reads
+            messages, reads = [], []
+
+
+async def copy_records(conn, table: str, columns: list[str], records):
+    """
+    Загружает записи в таблицу через COPY, возвращает количество строк.
+    """
+    records = list(records)
+    if records:
+        await conn.copy_records_to_table(
+            table, records=records, columns=columns
+        )
+    return len(records)
+
+
+async def run(args: argparse.Namespace):
+    generator = DatasetGenerator(args)
+    conn = await connect(dsn=DATABASE_DSN)
+    start = time.monotonic()
+    try:
+        if args.truncate:
+            await conn.execute(
+                'truncate "user", "chat", "media" restart identity cascade'
+            )
+
+        async with conn.transaction():
+            for table, columns, records in (
+                ("user", USER_COLUMNS, generator.users()),
+                ("session", SESSION_COLUMNS, generator.sessions()),
+                ("chat", CHAT_COLUMNS, generator.chats()),
+                ("chat_user", CHAT_USER_COLUMNS, generator.chat_users()),
+            ):
+                count = await copy_records(conn, table, columns, records)
+                print(f"{table}: {count} rows")
+
+        messages_count, reads_count = 0, 0
+        for messages, reads in generator.message_batches():
+            async with conn.transaction():
+                messages_count += await copy_records(
+                    conn, "message", MESSAGE_COLUMNS, messages
+                )
+                reads_count += await copy_records(
+                    conn, "message_read", MESSAGE_READ_COLUMNS, reads
+                )
+            print(
+                f"message: {messages_count} rows, "
+                f"message_read: {reads_count} rows, "
+                f"{time.monotonic() - start:.0f} s"
+            )
+
+        await conn.execute(
+            'analyze "user", "session", "chat", "chat_user",'
+            ' "message", "message_read"'
+        )
+    finally:
+        await conn.close()
+
+    print(f"Done in {time.monotonic() - start:.1f} s")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--size",
+        choices=DATASET_SIZES,
+        help="готовый размер набора, переопределяет --users,"
+        " --group-chats и --messages",
+    )
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--sessions-per-user", type=int, default=1)
+    parser.add_argument("--private-chats-per-user", type=int, default=3)
+    parser.add_argument("--group-chats", type=int, default=1000)
+    parser.add_argument("--min-group-size", type=int, default=3)
+    parser.add_argument("--max-group-size", type=int, default=5000)
+    parser.add_argument("--group-size-alpha", type=float, default=1.2)
+    parser.add_argument("--messages", type=int, default=1000000)
+    parser.add_argument("--replies", type=float, default=0.1)
+    parser.add_argument("--forwards", type=float, default=0.03)
+    parser.add_argument("--read-ratio", type=float, default=0.8)
+    parser.add_argument("--max-readers", type=int, default=20)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--batch-size", type=int, default=100000)
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--truncate",
+        action="store_true",
+        help="удалить существующие данные перед загрузкой",
+    )
+    return parser
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    args = build_parser().parse_args(argv)
+    if args.size:
+        vars(args).update(DATASET_SIZES[args.size])
+    return args
+
+
+async def seed_dataset(size: str):
+    """
+    Пересоздаёт данные в базе с готовым размером набора.
+    """
+    await run(parse_args(["--size", size, "--truncate"]))
+
+
+def main():
+    asyncio.run(run(parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Нагрузочный бенчмарк HTTP эндпоинтов.
+
+Приложение запускается в том же процессе (httpx ASGITransport)
+против заполненной локальной базы (rchat.benchmarks.dataset):
+    python -m rchat.benchmarks.http_load --concurrency 32 --requests 2000
+
+Пользователи выбираются по случайным записям участия в чатах,
+поэтому состоящие во многих чатах попадаются чаще ("тяжёлый хвост").
+Для каждого эндпоинта выводятся пропускная способность, перцентили
+задержки и среднее количество запросов к БД на HTTP запрос
+(по метрике rchat_db_query_duration_seconds).
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import sys
+import time
+from typing import Callable, NamedTuple
+
+import httpx
+from asyncpg import create_pool
+
+from rchat.app import app
+from rchat.benchmarks.baseline import (
+    BenchmarkResult,
+    add_baseline_arguments,
+    check_results,
+    summarize,
+)
+from rchat.benchmarks.repository import sample_rows
+from rchat.benchmarks.sessions import create_access_tokens
+from rchat.conf import DATABASE_DSN
+from rchat.metrics import db_query_duration
+from rchat.state import app_state
+
+MESSAGES_PAGE_SIZE = 50
+FIND_PREFIX_LENGTH = 6
+
+
+class EndpointCase(NamedTuple):
+    name: str
+    path: str
+    # Параметры запроса по (chat_id, user_id, public_id)
+    get_params: Callable[[tuple], dict]
+
+
+ENDPOINT_CASES = [
+    EndpointCase("chat_list", "/chat/list", lambda sample: {}),
+    EndpointCase(
+        "message_list",
+        "/message/list",
+        lambda sample: {
+            "chat_id": str(sample[0]),
+            "limit": MESSAGES_PAGE_SIZE,
+        },
+    ),
+    EndpointCase(
+        "chat_get_users",
+        "/chat/get_users",
+        lambda sample: {"chat_id": str(sample[0])},
+    ),
+    EndpointCase(
+        "user_find",
+        "/user/find",
+        lambda sample: {"match_str": sample[2][:FIND_PREFIX_LENGTH]},
+    ),
+]
+
+
+def get_queries_count() -> float:
+    """
+    Общее количество выполненных запросов к БД в процессе.
+    """
+    return sum(
+        sample.value
+        for metric in db_query_duration.collect()
+        for sample in metric.samples
+        if sample.name.endswith("_count")
+    )
+
+
+class HttpBenchmark:
+    def __init__(self, args: argparse.Namespace):
+        self._args = args
+        self._random = random.Random(args.seed)
+        self._samples = []
+        self._headers = {}
+
+    async def prepare(self):
+        """
+        Выбирает пары (чат, участник) и создаёт сессии участников.
+        """
+        pool = await create_pool(dsn=DATABASE_DSN)
+        try:
+            rows = await sample_rows(
+                pool,
+                "chat_user",
+                '"chat_id", "user_id"',
+                self._args.users,
+            )
+            tokens = await create_access_tokens(
+                pool=pool,
+                user_id_list=list({row["user_id"] for row in rows}),
+                user_agent="rchat-http-bench",
+            )
+            async with pool.acquire() as c:
+                public_ids = dict(
+                    await c.fetch(
+                        'select "id", "public_id" from "user"'
+                        ' where "id" = any($1)',
+                        list(tokens),
+                    )
+                )
+        finally:
+            await pool.close()
+
+        if not rows:
+            raise RuntimeError("Database is empty, seed it first")
+
+        for row in rows:
+            user_id = row["user_id"]
+            self._samples.append(
+                (row["chat_id"], user_id, public_ids[user_id])
+            )
+            access_token, fingerprint = tokens[user_id]
+            self._headers[user_id] = {
+                "Authorization": f"Bearer {access_token}",
+                "Fingerprint-ID": fingerprint,
+            }
+
+    async def run_case(
+        self, client: httpx.AsyncClient, case: EndpointCase
+    ) -> BenchmarkResult:
+        timings = []
+        errors = 0
+        left = self._args.requests
+
+        async def worker():
+            nonlocal left, errors
+            while left > 0:
+                left -= 1
+                sample = self._random.choice(self._samples)
+                start = time.perf_counter()
+                response = await client.get(
+                    case.path,
+                    params=case.get_params(sample),
+                    headers=self._headers[sample[1]],
+                )
+                timings.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+
+        queries_before = get_queries_count()
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(worker() for _ in range(self._args.concurrency))
+        )
+        elapsed = time.perf_counter() - start
+        # Колбэки логирования запросов asyncpg выполняются через call_soon
+        await asyncio.sleep(0)
+        queries = get_queries_count() - queries_before
+
+        return summarize(
+            f"http/{self._args.label}/{case.name}",
+            timings,
+            extra={
+                "rps": len(timings) / elapsed,
+                "queries_per_request": queries / len(timings),
+                "errors": errors,
+            },
+        )
+
+    async def run(self) -> list[BenchmarkResult]:
+        await app_state.startup()
+        try:
+            await self.prepare()
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://rchat-bench"
+            ) as client:
+                return [
+                    await self.run_case(client, case)
+                    for case in ENDPOINT_CASES
+                    if not self._args.endpoints
+                    or case.name in self._args.endpoints
+                ]
+        finally:
+            await app_state.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--endpoints",
+        nargs="*",
+        choices=[case.name for case in ENDPOINT_CASES],
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--requests", type=int, default=1000, help="запросов на эндпоинт"
+    )
+    parser.add_argument(
+        "--users", type=int, default=500, help="количество пользователей"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default="current")
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    # Логи запросов в stdout искажают замеры
+    logging.disable(logging.INFO)
+    results = asyncio.run(HttpBenchmark(args).run())
+    sys.exit(check_results(results, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Время импорта модулей приложения (холодный старт процесса).
+
+Каждый замер - отдельный процесс python -X importtime, поэтому
+результаты не зависят от уже загруженных модулей:
+    python -m rchat.benchmarks.imports --module rchat.app --runs 10
+
+Кроме сравнения с базовой линией проверяются бюджет времени импорта
+(--budget-ms, по p50) и то, что тяжёлые редко используемые зависимости
+(--lazy, по умолчанию geocoder и yoyo) не загружаются при импорте.
+При нарушении процесс завершается с кодом 1.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from rchat.benchmarks.baseline import (
+    add_baseline_arguments,
+    check_results,
+    summarize,
+)
+
+DEFAULT_STARTUP_BUDGET_MS = float(
+    os.environ.get("RCHAT_STARTUP_BUDGET_MS", 1500)
+)
+DEFAULT_LAZY_MODULES = ["geocoder", "yoyo"]
+IMPORTTIME_PREFIX = "import time:"
+
+
+def parse_importtime(output: str) -> dict[str, tuple[int, int]]:
+    """
+    Разбирает вывод -X importtime.
+
+    :returns: модуль -> (собственное время, суммарное время) в мкс
+    """
+    timings = {}
+    for line in output.splitlines():
+        if not line.startswith(IMPORTTIME_PREFIX):
+            continue
+        self_us, cumulative_us, name = line.removeprefix(
+            IMPORTTIME_PREFIX
+        ).split("|")
+        if not self_us.strip().isdigit():
+            continue
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def measure_import(module: str) -> dict[str, tuple[int, int]]:
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=os.environ,
+        check=True,
+    )
+    return parse_importtime(process.stderr)
+
+
+def print_top_modules(runs: list[dict[str, tuple[int, int]]], top: int):
+    """
+    Выводит модули с наибольшим суммарным временем импорта (среднее).
+    """
+    cumulative = defaultdict(list)
+    for timings in runs:
+        for name, (_, cumulative_us) in timings.items():
+            cumulative[name].append(cumulative_us)
+    averages = sorted(
+        (
+            (sum(values) / len(runs), name)
+            for name, values in cumulative.items()
+        ),
+        reverse=True,
+    )
+    for average_us, name in averages[:top]:
+        print(f"{average_us / 1000:9.1f}ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--module", nargs="+", default=["rchat.app"])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument(
+        "--budget-ms", type=float, default=DEFAULT_STARTUP_BUDGET_MS
+    )
+    parser.add_argument("--lazy", nargs="*", default=DEFAULT_LAZY_MODULES)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    results = []
+    violations = []
+    for module in args.module:
+        runs = [measure_import(module) for _ in range(args.runs)]
+        print(f"Slowest imports. module={module}")
+        print_top_modules(runs, args.top)
+
+        result = summarize(
+            f"imports/{module}",
+            [timings[module][1] / 1_000_000 for timings in runs],
+        )
+        results.append(result)
+        if result.p50_ms > args.budget_ms:
+            violations.append(
+                f"{module} p50 {result.p50_ms:.1f}ms"
+                f" > budget {args.budget_ms:.1f}ms"
+            )
+        loaded_lazy_modules = [m for m in args.lazy if m in runs[0]]
+        if loaded_lazy_modules:
+            violations.append(
+                f"{module} loads lazy modules: {loaded_lazy_modules}"
+            )
+
+    exit_code = check_results(results, args)
+    for violation in violations:
+        print(f"STARTUP BUDGET {violation}")
+    sys.exit(1 if violations else exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Бенчмарк задержки полнотекстового поиска сообщений.
+
+Запускается против заполненной базы (десятки миллионов сообщений):
+    python -m rchat.benchmarks.message_search --iterations 200
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from asyncpg import create_pool
+
+from rchat.conf import DATABASE_DSN
+from rchat.repository.message import MessageRepository
+
+
+async def sample_search_params(pool, sample_size: int):
+    """
+    Выбирает случайных пользователей и слова из их сообщений.
+    """
+    sql = """
+        select m."sender_user_id" as user_id, m."message_text"
+        from "message" m tablesample system (1)
+        where m."sender_user_id" is not null
+        and m."message_text" is not null
+        limit $1
+    """
+    async with pool.acquire() as c:
+        rows = await c.fetch(sql, sample_size)
+
+    params = []
+    for row in rows:
+        words = [w for w in row["message_text"].split() if len(w) > 3]
+        if words:
+            params.append((row["user_id"], random.choice(words)))
+    return params
+
+
+async def run(iterations: int, limit: int, pages: int):
+    pool = await create_pool(dsn=DATABASE_DSN)
+    repo = MessageRepository(db=pool)
+    try:
+        async with pool.acquire() as c:
+            total = await c.fetchval(
+                "select reltuples::bigint from pg_class"
+                " where relname = 'message'"
+            )
+        params = await sample_search_params(pool, iterations)
+        if not params:
+            print("No messages to sample search terms from")
+            return
+
+        timings = []
+        for user_id, term in params:
+            last_rank, last_order_id = None, None
+            for _ in range(pages):
+                start = time.perf_counter()
+                found = await repo.search_user_messages(
+                    user_id=user_id,
+                    query=term,
+                    limit=limit,
+                    last_rank=last_rank,
+                    last_order_id=last_order_id,
+                )
+                timings.append(time.perf_counter() - start)
+                if len(found) < limit:
+                    break
+                last_rank, last_order_id = found[-1].rank, found[-1].order_id
+    finally:
+        await pool.close()
+
+    timings.sort()
+    quantiles = statistics.quantiles(timings, n=100)
+    print(f"messages (approx): {total}")
+    print(f"queries: {len(timings)}")
+    print(f"p50: {quantiles[49] * 1000:.2f} ms")
+    print(f"p95: {quantiles[94] * 1000:.2f} ms")
+    print(f"p99: {quantiles[98] * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.iterations, args.limit, args.pages))
+
+
+if __name__ == "__main__":
+    main()
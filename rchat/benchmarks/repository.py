@@ -0,0 +1,557 @@
+"""
+Бенчмарк публичных методов репозиториев
+(User, Chat, Message, Session, GeoIP) против локального Postgres.
+
+Без --sizes запускается против текущих данных в базе,
+с --sizes база пересоздаётся генератором rchat.benchmarks.dataset
+для каждого размера (все данные в базе удаляются):
+    python -m rchat.benchmarks.repository --sizes small medium
+
+Пишущие методы работают только со своими данными
+(чаты, пользователи и сессии бенчмарка), которые удаляются в конце.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable, NamedTuple
+
+from asyncpg import Pool, create_pool
+
+from rchat.benchmarks.baseline import (
+    BenchmarkResult,
+    add_baseline_arguments,
+    check_results,
+    summarize,
+)
+from rchat.benchmarks.dataset import DATASET_SIZES, seed_dataset
+from rchat.conf import DATABASE_DSN
+from rchat.repository.chat import ChatRepository
+from rchat.repository.geoip import GeoIPRepository
+from rchat.repository.message import MessageRepository
+from rchat.repository.session import SessionRepository
+from rchat.repository.user import UserRepository
+from rchat.schemas.chat import ChatCreate, ChatTypeEnum, UserChatRole
+from rchat.schemas.message import MessageCreate, MessageTypeEnum
+
+BENCH_PUBLIC_ID_PREFIX = "bench_"
+BENCH_IP_PREFIX = "10.255."
+# Создание пользователя хэширует пароль bcrypt, поэтому итераций меньше
+SLOW_CASE_ITERATIONS = 20
+ID_LIST_SIZE = 20
+MESSAGES_PAGE_SIZE = 50
+
+
+class BenchmarkCase(NamedTuple):
+    name: str
+    run: Callable[[int], Awaitable]
+    iterations: int | None = None
+
+
+def count_rows(result) -> int:
+    if isinstance(result, list):
+        return len(result)
+    return 1 if result else 0
+
+
+async def sample_rows(
+    pool: Pool, table: str, columns: str, count: int, where: str = "true"
+) -> list:
+    """
+    Выбирает случайные строки таблицы через tablesample,
+    процент выборки оценивается по статистике таблицы.
+    """
+    async with pool.acquire() as c:
+        total = await c.fetchval(
+            "select reltuples::bigint from pg_class where relname = $1",
+            table,
+        )
+        percent = min(100.0, 100.0 * count * 4 / max(total, 1))
+        sql = f"""
+            select {columns} from "{table}"
+            tablesample bernoulli ({percent})
+            where {where}
+            limit {count}
+        """
+        return await c.fetch(sql)
+
+
+class RepositoryBenchmark:
+    def __init__(self, pool: Pool, iterations: int):
+        self._pool = pool
+        self._iterations = iterations
+        self.user_repo = UserRepository(db=pool)
+        self.chat_repo = ChatRepository(db=pool)
+        self.message_repo = MessageRepository(db=pool)
+        self.session_repo = SessionRepository(db=pool)
+        self.geoip_repo = GeoIPRepository(db=pool)
+
+        self.users = []
+        self.chat_members = []
+        self.private_chat_users = []
+        self.messages = []
+        self.sessions = []
+        self.ips = []
+        self.search_terms = []
+        # Данные, созданные бенчмарком
+        self.bench_chats = []
+        self.bench_participants = []
+        self.bench_messages = []
+        self.bench_message_senders = []
+        self.bench_users = []
+        self.bench_sessions = []
+
+    async def prepare(self):
+        """
+        Выбирает параметры вызовов из текущих данных
+        и заполняет geoip, чтобы не обращаться к geocoder.
+        """
+        count = self._iterations
+        self.users = await sample_rows(
+            self._pool, "user", '"id", "email", "public_id"', count
+        )
+        self.chat_members = await sample_rows(
+            self._pool, "chat_user", '"chat_id", "user_id"', count
+        )
+        self.messages = await sample_rows(
+            self._pool,
+            "message",
+            '"id", "chat_id", "sender_user_id", "order_id", "message_text"',
+            count,
+            where='"sender_user_id" is not null',
+        )
+        self.sessions = await sample_rows(self._pool, "session", '"id"', count)
+        if not (
+            self.users
+            and self.chat_members
+            and self.messages
+            and self.sessions
+        ):
+            raise RuntimeError("Database is empty, seed it first")
+
+        async with self._pool.acquire() as c:
+            rows = await c.fetch(
+                """
+                select array_agg(cu."user_id") as users
+                from "chat_user" cu
+                join "chat" on "chat"."id" = cu."chat_id"
+                where "chat"."type" = $1
+                and cu."chat_id" = any($2)
+                group by cu."chat_id"
+                """,
+                ChatTypeEnum.private,
+                [row["chat_id"] for row in self.chat_members],
+            )
+            self.private_chat_users = [row["users"] for row in rows]
+
+            self.ips = [
+                f"{BENCH_IP_PREFIX}{i // 256}.{i % 256}" for i in range(count)
+            ]
+            await c.executemany(
+                """
+                insert into "geoip" ("ip", "country", "updated_timestamp")
+                values ($1, 'Russia', $2)
+                on conflict do nothing
+                """,
+                [(ip, datetime.now()) for ip in self.ips],
+            )
+
+        self.search_terms = [
+            (row["sender_user_id"], row["message_text"].split()[0])
+            for row in self.messages
+            if row["message_text"]
+        ]
+
+    async def cleanup(self):
+        async with self._pool.acquire() as c:
+            await c.execute(
+                """
+                delete from "message_read" where "message_id" in (
+                    select "id" from "message" where "chat_id" = any($1)
+                )
+                """,
+                self.bench_chats,
+            )
+            await c.execute(
+                'delete from "message" where "chat_id" = any($1)',
+                self.bench_chats,
+            )
+            await c.execute(
+                'delete from "chat_user" where "chat_id" = any($1)',
+                self.bench_chats,
+            )
+            await c.execute(
+                'delete from "chat" where "id" = any($1)', self.bench_chats
+            )
+            await c.execute(
+                'delete from "session" where "id" = any($1)',
+                self.bench_sessions,
+            )
+            await c.execute(
+                'delete from "user" where "public_id" like $1',
+                f"{BENCH_PUBLIC_ID_PREFIX}%",
+            )
+            await c.execute(
+                'delete from "geoip" where "ip" like $1',
+                f"{BENCH_IP_PREFIX}%",
+            )
+
+    def pick(self, items: list, i: int):
+        return items[i % len(items)]
+
+    def pick_list(self, items: list, i: int, size: int) -> list:
+        return [self.pick(items, i + j) for j in range(size)]
+
+    # UserRepository
+
+    async def user_create(self, i: int):
+        public_id = f"{BENCH_PUBLIC_ID_PREFIX}{uuid.uuid4().hex[:16]}"
+        user = await self.user_repo.create(
+            first_name="Bench",
+            public_id=public_id,
+            password="password",
+            email=f"{public_id}@example.com",
+        )
+        self.bench_users.append(user)
+        return user
+
+    async def user_update_user_info(self, i: int):
+        user = self.pick(self.bench_users, i)
+        return await self.user_repo.update_user_info(
+            user_id=user.id,
+            public_id=user.public_id,
+            first_name="Bench",
+            last_name=str(i),
+            avatar_photo_id=None,
+            profile_status=None,
+            profile_bio=None,
+        )
+
+    # ChatRepository
+
+    async def chat_create_chat(self, i: int):
+        chat = await self.chat_repo.create_chat(
+            create_model=ChatCreate(type=ChatTypeEnum.group, name="bench")
+        )
+        self.bench_chats.append(chat.id)
+        return chat
+
+    async def chat_add_chat_participant(self, i: int):
+        chat_id = self.pick(self.bench_chats, i)
+        user_id = self.pick(self.users, i)["id"]
+        self.bench_participants.append((chat_id, user_id))
+        return await self.chat_repo.add_chat_participant(
+            chat_id=chat_id, user_id=user_id, role=UserChatRole.member
+        )
+
+    async def chat_delete_chat_participant(self, i: int):
+        chat_id, user_id = self.pick(self.bench_participants, i)
+        return await self.chat_repo.delete_chat_participant(
+            chat_id=chat_id, user_id=user_id
+        )
+
+    # MessageRepository
+
+    async def message_create_message(self, i: int):
+        message = await self.message_repo.create_message(
+            message=MessageCreate(
+                type=MessageTypeEnum.text,
+                chat_id=self.pick(self.bench_chats, i),
+                sender_user_id=self.pick(self.users, i)["id"],
+                message_text=f"bench message {i}",
+            )
+        )
+        self.bench_messages.append(message.id)
+        self.bench_message_senders.append(message.sender_user_id)
+        return message
+
+    async def message_mark_message_as_read(self, i: int):
+        return await self.message_repo.mark_message_as_read(
+            message_id=self.pick(self.bench_messages, i),
+            read_by_user=self.pick(self.users, i + 1)["id"],
+        )
+
+    async def message_update_message_text(self, i: int):
+        return await self.message_repo.update_message_text(
+            message_id=self.pick(self.bench_messages, i),
+            user_id=self.pick(self.bench_message_senders, i),
+            message_text=f"bench edited message {i}",
+        )
+
+    async def message_delete_message(self, i: int):
+        return await self.message_repo.delete_message(
+            message_id=self.pick(self.bench_messages, i),
+            user_id=self.pick(self.bench_message_senders, i),
+        )
+
+    # SessionRepository
+
+    async def session_create(self, i: int):
+        session = await self.session_repo.create(
+            user_id=self.pick(self.users, i)["id"],
+            device_fingerprint=uuid.uuid4().hex,
+            ip="127.0.0.1",
+            user_agent="bench",
+        )
+        self.bench_sessions.append(session.id)
+        return session
+
+    async def session_delete_session(self, i: int):
+        return await self.session_repo.delete_session(
+            session_id=self.pick(self.bench_sessions, i)
+        )
+
+    def cases(self) -> list[BenchmarkCase]:
+        """
+        Сценарии в порядке запуска:
+        пишущие сценарии используют данные, созданные предыдущими.
+        """
+        pick = self.pick
+        return [
+            BenchmarkCase(
+                "UserRepository.get_by_id",
+                lambda i: self.user_repo.get_by_id(
+                    id_=pick(self.users, i)["id"]
+                ),
+            ),
+            BenchmarkCase(
+                "UserRepository.get_by_id_list",
+                lambda i: self.user_repo.get_by_id_list(
+                    id_list=[
+                        row["id"]
+                        for row in self.pick_list(self.users, i, ID_LIST_SIZE)
+                    ]
+                ),
+            ),
+            BenchmarkCase(
+                "UserRepository.get_by_email",
+                lambda i: self.user_repo.get_by_email(
+                    email=pick(self.users, i)["email"]
+                ),
+            ),
+            BenchmarkCase(
+                "UserRepository.get_by_public_id",
+                lambda i: self.user_repo.get_by_public_id(
+                    public_id=pick(self.users, i)["public_id"]
+                ),
+            ),
+            BenchmarkCase(
+                "UserRepository.find_users_by_public_id",
+                lambda i: self.user_repo.find_users_by_public_id(
+                    match_str=pick(self.users, i)["public_id"][:5],
+                    except_user_id=pick(self.users, i)["id"],
+                ),
+            ),
+            BenchmarkCase(
+                "UserRepository.create",
+                self.user_create,
+                SLOW_CASE_ITERATIONS,
+            ),
+            BenchmarkCase(
+                "UserRepository.update_user_info", self.user_update_user_info
+            ),
+            BenchmarkCase("ChatRepository.create_chat", self.chat_create_chat),
+            BenchmarkCase(
+                "ChatRepository.add_chat_participant",
+                self.chat_add_chat_participant,
+            ),
+            BenchmarkCase(
+                "ChatRepository.get_by_id",
+                lambda i: self.chat_repo.get_by_id(
+                    chat_id=pick(self.chat_members, i)["chat_id"]
+                ),
+            ),
+            BenchmarkCase(
+                "ChatRepository.get_by_id_list",
+                lambda i: self.chat_repo.get_by_id_list(
+                    id_list=[
+                        row["chat_id"]
+                        for row in self.pick_list(
+                            self.chat_members, i, ID_LIST_SIZE
+                        )
+                    ]
+                ),
+            ),
+            BenchmarkCase(
+                "ChatRepository.get_chat_participant_users",
+                lambda i: self.chat_repo.get_chat_participant_users(
+                    chat_id=pick(self.chat_members, i)["chat_id"]
+                ),
+            ),
+            BenchmarkCase(
+                "ChatRepository.get_user_chats",
+                lambda i: self.chat_repo.get_user_chats(
+                    user_id=pick(self.chat_members, i)["user_id"]
+                ),
+            ),
+            BenchmarkCase(
+                "ChatRepository.get_private_chat_with_users",
+                lambda i: self.chat_repo.get_private_chat_with_users(
+                    users_id_list=pick(self.private_chat_users, i)
+                ),
+            ),
+            BenchmarkCase(
+                "ChatRepository.get_chat_users_with_roles",
+                lambda i: self.chat_repo.get_chat_users_with_roles(
+                    chat_id=pick(self.chat_members, i)["chat_id"]
+                ),
+            ),
+            BenchmarkCase(
+                "ChatRepository.get_user_in_chat",
+                lambda i: self.chat_repo.get_user_in_chat(
+                    chat_id=pick(self.chat_members, i)["chat_id"],
+                    user_id=pick(self.chat_members, i)["user_id"],
+                    chat_type=ChatTypeEnum.group,
+                ),
+            ),
+            BenchmarkCase(
+                "MessageRepository.create_message",
+                self.message_create_message,
+            ),
+            BenchmarkCase(
+                "MessageRepository.mark_message_as_read",
+                self.message_mark_message_as_read,
+            ),
+            BenchmarkCase(
+                "MessageRepository.update_message_text",
+                self.message_update_message_text,
+            ),
+            BenchmarkCase(
+                "MessageRepository.delete_message",
+                self.message_delete_message,
+            ),
+            BenchmarkCase(
+                "MessageRepository.get_chat_messages",
+                lambda i: self.message_repo.get_chat_messages(
+                    chat_id=pick(self.messages, i)["chat_id"],
+                    last_order_id=pick(self.messages, i)["order_id"],
+                    limit=MESSAGES_PAGE_SIZE,
+                ),
+            ),
+            BenchmarkCase(
+                "MessageRepository.get_by_id",
+                lambda i: self.message_repo.get_by_id(
+                    id_=pick(self.messages, i)["id"]
+                ),
+            ),
+            BenchmarkCase(
+                "MessageRepository.get_last_chat_message",
+                lambda i: self.message_repo.get_last_chat_message(
+                    chat_id=pick(self.messages, i)["chat_id"]
+                ),
+            ),
+            BenchmarkCase(
+                "MessageRepository.get_read_user_id_list",
+                lambda i: self.message_repo.get_read_user_id_list(
+                    message_id=pick(self.messages, i)["id"]
+                ),
+            ),
+            BenchmarkCase(
+                "MessageRepository.get_unread_messages_before_for_user",
+                lambda i: (
+                    self.message_repo.get_unread_messages_before_for_user(
+                        chat_id=pick(self.messages, i)["chat_id"],
+                        before_message_id=pick(self.messages, i)["id"],
+                        user_id=pick(self.messages, i)["sender_user_id"],
+                    )
+                ),
+            ),
+            BenchmarkCase(
+                "MessageRepository.search_user_messages",
+                lambda i: self.message_repo.search_user_messages(
+                    user_id=pick(self.search_terms, i)[0],
+                    query=pick(self.search_terms, i)[1],
+                    limit=MESSAGES_PAGE_SIZE,
+                ),
+            ),
+            BenchmarkCase("SessionRepository.create", self.session_create),
+            BenchmarkCase(
+                "SessionRepository.get_by_id",
+                lambda i: self.session_repo.get_by_id(
+                    id_=pick(self.sessions, i)["id"]
+                ),
+            ),
+            BenchmarkCase(
+                "SessionRepository.delete_session",
+                self.session_delete_session,
+            ),
+            BenchmarkCase(
+                "ChatRepository.delete_chat_participant",
+                self.chat_delete_chat_participant,
+            ),
+            BenchmarkCase(
+                "GeoIPRepository.get_data_by_ip",
+                lambda i: self.geoip_repo.get_data_by_ip(ip=pick(self.ips, i)),
+            ),
+        ]
+
+    async def run(self, label: str) -> list[BenchmarkResult]:
+        skipped_cases = set()
+        if not self.private_chat_users:
+            skipped_cases.add("ChatRepository.get_private_chat_with_users")
+        if not self.search_terms:
+            skipped_cases.add("MessageRepository.search_user_messages")
+
+        results = []
+        for case in self.cases():
+            if case.name in skipped_cases:
+                print(f"Skip {case.name}: no sample data")
+                continue
+            timings, rows = [], 0
+            for i in range(case.iterations or self._iterations):
+                start = time.perf_counter()
+                result = await case.run(i)
+                timings.append(time.perf_counter() - start)
+                rows += count_rows(result)
+            results.append(
+                summarize(f"repository/{label}/{case.name}", timings, rows)
+            )
+        return results
+
+
+async def run_benchmarks(label: str, iterations: int) -> list[BenchmarkResult]:
+    pool = await create_pool(dsn=DATABASE_DSN)
+    benchmark = RepositoryBenchmark(pool=pool, iterations=iterations)
+    try:
+        await benchmark.prepare()
+        return await benchmark.run(label)
+    finally:
+        await benchmark.cleanup()
+        await pool.close()
+
+
+async def run(args: argparse.Namespace) -> list[BenchmarkResult]:
+    if not args.sizes:
+        return await run_benchmarks(args.label, args.iterations)
+
+    results = []
+    for size in args.sizes:
+        await seed_dataset(size)
+        results += await run_benchmarks(size, args.iterations)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--sizes", nargs="*", choices=DATASET_SIZES)
+    parser.add_argument(
+        "--label",
+        default="current",
+        help="имя набора данных в результатах при запуске без --sizes",
+    )
+    parser.add_argument("--iterations", type=int, default=200)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    sys.exit(check_results(results, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Микро-бенчмарк сериализации моделей горячих путей:
+NewMessageResponse, MessageResponse, ChatListItem, ChatParticipantWithInfo.
+
+Для каждой модели измеряются создание экземпляра, model_dump,
+model_dump_json и кодирование пакета события Socket.IO в JSON
+и MessagePack (с размером пакета в байтах), в том числе
+с вложенными ForeignMessage (ответ и пересылка) и MessageSender:
+    python -m rchat.benchmarks.serialization --number 2000
+
+Результаты сравниваются с той же базовой линией, что и другие бенчмарки.
+"""
+
+import argparse
+import sys
+import timeit
+import uuid
+from datetime import datetime, time
+from typing import Callable
+
+from pydantic import BaseModel
+from socketio import packet
+
+from rchat.benchmarks.baseline import (
+    BenchmarkResult,
+    add_baseline_arguments,
+    check_results,
+    summarize,
+)
+from rchat.clients import socketio_json
+from rchat.clients.socketio_msgpack import CompactMsgPackPacket
+from rchat.schemas.chat import (
+    ChatParticipantWithInfo,
+    ChatTypeEnum,
+    UserChatRole,
+)
+from rchat.schemas.message import MessageTypeEnum
+from rchat.views.chat.models import ChatListItem, LastChatMessage
+from rchat.views.message.models import (
+    ChatInfo,
+    ForeignMessage,
+    MessageResponse,
+    MessageSender,
+    NewMessageResponse,
+)
+
+MESSAGE_TEXT = "Текст сообщения средней длины для замеров " * 4
+AVATAR_URL = f"http://localhost:8080/media/{uuid.uuid4()}?size=160"
+READ_BY_USERS_COUNT = 20
+
+
+class JsonPacket(packet.Packet):
+    json = socketio_json
+
+
+def make_sender() -> MessageSender:
+    return MessageSender(
+        user_id=uuid.uuid5(uuid.NAMESPACE_DNS, "user1"),
+        name="Иван Иванов",
+        avatar_photo_url=AVATAR_URL,
+    )
+
+
+def make_foreign_message() -> ForeignMessage:
+    return ForeignMessage(
+        id=uuid.uuid4(),
+        type=MessageTypeEnum.text,
+        message_text=MESSAGE_TEXT,
+        sender=make_sender(),
+    )
+
+
+def get_message_data(nested: bool) -> dict:
+    """
+    Данные сообщения в том виде, в котором они передаются в модель
+    ответа во views: вложенные модели уже созданы.
+    """
+    return {
+        "id": uuid.uuid4(),
+        "type": MessageTypeEnum.text,
+        "sender": make_sender(),
+        "message_text": MESSAGE_TEXT,
+        "reply_to_message": make_foreign_message() if nested else None,
+        "forwarded_message": make_foreign_message() if nested else None,
+        "is_silent": False,
+        "created_at": datetime.now(),
+        "read_by_users": [
+            uuid.uuid5(uuid.NAMESPACE_DNS, f"user{i}")
+            for i in range(READ_BY_USERS_COUNT)
+        ],
+    }
+
+
+def get_new_message_data(nested: bool) -> dict:
+    data = get_message_data(nested)
+    data["chat"] = ChatInfo(
+        id=uuid.uuid4(),
+        type=ChatTypeEnum.group,
+        name="Рабочий чат",
+        is_work_chat=True,
+        allow_messages_from=time(9),
+        allow_messages_to=time(18),
+        avatar_photo_url=AVATAR_URL,
+        created_at=datetime.now(),
+    )
+    return data
+
+
+def get_chat_list_item_data(nested: bool) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "name": "Рабочий чат",
+        "avatar_photo_url": AVATAR_URL,
+        "type": ChatTypeEnum.group,
+        "last_message": (
+            LastChatMessage(
+                id=uuid.uuid4(),
+                message_type=MessageTypeEnum.text,
+                message_text=MESSAGE_TEXT,
+                created_at=datetime.now(),
+                sender=make_sender(),
+            )
+            if nested
+            else None
+        ),
+    }
+
+
+def get_chat_participant_data(nested: bool) -> dict:
+    """
+    Данные участника в виде строки из БД.
+    """
+    return {
+        "id": uuid.uuid5(uuid.NAMESPACE_DNS, "user1"),
+        "name": "Иван Иванов",
+        "role": UserChatRole.member,
+        "avatar_photo_id": uuid.uuid4(),
+        "last_online": datetime.now(),
+        "added_by_user": uuid.uuid5(uuid.NAMESPACE_DNS, "user2"),
+    }
+
+
+MODEL_CASES: list[tuple[type[BaseModel], Callable[[bool], dict], bool]] = [
+    (NewMessageResponse, get_new_message_data, True),
+    (MessageResponse, get_message_data, True),
+    (ChatListItem, get_chat_list_item_data, True),
+    (ChatParticipantWithInfo, get_chat_participant_data, False),
+]
+
+
+def measure(
+    name: str,
+    func: Callable,
+    number: int,
+    repeat: int,
+    extra: dict[str, float] | None = None,
+) -> BenchmarkResult:
+    """
+    Замеряет func пачками по number вызовов (timeit отключает gc).
+    Перцентили - по времени одного вызова в пачке, rows/s - вызовов в секунду.
+    """
+    timings = [
+        total / number
+        for total in timeit.Timer(func).repeat(repeat=repeat, number=number)
+    ]
+    return summarize(name, timings, rows=len(timings), extra=extra)
+
+
+def run(number: int, repeat: int) -> list[BenchmarkResult]:
+    results = []
+    for model, get_data, has_nested in MODEL_CASES:
+        variants = ["plain", "nested"] if has_nested else ["plain"]
+        for variant in variants:
+            data = get_data(variant == "nested")
+            instance = model(**data)
+            json_packet = JsonPacket(packet.EVENT, data=["event", instance])
+            msgpack_packet = CompactMsgPackPacket(
+                packet.EVENT, data=["event", instance]
+            )
+            prefix = f"serialization/{model.__name__}.{variant}"
+            results += [
+                measure(
+                    f"{prefix}.construct",
+                    lambda: model(**data),
+                    number,
+                    repeat,
+                ),
+                measure(
+                    f"{prefix}.model_dump",
+                    instance.model_dump,
+                    number,
+                    repeat,
+                ),
+                measure(
+                    f"{prefix}.model_dump_json",
+                    instance.model_dump_json,
+                    number,
+                    repeat,
+                ),
+                measure(
+                    f"{prefix}.socketio_json",
+                    json_packet.encode,
+                    number,
+                    repeat,
+                    extra={"bytes": len(json_packet.encode().encode())},
+                ),
+                measure(
+                    f"{prefix}.socketio_msgpack",
+                    msgpack_packet.encode,
+                    number,
+                    repeat,
+                    extra={"bytes": len(msgpack_packet.encode())},
+                ),
+            ]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--number", type=int, default=1000, help="вызовов в одном замере"
+    )
+    parser.add_argument("--repeat", type=int, default=50)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    results = run(args.number, args.repeat)
+    sys.exit(check_results(results, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Пропускная способность HTTP сервера при разных настройках uvicorn.
+
+Для каждого сочетания --workers, --loops и --http запускается
+отдельный процесс uvicorn, который нагружается keep-alive
+соединениями HTTP/1.1 (--connections) в течение --duration секунд.
+По умолчанию запускается минимальное ASGI приложение (stack_app),
+чтобы измерить только стек сервера без БД:
+    python -m rchat.benchmarks.server --workers 1 2 \\
+        --loops asyncio uvloop --http h11 httptools
+
+Для замеров самого приложения на заполненной базе
+(rchat.benchmarks.dataset) нужны приложение, путь и токен доступа:
+    python -m rchat.benchmarks.server --app rchat.app:app \\
+        --path /chat/list --header "Authorization: Bearer <token>"
+
+Стек сервера (stack_app, 1 CPU вместе с нагрузкой, 50 соединений, 5 с):
+    asyncio + h11           5 650 rps, p50 8.7 ms, p99 14.7 ms
+    asyncio + httptools    19 040 rps, p50 2.5 ms, p99 4.5 ms
+    uvloop + h11            8 940 rps, p50 5.5 ms, p99 9.0 ms
+    uvloop + httptools     26 410 rps, p50 1.8 ms, p99 3.7 ms
+Несколько воркеров на одном CPU прироста не дают, их количество
+подбирается по числу ядер сервера.
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import subprocess
+import sys
+import time
+
+from rchat.benchmarks.baseline import (
+    add_baseline_arguments,
+    check_results,
+    summarize,
+)
+
+STACK_APP = "rchat.benchmarks.server:stack_app"
+STACK_APP_BODY = b'{"status":"ok"}'
+SERVER_START_TIMEOUT_SEC = 30
+
+
+async def stack_app(scope, receive, send):
+    """
+    ASGI приложение без логики для замеров стека сервера.
+    """
+    if scope["type"] != "http":
+        return
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json")],
+        }
+    )
+    await send({"type": "http.response.body", "body": STACK_APP_BODY})
+
+
+def start_server(args, workers: int, loop: str, http: str, port: int):
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            args.app,
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--loop",
+            loop,
+            "--http",
+            http,
+            "--backlog",
+            str(args.backlog),
+            "--no-access-log",
+            "--log-level",
+            "warning",
+        ],
+        env=os.environ,
+    )
+
+
+async def wait_for_server(port: int):
+    deadline = time.monotonic() + SERVER_START_TIMEOUT_SEC
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            await asyncio.sleep(0.1)
+            continue
+        writer.close()
+        await writer.wait_closed()
+        return
+    raise TimeoutError(f"Server is not started. port={port}")
+
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    """
+    Читает ответ с Content-Length или chunked, возвращает статус.
+    """
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    headers = {
+        name.lower(): value.strip()
+        for name, _, value in (line.partition(":") for line in lines[1:])
+    }
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+        return status
+
+    while size := int((await reader.readline()).strip(), 16):
+        await reader.readexactly(size + 2)
+    await reader.readline()
+    return status
+
+
+async def run_connection(
+    port: int, request: bytes, finish_at: float, timings: list, errors: list
+):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while time.perf_counter() < finish_at:
+            start = time.perf_counter()
+            writer.write(request)
+            status = await read_response(reader)
+            timings.append(time.perf_counter() - start)
+            if status >= 400:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run_load(args, port: int) -> tuple[list[float], list[int], float]:
+    headers = "".join(f"{header}\r\n" for header in args.header)
+    request = (
+        f"GET {args.path} HTTP/1.1\r\nHost: localhost\r\n{headers}\r\n"
+    ).encode()
+    timings, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            run_connection(
+                port, request, start + args.duration, timings, errors
+            )
+            for _ in range(args.connections)
+        )
+    )
+    return timings, errors, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--app", default=STACK_APP)
+    parser.add_argument("--path", default="/")
+    parser.add_argument(
+        "--header", action="append", default=[], help="заголовок запроса"
+    )
+    parser.add_argument("--workers", type=int, nargs="+", default=[1])
+    parser.add_argument("--loops", nargs="+", default=["asyncio", "uvloop"])
+    parser.add_argument("--http", nargs="+", default=["h11", "httptools"])
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--connections", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--label", default="stack")
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    results = []
+    for workers, loop, http in itertools.product(
+        args.workers, args.loops, args.http
+    ):
+        server = start_server(args, workers, loop, http, args.port)
+        try:
+            asyncio.run(wait_for_server(args.port))
+            timings, errors, elapsed = asyncio.run(run_load(args, args.port))
+        finally:
+            server.terminate()
+            server.wait()
+
+        results.append(
+            summarize(
+                f"server/{args.label}/w{workers}-{loop}-{http}",
+                timings,
+                extra={
+                    "requests_per_sec": len(timings) / elapsed,
+                    "errors": len(errors),
+                },
+            )
+        )
+    sys.exit(check_results(results, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Создание сессий пользователей для нагрузочных тестов
+напрямую в базе, без входа через /api/auth (bcrypt на каждого).
+"""
+
+import uuid
+
+from asyncpg import Pool
+from pydantic import UUID5
+
+from rchat.repository.session import SessionRepository
+from rchat.repository.user import UserRepository
+from rchat.views.auth.helpers import generate_tokens
+
+
+async def create_access_tokens(
+    pool: Pool, user_id_list: list[UUID5], user_agent: str
+) -> dict[UUID5, tuple[str, str]]:
+    """
+    Создаёт сессии пользователей.
+
+    :returns: словарь user_id -> (access_token, device_fingerprint)
+    """
+    user_repo = UserRepository(db=pool)
+    session_repo = SessionRepository(db=pool)
+    tokens = {}
+    for user in await user_repo.get_by_id_list(id_list=user_id_list):
+        fingerprint = uuid.uuid4().hex
+        session = await session_repo.create(
+            user_id=user.id,
+            device_fingerprint=fingerprint,
+            user_agent=user_agent,
+        )
+        access_token = generate_tokens(session=session, user=user)[
+            "access_token"
+        ]
+        tokens[user.id] = (access_token, fingerprint)
+    return tokens
@@ -0,0 +1,344 @@
+"""
+Нагрузочный тест Socket.IO: N авторизованных подключений к /socks.
+
+Чаты и их участники выбираются из заполненной базы
+(rchat.benchmarks.dataset), поэтому размеры чатов повторяют
+распределение набора данных. Сессии и токены создаются напрямую в базе,
+поэтому тест запускается с теми же настройками, что и сервер:
+    python -m rchat.benchmarks.socketio_load \\
+        --url http://localhost:8080 --connections 2000 --duration 60
+
+Подключённые клиенты отправляют _new_message_ и _read_message_
+с заданной частотой (в секунду на весь тест). Для каждого получателя
+измеряется задержка доставки сообщения от отправки до получения,
+неполученные сообщения считаются потерянными. Итоги записываются в JSON.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+
+import socketio
+from asyncpg import Pool, create_pool
+
+from rchat.benchmarks.baseline import (
+    add_baseline_arguments,
+    check_results,
+    get_percentile,
+    summarize,
+)
+from rchat.benchmarks.sessions import create_access_tokens
+from rchat.conf import DATABASE_DSN
+
+# Имена событий протокола (как в rchat.clients.socketio_client)
+NEW_MESSAGE_EVENT = "_new_message_"
+READ_MESSAGE_EVENT = "_read_message_"
+ERROR_EVENT = "_error_"
+MESSAGE_TAG_PREFIX = "load "
+# Верхние границы размеров чатов для группировки задержек
+CHAT_SIZE_BUCKETS = [2, 10, 100, 1000]
+# Количество полученных сообщений, которые клиент может отметить прочитанными
+READ_CANDIDATES_LIMIT = 100
+
+
+def get_chat_size_bucket(size: int) -> str:
+    for bound in CHAT_SIZE_BUCKETS:
+        if size <= bound:
+            return f"<={bound}"
+    return f">{CHAT_SIZE_BUCKETS[-1]}"
+
+
+def parse_payload(data) -> dict:
+    """
+    Сервер может отправлять данные события строкой JSON или объектом.
+    """
+    return json.loads(data) if isinstance(data, str) else data
+
+
+class SentMessage:
+    def __init__(self, sent_at: float, chat_size: int, recipients: set):
+        self.sent_at = sent_at
+        self.chat_size = chat_size
+        self.recipients = recipients
+        self.delivered = set()
+
+
+class LoadClient:
+    def __init__(self, harness: "LoadHarness", user_id: uuid.UUID):
+        self.harness = harness
+        self.user_id = user_id
+        self.client = socketio.AsyncClient(reconnection=False)
+        self.read_candidates = []
+        self.client.on(NEW_MESSAGE_EVENT, self.on_new_message)
+        self.client.on(ERROR_EVENT, self.on_error)
+
+    async def on_new_message(self, data):
+        received_at = time.perf_counter()
+        message = parse_payload(data)
+        text = message.get("message_text") or ""
+        if not text.startswith(MESSAGE_TAG_PREFIX):
+            return
+
+        tag = text.removeprefix(MESSAGE_TAG_PREFIX)
+        self.harness.on_delivered(
+            tag=tag,
+            user_id=self.user_id,
+            received_at=received_at,
+        )
+        if message["sender"]["user_id"] != str(self.user_id):
+            self.read_candidates.append((message["id"], message["chat"]["id"]))
+            if len(self.read_candidates) > READ_CANDIDATES_LIMIT:
+                self.read_candidates.pop(0)
+
+    async def on_error(self, data):
+        error = parse_payload(data)
+        self.harness.errors[f"{error['event_name']}:{error['error']}"] += 1
+
+
+class LoadHarness:
+    def __init__(self, args: argparse.Namespace):
+        self._args = args
+        self._random = random.Random(args.seed)
+        self.clients: dict[uuid.UUID, LoadClient] = {}
+        self.chats: list[tuple[uuid.UUID, list[uuid.UUID], int]] = []
+        self.sent: dict[str, SentMessage] = {}
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+        self.connect_timings = []
+        self.connect_failures = 0
+        self.reads_sent = 0
+
+    async def select_chats(self, pool: Pool):
+        """
+        Набирает случайные чаты, пока участников не станет
+        --connections. Из последнего чата берётся часть участников.
+        """
+        sql = """
+            select cu."chat_id", array_agg(cu."user_id") as members
+            from "chat_user" cu
+            where cu."chat_id" in (
+                select "id" from "chat" order by random() limit $1
+            )
+            group by cu."chat_id"
+        """
+        async with pool.acquire() as c:
+            rows = await c.fetch(sql, self._args.connections)
+
+        users = set()
+        for row in rows:
+            members = row["members"]
+            free_slots = self._args.connections - len(users)
+            new_members = [m for m in members if m not in users]
+            connected = [m for m in members if m in users]
+            connected += new_members[:free_slots]
+            if len(connected) < 2:
+                continue
+            users.update(connected)
+            self.chats.append((row["chat_id"], connected, len(members)))
+            if len(users) >= self._args.connections:
+                break
+        return users
+
+    async def connect_client(
+        self, user_id, access_token: str, fingerprint: str, semaphore
+    ):
+        load_client = LoadClient(harness=self, user_id=user_id)
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await load_client.client.connect(
+                    self._args.url,
+                    headers={
+                        "Authorization": f"Bearer {access_token}",
+                        "Fingerprint-ID": fingerprint,
+                    },
+                    transports=["websocket"],
+                    socketio_path="socks",
+                )
+            except socketio.exceptions.ConnectionError:
+                self.connect_failures += 1
+                return
+            self.connect_timings.append(time.perf_counter() - start)
+        self.clients[user_id] = load_client
+
+    def on_delivered(self, tag: str, user_id: uuid.UUID, received_at: float):
+        sent_message = self.sent.get(tag)
+        if not sent_message or user_id in sent_message.delivered:
+            return
+
+        sent_message.delivered.add(user_id)
+        self.latencies[get_chat_size_bucket(sent_message.chat_size)].append(
+            received_at - sent_message.sent_at
+        )
+
+    async def send_messages(self, finish_at: float):
+        while time.perf_counter() < finish_at:
+            await asyncio.sleep(
+                self._random.expovariate(self._args.message_rate)
+            )
+            chat_id, members, chat_size = self._random.choice(self.chats)
+            connected = [m for m in members if m in self.clients]
+            if not connected:
+                continue
+            sender = self._random.choice(connected)
+            tag = uuid.uuid4().hex
+            # Отправитель тоже участник чата и получает своё сообщение
+            self.sent[tag] = SentMessage(
+                sent_at=time.perf_counter(),
+                chat_size=chat_size,
+                recipients=set(connected),
+            )
+            await self.clients[sender].client.emit(
+                NEW_MESSAGE_EVENT,
+                {
+                    "chat_id": str(chat_id),
+                    "message_text": f"{MESSAGE_TAG_PREFIX}{tag}",
+                },
+            )
+
+    async def send_reads(self, finish_at: float):
+        if not self._args.read_rate:
+            return
+
+        while time.perf_counter() < finish_at:
+            await asyncio.sleep(self._random.expovariate(self._args.read_rate))
+            readers = [c for c in self.clients.values() if c.read_candidates]
+            if not readers:
+                continue
+            reader = self._random.choice(readers)
+            message_id, chat_id = reader.read_candidates.pop(
+                self._random.randrange(len(reader.read_candidates))
+            )
+            await reader.client.emit(
+                READ_MESSAGE_EVENT,
+                {"message_id": message_id, "chat_id": chat_id},
+            )
+            self.reads_sent += 1
+
+    async def run(self) -> dict:
+        args = self._args
+        pool = await create_pool(dsn=DATABASE_DSN)
+        try:
+            users = await self.select_chats(pool)
+            tokens = await create_access_tokens(
+                pool=pool, user_id_list=list(users), user_agent="rchat-load"
+            )
+        finally:
+            await pool.close()
+
+        semaphore = asyncio.Semaphore(args.connect_concurrency)
+        await asyncio.gather(
+            *(
+                self.connect_client(user_id, *user_tokens, semaphore)
+                for user_id, user_tokens in tokens.items()
+            )
+        )
+        print(
+            f"Connected: {len(self.clients)}, failed: {self.connect_failures}"
+        )
+
+        finish_at = time.perf_counter() + args.duration
+        try:
+            await asyncio.gather(
+                self.send_messages(finish_at), self.send_reads(finish_at)
+            )
+            await asyncio.sleep(args.drain)
+        finally:
+            await asyncio.gather(
+                *(c.client.disconnect() for c in self.clients.values())
+            )
+
+        return self.get_summary()
+
+    def get_summary(self) -> dict:
+        expected = sum(len(m.recipients) for m in self.sent.values())
+        delivered = sum(len(m.delivered) for m in self.sent.values())
+        all_latencies = sorted(
+            latency
+            for latencies in self.latencies.values()
+            for latency in latencies
+        )
+        return {
+            "options": {
+                key: value
+                for key, value in vars(self._args).items()
+                if key not in ("baseline", "update_baseline", "output")
+            },
+            "connections": len(self.clients),
+            "connect_failures": self.connect_failures,
+            "connect_p50_ms": (
+                get_percentile(self.connect_timings, 50) * 1000
+                if self.connect_timings
+                else None
+            ),
+            "messages_sent": len(self.sent),
+            "reads_sent": self.reads_sent,
+            "deliveries_expected": expected,
+            "deliveries_received": delivered,
+            "drop_rate": 1 - delivered / expected if expected else 0,
+            "latency_ms": {
+                bucket: {
+                    "count": len(latencies),
+                    "p50": get_percentile(latencies, 50) * 1000,
+                    "p99": get_percentile(latencies, 99) * 1000,
+                }
+                for bucket, latencies in sorted(self.latencies.items())
+                + [("all", all_latencies)]
+                if latencies
+            },
+            "errors": dict(self.errors),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--connect-concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--drain", type=float, default=5)
+    parser.add_argument(
+        "--message-rate", type=float, default=100, help="сообщений в секунду"
+    )
+    parser.add_argument(
+        "--read-rate", type=float, default=50, help="прочтений в секунду"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", default="default")
+    parser.add_argument("--output", default="socketio_load_summary.json")
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    harness = LoadHarness(args)
+    summary = asyncio.run(harness.run())
+    with open(args.output, "w") as f:
+        json.dump(summary, f, indent=2, default=str)
+    print(json.dumps(summary, indent=2, default=str))
+
+    all_latencies = [
+        latency
+        for latencies in harness.latencies.values()
+        for latency in latencies
+    ]
+    if not all_latencies:
+        print("No messages delivered")
+        sys.exit(1)
+
+    result = summarize(
+        f"socketio/{args.label}/new_message_delivery",
+        all_latencies,
+        extra={"drop_rate": summary["drop_rate"]},
+    )
+    sys.exit(check_results([result], args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,34 @@
 import logging
+import time
+from contextlib import nullcontext
 from enum import StrEnum
+from urllib.parse import parse_qs
 
 import socketio
 from fastapi import HTTPException
-from pydantic import ValidationError
+from pydantic import BaseModel, ValidationError
 from socketio import packet
 
+from rchat.clients import socketio_json
+from rchat.clients.socketio_manager import (
+    AsyncPostgresManager,
+    AsyncSerializerManager,
+)
+from rchat.clients.socketio_msgpack import (
+    CompactMsgPackPacket,
+    SocketioSerializerEnum,
+)
+from rchat.conf import (
+    QUERY_BUDGET_PER_SOCKET_EVENT,
+    SERVER_WORKERS,
+    SOCKETIO_STRINGIFY_PAYLOADS,
+)
+from rchat.metrics import (
+    get_socketio_event_metrics,
+    socketio_connected_sockets,
+)
+from rchat.profiling import capture_profile, is_valid_profiling_token
+from rchat.query_stats import QueryStats, check_query_budget, query_stats_var
 from rchat.views.auth.helpers import check_access_token
 
 logger = logging.getLogger(__name__)
@@ -16,7 +39,9 @@ class SocketioEventsEnum(StrEnum):
     update_message = "_update_message_"
     delete_message = "_delete_message_"
     read_message = "_read_message_"
+    resume = "_resume_"
     error = "_error_"
+    profile = "_profile_"
 
 
 class SocketioErrorStatusEnum(StrEnum):
@@ -29,8 +54,119 @@ class SocketIOClient(socketio.AsyncServer):
         super().__init__(
             async_mode="asgi",
             cors_allowed_origins="*",
+            json=socketio_json,
+            # Запросы long-polling одной сессии могут попасть
+            # в разные воркеры, websocket всегда остаётся в одном
+            transports=(
+                ["websocket"]
+                if SERVER_WORKERS > 1
+                else ["polling", "websocket"]
+            ),
+            client_manager=(
+                AsyncPostgresManager()
+                if SERVER_WORKERS > 1
+                else AsyncSerializerManager()
+            ),
         )
+        # Пользователи, подключённые к этому воркеру
         self.users = {}
+        # sid сокетов, подключённых с токеном профилирования
+        self.profiled_sids = set()
+        # eio_sid подключений, выбравших MessagePack
+        self.msgpack_eio_sids = set()
+
+    def get_packet_class(self, eio_sid):
+        if eio_sid in self.msgpack_eio_sids:
+            return CompactMsgPackPacket
+        return self.packet_class
+
+    async def _handle_eio_connect(self, eio_sid, environ):
+        query = parse_qs(environ.get("QUERY_STRING", ""))
+        serializer = query.get("serializer", [SocketioSerializerEnum.json])
+        if serializer[0] == SocketioSerializerEnum.msgpack:
+            self.msgpack_eio_sids.add(eio_sid)
+        return await super()._handle_eio_connect(eio_sid, environ)
+
+    async def _handle_eio_disconnect(self, eio_sid):
+        await super()._handle_eio_disconnect(eio_sid)
+        self.msgpack_eio_sids.discard(eio_sid)
+
+    async def _handle_eio_message(self, eio_sid, data):
+        """
+        Пакеты MessagePack не бывают бинарными пакетами с вложениями,
+        поэтому разбираются целиком и без состояния.
+        """
+        if eio_sid not in self.msgpack_eio_sids:
+            return await super()._handle_eio_message(eio_sid, data)
+
+        pkt = CompactMsgPackPacket(encoded_packet=data)
+        if pkt.packet_type == packet.CONNECT:
+            await self._handle_connect(eio_sid, pkt.namespace, pkt.data)
+        elif pkt.packet_type == packet.DISCONNECT:
+            await self._handle_disconnect(eio_sid, pkt.namespace)
+        elif pkt.packet_type == packet.EVENT:
+            await self._handle_event(eio_sid, pkt.namespace, pkt.id, pkt.data)
+        elif pkt.packet_type == packet.ACK:
+            await self._handle_ack(eio_sid, pkt.namespace, pkt.id, pkt.data)
+        else:
+            raise ValueError("Unexpected packet type.")
+
+    async def _send_packet(self, eio_sid, pkt):
+        packet_class = self.get_packet_class(eio_sid)
+        if not isinstance(pkt, packet_class):
+            pkt = packet_class(
+                pkt.packet_type,
+                data=pkt.data,
+                namespace=pkt.namespace,
+                id=pkt.id,
+            )
+        await super()._send_packet(eio_sid, pkt)
+
+    @property
+    def tracks_online_users(self) -> bool:
+        """
+        Известно ли воркеру, какие пользователи онлайн.
+        При нескольких воркерах пользователь может быть подключён
+        к другому воркеру.
+        """
+        return SERVER_WORKERS == 1
+
+    def should_emit_to_user(self, user_id) -> bool:
+        """
+        Нужно ли отправлять событие пользователю: при нескольких воркерах
+        событие отправляется всегда, иначе - только подключённым.
+        """
+        return not self.tracks_online_users or user_id in self.users
+
+    @staticmethod
+    def prepare_payload(data):
+        """
+        Модели pydantic передаются объектом и кодируются один раз
+        при отправке пакета, в режиме совместимости - строкой JSON.
+        """
+        if SOCKETIO_STRINGIFY_PAYLOADS and isinstance(data, BaseModel):
+            return data.model_dump_json()
+        return data
+
+    async def emit_to_user(self, user_id, event: str, data):
+        """
+        Отправляет событие в комнату пользователя,
+        комнаты общие для всех воркеров.
+        """
+        await self.emit(
+            event=event, data=self.prepare_payload(data), room=str(user_id)
+        )
+
+    async def emit_to_users(self, user_ids: list, event: str, data):
+        """
+        Отправляет одно событие нескольким пользователям одним emit:
+        пакет кодируется один раз для всех комнат получателей.
+        """
+        await self.emit(
+            event=event,
+            data=self.prepare_payload(data),
+            room=[str(user_id) for user_id in user_ids],
+        )
 
     async def emit_error_event(
         self,
@@ -47,7 +183,7 @@ class SocketIOClient(socketio.AsyncServer):
                 "status": status,
                 "event_name": event_name,
                 "error": error_msg,
-                "event_data": data,
+                "event_data": self.prepare_payload(data),
             },
         )
 
@@ -61,6 +197,7 @@ class SocketIOClient(socketio.AsyncServer):
             cls(**data[1])
         except ValidationError as err:
             logger.error("Validation error. data=%s, err=%s", data, err)
+            get_socketio_event_metrics(data[0])[1].inc()
             await self.emit_error_event(
                 status=SocketioErrorStatusEnum.invalid_data,
                 to_sid=sid,
@@ -69,10 +206,17 @@ class SocketIOClient(socketio.AsyncServer):
                 data=data,
             )
             return
+        query_stats = QueryStats()
+        query_stats_token = query_stats_var.set(query_stats)
+        start_time = time.monotonic()
+        profile_context = (
+            capture_profile() if sid in self.profiled_sids else nullcontext()
+        )
         try:
-            r = await server._trigger_event(
-                data[0], namespace, sid, cls(**data[1])
-            )
+            with profile_context as profile:
+                r = await server._trigger_event(
+                    data[0], namespace, sid, cls(**data[1])
+                )
         except Exception:
             await self.emit_error_event(
                 status=SocketioErrorStatusEnum.server_error,
@@ -82,6 +226,30 @@ class SocketIOClient(socketio.AsyncServer):
                 data=data,
             )
             raise
+        finally:
+            get_socketio_event_metrics(data[0])[0].observe(
+                time.monotonic() - start_time
+            )
+            query_stats_var.reset(query_stats_token)
+            # Пишется на каждое событие, превышение бюджета запросов
+            # отдельно логируется с уровнем WARNING в check_query_budget
+            logger.debug(
+                "Socketio event handled. event=%s, queries=%s, db=%.3f",
+                data[0],
+                query_stats.count,
+                query_stats.db_time,
+            )
+        check_query_budget(
+            stats=query_stats,
+            handler=data[0],
+            budget=QUERY_BUDGET_PER_SOCKET_EVENT,
+        )
+        if profile:
+            await self.emit(
+                event=SocketioEventsEnum.profile,
+                to=sid,
+                data={"event_name": data[0], "report": profile.report},
+            )
 
         if r != self.not_handled and id is not None:
             # send ACK packet with the response returned by the handler
@@ -126,6 +294,10 @@ async def connect(sid, environ, _):
     async with sio.session(sid) as io_session:
         io_session["user_id"] = session.user_id
     sio.users[session.user_id] = sid
+    await sio.enter_room(sid, str(session.user_id))
+    if is_valid_profiling_token(environ.get("HTTP_X_PROFILE_TOKEN")):
+        sio.profiled_sids.add(sid)
+    socketio_connected_sockets.inc()
     logger.info(
         "Socketio connected. params=%s",
         {"sid": sid, "user_id": session.user_id},
@@ -134,5 +306,11 @@ async def connect(sid, environ, _):
 
 @sio.event
 async def disconnect(sid):
-    sio.users.pop(sid, None)
+    async with sio.session(sid) as io_session:
+        user_id = io_session.get("user_id")
+    sio.profiled_sids.discard(sid)
+    if user_id:
+        socketio_connected_sockets.dec()
+        if sio.users.get(user_id) == sid:
+            sio.users.pop(user_id)
     logger.info("Socketio disconnected. params=%s", {"sid": sid})
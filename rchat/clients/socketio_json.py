@@ -0,0 +1,25 @@
+"""
+JSON модуль для python-socketio на orjson.
+
+Данные событий передаются моделями pydantic и кодируются один раз:
+model_dump_json встраивается в пакет как готовый фрагмент JSON.
+Интерфейс совместим с json из стандартной библиотеки
+(параметры dumps/loads, которые передаёт socketio, игнорируются).
+"""
+
+import orjson
+from pydantic import BaseModel
+
+
+def _default(obj):
+    if isinstance(obj, BaseModel):
+        return orjson.Fragment(obj.model_dump_json())
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(obj, **_kwargs) -> str:
+    return orjson.dumps(obj, default=_default).decode()
+
+
+def loads(s, **_kwargs):
+    return orjson.loads(s)
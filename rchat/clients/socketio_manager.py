@@ -0,0 +1,224 @@
+import asyncio
+import importlib
+import logging
+import uuid
+from functools import cache
+
+from asyncpg import PostgresError, connect, create_pool
+from engineio import packet as eio_packet
+from pydantic import BaseModel
+from socketio import AsyncManager, packet
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+from rchat.clients import socketio_json
+from rchat.conf import DATABASE_DSN
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "rchat_socketio"
+# Лимит payload NOTIFY - 8000 байт
+NOTIFY_CHUNK_SIZE = 7000
+PUBLISH_POOL_SIZE = 4
+MAX_RECONNECT_DELAY_SEC = 30
+
+
+def split_utf8(data: bytes, size: int) -> list[str]:
+    """
+    Делит строку UTF-8 на части не больше size байт,
+    не разрезая многобайтовые символы.
+    """
+    chunks = []
+    start = 0
+    while start < len(data):
+        end = min(start + size, len(data))
+        while end < len(data) and data[end] & 0xC0 == 0x80:
+            end -= 1
+        chunks.append(data[start:end].decode())
+        start = end
+    return chunks
+
+
+@cache
+def get_model_class(model_path: str) -> type[BaseModel]:
+    """
+    Класс модели данных события по пути "<модуль>:<имя класса>".
+    """
+    module_name, class_name = model_path.split(":")
+    if not module_name.startswith("rchat."):
+        raise ValueError(f"Unexpected payload model. model={model_path}")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class AsyncSerializerManager(AsyncManager):
+    """
+    Менеджер клиентов Socket.IO с сериализатором пакетов,
+    выбранным клиентом при подключении.
+
+    Пакет события кодируется один раз для каждого сериализатора,
+    который используют получатели.
+    """
+
+    async def emit(
+        self,
+        event,
+        data,
+        namespace,
+        room=None,
+        skip_sid=None,
+        callback=None,
+        **kwargs,
+    ):
+        if callback or namespace not in self.rooms:
+            return await super().emit(
+                event,
+                data,
+                namespace,
+                room=room,
+                skip_sid=skip_sid,
+                callback=callback,
+                **kwargs,
+            )
+
+        if isinstance(data, tuple):
+            data = list(data)
+        elif data is not None:
+            data = [data]
+        else:
+            data = []
+        if not isinstance(skip_sid, list):
+            skip_sid = [skip_sid]
+
+        eio_packets = {}
+        tasks = []
+        for sid, eio_sid in self.get_participants(namespace, room):
+            if sid in skip_sid:
+                continue
+            packet_class = self.server.get_packet_class(eio_sid)
+            if packet_class not in eio_packets:
+                encoded_packet = packet_class(
+                    packet.EVENT, namespace=namespace, data=[event] + data
+                ).encode()
+                if not isinstance(encoded_packet, list):
+                    encoded_packet = [encoded_packet]
+                eio_packets[packet_class] = [
+                    eio_packet.Packet(eio_packet.MESSAGE, p)
+                    for p in encoded_packet
+                ]
+            for p in eio_packets[packet_class]:
+                tasks.append(
+                    asyncio.create_task(
+                        self.server._send_eio_packet(eio_sid, p)
+                    )
+                )
+        if tasks:
+            await asyncio.wait(tasks)
+
+
+class AsyncPostgresManager(AsyncPubSubManager, AsyncSerializerManager):
+    """
+    Менеджер клиентов Socket.IO для нескольких воркеров
+    на LISTEN/NOTIFY Postgres (аналог AsyncRedisManager).
+
+    Сообщения длиннее лимита NOTIFY разбиваются на части.
+    Части отправляются в одной транзакции,
+    поэтому слушатели получают их подряд и по порядку.
+
+    Для данных-моделей передаётся и класс модели, чтобы другие воркеры
+    восстановили модель и закодировали её сериализатором получателя.
+    """
+
+    name = "asyncpg"
+
+    def __init__(self, dsn: str = DATABASE_DSN, channel=NOTIFY_CHANNEL):
+        super().__init__(channel=channel)
+        self._dsn = dsn
+        self._publish_pool = None
+        self._publish_pool_lock = asyncio.Lock()
+
+    async def _get_publish_pool(self):
+        async with self._publish_pool_lock:
+            if not self._publish_pool:
+                self._publish_pool = await create_pool(
+                    dsn=self._dsn, min_size=1, max_size=PUBLISH_POOL_SIZE
+                )
+        return self._publish_pool
+
+    async def _publish(self, data):
+        if isinstance(data.get("data"), BaseModel):
+            model_class = type(data["data"])
+            data = {
+                **data,
+                "model": f"{model_class.__module__}:{model_class.__name__}",
+            }
+        payload = socketio_json.dumps(data).encode()
+        message_id = uuid.uuid4().hex
+        chunks = split_utf8(payload, NOTIFY_CHUNK_SIZE)
+        notifications = [
+            (self.channel, f"{message_id}:{i}:{len(chunks)}:{chunk}")
+            for i, chunk in enumerate(chunks)
+        ]
+        try:
+            pool = await self._get_publish_pool()
+            async with pool.acquire() as c:
+                async with c.transaction():
+                    await c.executemany(
+                        "select pg_notify($1, $2)", notifications
+                    )
+        except (OSError, PostgresError) as err:
+            logger.error(
+                "Cannot publish socketio message. method=%s, error=%s",
+                data.get("method"),
+                err,
+            )
+
+    async def _handle_emit(self, message):
+        if model_path := message.get("model"):
+            message["data"] = get_model_class(model_path).model_validate(
+                message["data"]
+            )
+        await super()._handle_emit(message)
+
+    async def _listen(self):
+        """
+        Слушает канал, при потере соединения переподключается.
+        Отдаёт собранные из частей сообщения (JSON строкой).
+        """
+        queue = asyncio.Queue()
+        reconnect_delay = 1
+        while True:
+            parts = {}
+            try:
+                conn = await connect(dsn=self._dsn)
+            except (OSError, PostgresError) as err:
+                logger.error(
+                    "Cannot listen socketio channel. retry_in=%s, error=%s",
+                    reconnect_delay,
+                    err,
+                )
+                await asyncio.sleep(reconnect_delay)
+                reconnect_delay = min(
+                    reconnect_delay * 2, MAX_RECONNECT_DELAY_SEC
+                )
+                continue
+
+            reconnect_delay = 1
+            conn.add_termination_listener(lambda _: queue.put_nowait(None))
+            await conn.add_listener(
+                self.channel,
+                lambda _conn, _pid, _channel, payload: queue.put_nowait(
+                    payload
+                ),
+            )
+            try:
+                while (payload := await queue.get()) is not None:
+                    message_id, index, total, chunk = payload.split(":", 3)
+                    if total == "1":
+                        yield chunk
+                        continue
+                    parts.setdefault(message_id, []).append(chunk)
+                    if len(parts[message_id]) == int(total):
+                        yield "".join(parts.pop(message_id))
+            finally:
+                if not conn.is_closed():
+                    await conn.close()
+            logger.error("Socketio channel connection lost.")
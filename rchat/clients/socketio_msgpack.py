@@ -0,0 +1,47 @@
+"""
+MessagePack сериализатор пакетов Socket.IO (socket.io-msgpack-parser).
+
+Клиент выбирает его при подключении параметром serializer=msgpack.
+Данные событий кодируются компактнее, чем в JSON:
+    UUID      - 16 байт
+    datetime  - целое число миллисекунд от начала эпохи
+    time      - целое число секунд от начала суток
+"""
+
+import uuid
+from datetime import datetime, time, timezone
+from enum import StrEnum
+
+import msgpack
+from pydantic import BaseModel
+from socketio.msgpack_packet import MsgPackPacket
+
+
+class SocketioSerializerEnum(StrEnum):
+    json = "json"
+    msgpack = "msgpack"
+
+
+def encode_msgpack_value(obj):
+    """
+    Кодирует значения, которые msgpack не поддерживает.
+    Вложенные значения возвращённого объекта кодируются так же.
+    """
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, uuid.UUID):
+        return obj.bytes
+    if isinstance(obj, datetime):
+        # Колонки timestamp без часового пояса хранят время в UTC,
+        # как и строки ISO в JSON, а не в локальном поясе контейнера
+        if obj.tzinfo is None:
+            obj = obj.replace(tzinfo=timezone.utc)
+        return int(obj.timestamp() * 1000)
+    if isinstance(obj, time):
+        return obj.hour * 3600 + obj.minute * 60 + obj.second
+    return str(obj)
+
+
+class CompactMsgPackPacket(MsgPackPacket):
+    def encode(self):
+        return msgpack.dumps(self._to_dict(), default=encode_msgpack_value)
@@ -12,11 +12,112 @@ DB_HOST = os.environ["RCHAT_DB_HOST"]
 
 DATABASE_DSN = f"postgresql://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
 MIGRATIONS_PATH = os.path.join("rchat", "migrations")
+# Применять миграции при старте приложения (для dev).
+# Иначе миграции применяются отдельно (python -m rchat.migration_runner),
+# а при старте только проверяется, что схема БД актуальна.
+APPLY_MIGRATIONS_ON_STARTUP = bool(
+    os.environ.get("RCHAT_APPLY_MIGRATIONS_ON_STARTUP")
+)
+# Сколько ждать доступности БД и применения миграций при старте
+DB_READY_TIMEOUT_SEC = int(os.environ.get("RCHAT_DB_READY_TIMEOUT_SEC", 60))
 
 SESSION_LIFETIME_MIN = int(os.environ.get("RCHAT_SESSION_LIFETIME_MIN"))
 REFRESH_LIFETIME_DAYS = int(os.environ.get("RCHAT_REFRESH_LIFETIME_DAYS"))
 
 STORAGE_DIR = os.environ.get("RCHAT_STORAGE_DIR")
 STORAGE_FOLDERS = ["files", "temp"]
+MEDIA_MAX_SIZE_BYTES = int(
+    os.environ.get("RCHAT_MEDIA_MAX_SIZE_BYTES", 50 * 1024 * 1024)
+)
+UPLOAD_SESSION_LIFETIME_HOURS = int(
+    os.environ.get("RCHAT_UPLOAD_SESSION_LIFETIME_HOURS", 24)
+)
+UPLOAD_SESSION_SWEEP_INTERVAL_SEC = int(
+    os.environ.get("RCHAT_UPLOAD_SESSION_SWEEP_INTERVAL_SEC", 600)
+)
+# Сколько хранятся события для повторной отправки после переподключения
+UPDATES_RETENTION_DAYS = int(os.environ.get("RCHAT_UPDATES_RETENTION_DAYS", 7))
+UPDATES_SWEEP_INTERVAL_SEC = int(
+    os.environ.get("RCHAT_UPDATES_SWEEP_INTERVAL_SEC", 600)
+)
+# Сколько событий повторно отправляется в сокет при переподключении,
+# при большем количестве клиент загружает данные заново
+UPDATES_RESUME_LIMIT = int(os.environ.get("RCHAT_UPDATES_RESUME_LIMIT", 1000))
+# Размеры миниатюр изображений (по большей стороне)
+THUMBNAIL_SIZES = [64, 160, 320]
+AVATAR_THUMBNAIL_SIZE = 160
+THUMBNAIL_WORKERS = int(os.environ.get("RCHAT_THUMBNAIL_WORKERS", 2))
+# Если задан, файлы отдаёт nginx через X-Accel-Redirect по этому префиксу
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get(
+    "RCHAT_MEDIA_ACCEL_REDIRECT_PREFIX"
+)
 
 RELOAD_ENABLED = bool(os.environ.get("RCHAT_RELOAD_ENABLED"))
+
+# Параметры запуска uvicorn.
+# При SERVER_WORKERS > 1 у каждого воркера свой пул соединений
+# и свои подключения Socket.IO. Воркеры принимают соединения с общего
+# сокета, а сессия Engine.IO есть только у одного из них, поэтому
+# Socket.IO принимает только транспорт websocket (без long-polling).
+# События между воркерами передаются через LISTEN/NOTIFY Postgres,
+# для метрик нужен PROMETHEUS_MULTIPROC_DIR.
+SERVER_WORKERS = int(os.environ.get("RCHAT_SERVER_WORKERS", 1))
+SERVER_LOOP = os.environ.get("RCHAT_SERVER_LOOP", "asyncio")
+SERVER_HTTP = os.environ.get("RCHAT_SERVER_HTTP", "h11")
+SERVER_WS = os.environ.get("RCHAT_SERVER_WS", "wsproto")
+SERVER_BACKLOG = int(os.environ.get("RCHAT_SERVER_BACKLOG", 2048))
+# Сжатие ответов HTTP (gzip) больше HTTP_COMPRESSION_MIN_SIZE байт
+# и сообщений websocket (permessage-deflate), уровень 0 - без сжатия.
+# Websocket сжимается для каждого получателя отдельно,
+# поэтому уровень по умолчанию - самый дешёвый (rchat.benchmarks.compression)
+HTTP_COMPRESSION_MIN_SIZE = int(
+    os.environ.get("RCHAT_HTTP_COMPRESSION_MIN_SIZE", 1024)
+)
+HTTP_COMPRESSION_LEVEL = int(os.environ.get("RCHAT_HTTP_COMPRESSION_LEVEL", 6))
+WS_COMPRESSION_LEVEL = int(os.environ.get("RCHAT_WS_COMPRESSION_LEVEL", 1))
+# Размер пула соединений с БД каждого воркера
+DB_POOL_MIN_SIZE = int(os.environ.get("RCHAT_DB_POOL_MIN_SIZE", 10))
+DB_POOL_MAX_SIZE = int(os.environ.get("RCHAT_DB_POOL_MAX_SIZE", 10))
+
+# Допустимое количество запросов к БД на один HTTP запрос / событие сокета.
+# В строгом режиме (для тестов) превышение приводит к ошибке.
+QUERY_BUDGET_PER_REQUEST = int(
+    os.environ.get("RCHAT_QUERY_BUDGET_PER_REQUEST", 30)
+)
+QUERY_BUDGET_PER_SOCKET_EVENT = int(
+    os.environ.get("RCHAT_QUERY_BUDGET_PER_SOCKET_EVENT", 30)
+)
+QUERY_BUDGET_STRICT = bool(os.environ.get("RCHAT_QUERY_BUDGET_STRICT"))
+
+# Совместимость со старыми клиентами, которые ожидают данные событий
+# сокета строкой JSON, а не объектом
+SOCKETIO_STRINGIFY_PAYLOADS = bool(
+    os.environ.get("RCHAT_SOCKETIO_STRINGIFY_PAYLOADS")
+)
+
+# Мониторинг задержек event loop и поиск блокирующих вызовов
+LOOP_MONITOR_ENABLED = bool(os.environ.get("RCHAT_LOOP_MONITOR_ENABLED"))
+LOOP_MONITOR_INTERVAL_SEC = float(
+    os.environ.get("RCHAT_LOOP_MONITOR_INTERVAL_SEC", 0.1)
+)
+SLOW_CALLBACK_THRESHOLD_SEC = float(
+    os.environ.get("RCHAT_SLOW_CALLBACK_THRESHOLD_SEC", 0.25)
+)
+SLOW_CALLBACK_REPORT_INTERVAL_SEC = float(
+    os.environ.get("RCHAT_SLOW_CALLBACK_REPORT_INTERVAL_SEC", 10)
+)
+
+# Формат логов: text или json
+LOG_FORMAT = os.environ.get("RCHAT_LOG_FORMAT", "text")
+LOG_QUEUE_SIZE = int(os.environ.get("RCHAT_LOG_QUEUE_SIZE", 10000))
+# Доля INFO записей, которые попадают в лог (от 0 до 1)
+ACCESS_LOG_SAMPLE_RATE = float(
+    os.environ.get("RCHAT_ACCESS_LOG_SAMPLE_RATE", 1)
+)
+DELIVERY_LOG_SAMPLE_RATE = float(
+    os.environ.get("RCHAT_DELIVERY_LOG_SAMPLE_RATE", 1)
+)
+
+# Токен для профилирования запросов и событий сокета,
+# если не задан - профилирование полностью выключено
+PROFILING_TOKEN = os.environ.get("RCHAT_PROFILING_TOKEN")
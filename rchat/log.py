@@ -1,13 +1,121 @@
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from rchat.conf import (
+    ACCESS_LOG_SAMPLE_RATE,
+    DELIVERY_LOG_SAMPLE_RATE,
+    LOG_FORMAT,
+    LOG_QUEUE_SIZE,
+)
+
+# Логгеры с INFO записями на каждый запрос / каждого получателя сообщения
+ACCESS_LOGGER = "rchat.middlewares"
+DELIVERY_LOGGER = "rchat.delivery"
+
+_listener: Optional[QueueListener] = None
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Передаёт записи в очередь, не блокируясь.
+    Если поток записи логов не успевает, новые записи отбрасываются.
+    """
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Пропускает только часть записей уровня INFO и ниже.
+    Предупреждения и ошибки пропускаются всегда.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or self.rate >= 1:
+            return True
+
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+@atexit.register
+def stop_logging():
+    """
+    Останавливает поток записи логов, дописав записи из очереди.
+    """
+    global _listener
+
+    if _listener:
+        _listener.stop()
+        _listener = None
 
 
 def setup_logging():
+    """
+    Настраивает логирование через очередь:
+    в event loop запись только кладётся в очередь,
+    а форматирование и вывод в stdout выполняются в отдельном потоке.
+    """
+    global _listener
+
+    if LOG_FORMAT == "json":
+        formatter = JsonFormatter(datefmt="%Y-%m-%d %H:%M:%S")
+    else:
+        formatter = logging.Formatter(
+            datefmt="%Y-%m-%d %H:%M:%S",
+            style="{",
+            fmt="{asctime} [{levelname}] [{name}] {message}",
+        )
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    stop_logging()
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _listener = QueueListener(log_queue, stream_handler)
+    _listener.start()
+
+    queue_handler = DroppingQueueHandler(log_queue)
+    # в очередь попадает только текст сообщения (с трейсбеком),
+    # остальное форматирование выполняется в потоке записи
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
     logging.basicConfig(
-        handlers=[logging.StreamHandler(sys.stdout)],
+        handlers=[queue_handler],
         force=True,
         level=logging.INFO,
-        datefmt="%Y-%m-%d %H:%M:%S",
-        style="{",
-        format="{asctime} [{levelname}] [{name}] {message}",
     )
+
+    for logger_name, rate in (
+        (ACCESS_LOGGER, ACCESS_LOG_SAMPLE_RATE),
+        (DELIVERY_LOGGER, DELIVERY_LOG_SAMPLE_RATE),
+    ):
+        logger = logging.getLogger(logger_name)
+        for log_filter in logger.filters:
+            if isinstance(log_filter, SamplingFilter):
+                logger.removeFilter(log_filter)
+        logger.addFilter(SamplingFilter(rate))
@@ -0,0 +1,92 @@
+"""
+Мониторинг event loop.
+
+Задача в event loop периодически засыпает на фиксированный интервал
+и измеряет, насколько позже запланированного она проснулась -
+это задержка, которую получают все остальные задачи.
+
+Отдельный поток следит за тем, что задача продолжает просыпаться.
+Если event loop заблокирован дольше порога, поток логирует стек
+кода, который выполняется в event loop в этот момент.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from rchat.conf import (
+    LOOP_MONITOR_INTERVAL_SEC,
+    SLOW_CALLBACK_REPORT_INTERVAL_SEC,
+    SLOW_CALLBACK_THRESHOLD_SEC,
+)
+from rchat.metrics import event_loop_lag, event_loop_stalls
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    def __init__(
+        self,
+        interval: float = LOOP_MONITOR_INTERVAL_SEC,
+        threshold: float = SLOW_CALLBACK_THRESHOLD_SEC,
+        report_interval: float = SLOW_CALLBACK_REPORT_INTERVAL_SEC,
+    ):
+        self._interval = interval
+        self._threshold = threshold
+        self._report_interval = report_interval
+        self._last_tick = time.monotonic()
+        self._loop_thread_id = None
+        self._sampler: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stopped.clear()
+        self._sampler = asyncio.create_task(self._sample_lag())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-monitor", daemon=True
+        )
+        self._watchdog.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._sampler:
+            self._sampler.cancel()
+
+    async def _sample_lag(self):
+        while True:
+            started_at = time.monotonic()
+            await asyncio.sleep(self._interval)
+            self._last_tick = time.monotonic()
+            event_loop_lag.observe(
+                max(self._last_tick - started_at - self._interval, 0)
+            )
+
+    def _watch(self):
+        reported_tick = None
+        last_report_at = 0.0
+        while not self._stopped.wait(self._threshold / 2):
+            last_tick = self._last_tick
+            stalled_for = time.monotonic() - last_tick - self._interval
+            if stalled_for < self._threshold or last_tick == reported_tick:
+                continue
+
+            reported_tick = last_tick
+            event_loop_stalls.inc()
+            if time.monotonic() - last_report_at < self._report_interval:
+                continue
+
+            last_report_at = time.monotonic()
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else ""
+            logger.warning(
+                "Event loop blocked. stalled_for=%.3f, stack:\n%s",
+                stalled_for,
+                stack,
+            )
@@ -0,0 +1,207 @@
+"""
+Метрики приложения в формате Prometheus.
+
+При запуске нескольких воркеров нужно задать переменную окружения
+PROMETHEUS_MULTIPROC_DIR - тогда метрики всех процессов
+пишутся в общую папку и суммируются при выдаче /metrics.
+"""
+
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+LOOP_LAG_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+FANOUT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+UNMATCHED_ROUTE = "<unmatched>"
+
+http_request_duration = Histogram(
+    "rchat_http_request_duration_seconds",
+    "Время обработки HTTP запроса",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+http_responses = Counter(
+    "rchat_http_responses",
+    "Количество HTTP ответов по статусам",
+    ["method", "route", "status"],
+)
+http_requests_in_progress = Gauge(
+    "rchat_http_requests_in_progress",
+    "Количество обрабатываемых HTTP запросов",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+db_query_duration = Histogram(
+    "rchat_db_query_duration_seconds",
+    "Время выполнения запроса к БД",
+    ["statement"],
+    buckets=LATENCY_BUCKETS,
+)
+query_budget_exceeded = Counter(
+    "rchat_query_budget_exceeded",
+    "Количество HTTP запросов и событий сокета,"
+    " превысивших допустимое число запросов к БД",
+    ["handler"],
+)
+socketio_event_duration = Histogram(
+    "rchat_socketio_event_duration_seconds",
+    "Время обработки события сокета",
+    ["event"],
+    buckets=LATENCY_BUCKETS,
+)
+socketio_validation_errors = Counter(
+    "rchat_socketio_validation_errors",
+    "Количество событий сокета с невалидными данными",
+    ["event"],
+)
+socketio_fanout_recipients = Histogram(
+    "rchat_socketio_fanout_recipients",
+    "Количество получателей одной рассылки события",
+    ["event"],
+    buckets=FANOUT_BUCKETS,
+)
+socketio_delivery_lag = Histogram(
+    "rchat_socketio_delivery_lag_seconds",
+    "Время от сохранения сообщения до отправки последнему получателю",
+    ["event"],
+    buckets=LATENCY_BUCKETS,
+)
+socketio_connected_sockets = Gauge(
+    "rchat_socketio_connected_sockets",
+    "Количество подключённых сокетов",
+    multiprocess_mode="livesum",
+)
+event_loop_lag = Histogram(
+    "rchat_event_loop_lag_seconds",
+    "Задержка запуска задач в event loop",
+    buckets=LOOP_LAG_BUCKETS,
+)
+event_loop_stalls = Counter(
+    "rchat_event_loop_stalls",
+    "Количество блокировок event loop дольше порога",
+)
+
+# Дочерние метрики по меткам кэшируются,
+# чтобы не создавать строки меток и не искать их на каждый запрос
+_http_request_metrics = {}
+_http_in_progress_metrics = {}
+_socketio_event_metrics = {}
+_socketio_emit_metrics = {}
+
+
+def get_http_request_metrics(
+    method: str, route: str, status: int
+) -> tuple[Histogram, Counter]:
+    """
+    Возвращает гистограмму задержки и счётчик ответов для маршрута.
+    """
+    key = (method, route, status)
+    metrics = _http_request_metrics.get(key)
+    if metrics is None:
+        metrics = (
+            http_request_duration.labels(method, route),
+            http_responses.labels(method, route, str(status)),
+        )
+        _http_request_metrics[key] = metrics
+
+    return metrics
+
+
+def get_http_in_progress_metric(method: str) -> Gauge:
+    metric = _http_in_progress_metrics.get(method)
+    if metric is None:
+        metric = http_requests_in_progress.labels(method)
+        _http_in_progress_metrics[method] = metric
+
+    return metric
+
+
+def get_socketio_event_metrics(event: str) -> tuple[Histogram, Counter]:
+    """
+    Возвращает гистограмму задержки обработки события
+    и счётчик ошибок валидации для события сокета.
+    """
+    metrics = _socketio_event_metrics.get(event)
+    if metrics is None:
+        metrics = (
+            socketio_event_duration.labels(event),
+            socketio_validation_errors.labels(event),
+        )
+        _socketio_event_metrics[event] = metrics
+
+    return metrics
+
+
+def get_socketio_emit_metrics(event: str) -> tuple[Histogram, Histogram]:
+    """
+    Возвращает гистограммы размера рассылки и задержки доставки события.
+    """
+    metrics = _socketio_emit_metrics.get(event)
+    if metrics is None:
+        metrics = (
+            socketio_fanout_recipients.labels(event),
+            socketio_delivery_lag.labels(event),
+        )
+        _socketio_emit_metrics[event] = metrics
+
+    return metrics
+
+
+def is_multiprocess_mode() -> bool:
+    return "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+
+def generate_metrics() -> tuple[bytes, str]:
+    """
+    Собирает метрики всех процессов в текстовом формате Prometheus.
+    :returns: кортеж вида: (body, content_type)
+    """
+    if is_multiprocess_mode():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead():
+    """
+    Убирает метрики текущего процесса из livesum-метрик при его остановке.
+    """
+    if is_multiprocess_mode():
+        multiprocess.mark_process_dead(os.getpid())
@@ -2,22 +2,109 @@ import logging
 import time
 
 from fastapi import Request, Response
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.types import Message, Receive, Scope, Send
+
+from rchat.conf import QUERY_BUDGET_PER_REQUEST
+from rchat.metrics import (
+    UNMATCHED_ROUTE,
+    get_http_in_progress_metric,
+    get_http_request_metrics,
+)
+from rchat.query_stats import QueryStats, check_query_budget, query_stats_var
 
 logger = logging.getLogger(__name__)
 
+# Медиафайлы уже сжаты, сжимаются только JSON и текст
+COMPRESSIBLE_CONTENT_TYPES = ("application/json", "text/")
+# Ответы с диапазонами байт передаются без сжатия, иначе тело
+# не совпадёт с Content-Range (файлы text/* тоже отдаются по частям)
+RANGE_HEADERS = ("content-range", "accept-ranges")
+
+
+def get_route_template(request: Request) -> str:
+    """
+    Возвращает шаблон пути маршрута (например, /media/{media_id}),
+    чтобы метрики не разрастались по каждому уникальному URL.
+    """
+    route = request.scope.get("route")
+    if route is None:
+        return UNMATCHED_ROUTE
+
+    return route.path
+
+
+class CompressibleGZipResponder(GZipResponder):
+    async def send_with_gzip(self, message: Message):
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            await super().send_with_gzip(message)
+            if (
+                not content_type.startswith(COMPRESSIBLE_CONTENT_TYPES)
+                or message["status"] == 206
+                or any(header in headers for header in RANGE_HEADERS)
+            ):
+                # Ответ передаётся без изменений, как уже сжатый
+                self.content_encoding_set = True
+            return
+
+        await super().send_with_gzip(message)
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware, который не сжимает файлы и другие несжимаемые ответы.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get(
+            "Accept-Encoding", ""
+        ):
+            responder = CompressibleGZipResponder(
+                self.app, self.minimum_size, compresslevel=self.compresslevel
+            )
+            await responder(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
 
 async def access_log_middleware(request: Request, call_next):
     status = None
+    query_stats = QueryStats()
+    query_stats_token = query_stats_var.set(query_stats)
+    in_progress = get_http_in_progress_metric(request.method)
+    in_progress.inc()
     start_time = time.monotonic()
     try:
         response: Response = await call_next(request)
         status = response.status_code
-        return response
     except Exception:
         status = 500
         raise
     finally:
         time_elapsed = time.monotonic() - start_time
+        in_progress.dec()
+        query_stats_var.reset(query_stats_token)
+        route = get_route_template(request)
+        duration, responses = get_http_request_metrics(
+            method=request.method, route=route, status=status
+        )
+        duration.observe(time_elapsed)
+        responses.inc()
         logger.info(
-            "%s %.3f %s %s", status, time_elapsed, request.method, request.url
+            "%s %.3f %s %s queries=%s db=%.3f",
+            status,
+            time_elapsed,
+            request.method,
+            request.scope["path"],
+            query_stats.count,
+            query_stats.db_time,
         )
+
+    check_query_budget(
+        stats=query_stats, handler=route, budget=QUERY_BUDGET_PER_REQUEST
+    )
+    return response
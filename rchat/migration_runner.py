@@ -1,13 +1,66 @@
-from yoyo import get_backend, read_migrations
+"""
+Применение миграций БД:
+    python -m rchat.migration_runner          - применить миграции
+    python -m rchat.migration_runner --check  - код 1, если есть неприменённые
+"""
+
+import argparse
+import logging
+import sys
 
 from rchat.conf import DATABASE_DSN, MIGRATIONS_PATH
+from rchat.log import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def get_migrations():
+    """
+    yoyo (вместе с psycopg2) импортируется только при работе с миграциями,
+    чтобы не замедлять импорт приложения.
+
+    :returns: бэкенд yoyo и миграции из MIGRATIONS_PATH
+    """
+    from yoyo import get_backend, read_migrations
+
+    return get_backend(DATABASE_DSN), read_migrations(MIGRATIONS_PATH)
 
 
 def apply_migrations():
-    migrations_backend = get_backend(DATABASE_DSN)
-    migrations = read_migrations(MIGRATIONS_PATH)
+    migrations_backend, migrations = get_migrations()
 
     with migrations_backend.lock():
-        migrations_backend.apply_migrations(
-            migrations_backend.to_apply(migrations)
-        )
+        migrations_to_apply = migrations_backend.to_apply(migrations)
+        migrations_backend.apply_migrations(migrations_to_apply)
+
+    logger.info("Migrations applied. count=%s", len(migrations_to_apply))
+
+
+def get_pending_migrations() -> list[str]:
+    migrations_backend, migrations = get_migrations()
+
+    return [m.id for m in migrations_backend.to_apply(migrations)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="только проверить наличие неприменённых миграций",
+    )
+    args = parser.parse_args()
+    setup_logging()
+
+    if not args.check:
+        apply_migrations()
+        return
+
+    pending_migrations = get_pending_migrations()
+    if pending_migrations:
+        logger.error("Pending migrations. migrations=%s", pending_migrations)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
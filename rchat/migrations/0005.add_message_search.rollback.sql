@@ -0,0 +1,4 @@
+drop index idx_chat_user_user_id;
+drop index idx_message_text_tsv;
+
+alter table "message" drop column "message_text_tsv";
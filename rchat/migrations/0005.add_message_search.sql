@@ -0,0 +1,7 @@
+alter table "message" add column "message_text_tsv" tsvector
+    generated always as (
+        to_tsvector('simple', coalesce("message_text", ''))
+    ) stored;
+
+create index idx_message_text_tsv on "message" using gin ("message_text_tsv");
+create index idx_chat_user_user_id on "chat_user" ("user_id");
@@ -0,0 +1,3 @@
+drop index idx_media_content_hash;
+
+alter table "media" drop column "content_hash";
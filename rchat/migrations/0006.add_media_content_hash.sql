@@ -0,0 +1,3 @@
+alter table "media" add column "content_hash" varchar(64);
+
+create index idx_media_content_hash on "media" ("content_hash");
@@ -0,0 +1 @@
+drop table "upload_session";
@@ -0,0 +1,13 @@
+create table "upload_session" (
+    id uuid primary key,
+    user_id uuid not null references "user" ("id"),
+    media_type varchar(16) not null,
+    extension varchar(16) not null,
+    size_bytes bigint not null,
+    received_bytes bigint not null default 0,
+    updated_timestamp timestamp not null default now(),
+    created_timestamp timestamp not null default now()
+);
+
+create index idx_upload_session_updated_timestamp
+    on "upload_session" ("updated_timestamp");
@@ -0,0 +1 @@
+alter table "message" drop column "deleted_at";
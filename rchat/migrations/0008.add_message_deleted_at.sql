@@ -0,0 +1 @@
+alter table "message" add column "deleted_at" timestamp;
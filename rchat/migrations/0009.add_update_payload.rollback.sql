@@ -0,0 +1,3 @@
+drop index idx_update_user_id_order_id;
+alter table "update" drop constraint "update_order_id_fkey";
+drop table "update_payload";
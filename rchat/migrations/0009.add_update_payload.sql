@@ -0,0 +1,14 @@
+create table "update_payload" (
+    order_id bigint primary key,
+    payload jsonb not null,
+    created_timestamp timestamp not null default now()
+);
+
+create index idx_update_payload_created_timestamp
+    on "update_payload" ("created_timestamp");
+
+alter table "update"
+    add constraint "update_order_id_fkey" foreign key ("order_id")
+    references "update_payload" ("order_id") on delete cascade;
+
+create index idx_update_user_id_order_id on "update" ("user_id", "order_id");
@@ -0,0 +1 @@
+drop table "update_expiry";
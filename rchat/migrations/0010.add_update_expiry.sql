@@ -0,0 +1,4 @@
+create table "update_expiry" (
+    user_id uuid primary key references "user" ("id"),
+    order_id bigint not null
+);
@@ -0,0 +1,133 @@
+"""
+Профилирование по запросу.
+
+Включается только при заданном PROFILING_TOKEN:
+ - HTTP запрос с заголовком X-Profile-Token профилируется cProfile,
+   вместо ответа возвращается отчёт;
+ - события сокета, подключённого с этим заголовком, профилируются,
+   отчёт отправляется клиенту событием _profile_;
+ - /debug/profile собирает стеки всех потоков процесса в течение
+   заданного времени и возвращает их в формате collapsed stacks
+   (для построения flame graph).
+"""
+
+import cProfile
+import hmac
+import io
+import logging
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional
+
+from fastapi import Request, Response
+
+from rchat.conf import PROFILING_TOKEN
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TOKEN_HEADER = "x-profile-token"
+PROFILE_REPORT_LINES = 60
+DEBUG_PATH_PREFIX = "/debug/"
+
+# Одновременно может работать только один cProfile
+_is_profiler_active = False
+
+
+def is_valid_profiling_token(token: Optional[str]) -> bool:
+    if not PROFILING_TOKEN or not token:
+        return False
+
+    return hmac.compare_digest(token, PROFILING_TOKEN)
+
+
+class CallProfile:
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.report = ""
+
+
+@contextmanager
+def capture_profile():
+    """
+    Профилирует код внутри блока.
+    Если профилирование уже идёт, возвращает None.
+    Учитывается весь код, выполнявшийся в event loop за это время,
+    включая конкурентные задачи.
+    """
+    global _is_profiler_active
+
+    if _is_profiler_active:
+        logger.warning("Profiler is already active, skip profiling")
+        yield None
+        return
+
+    _is_profiler_active = True
+    profile = CallProfile()
+    profile.profiler.enable()
+    try:
+        yield profile
+    finally:
+        profile.profiler.disable()
+        _is_profiler_active = False
+        stream = io.StringIO()
+        stats = pstats.Stats(profile.profiler, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE)
+        stats.print_stats(PROFILE_REPORT_LINES)
+        profile.report = stream.getvalue()
+
+
+async def profiling_middleware(request: Request, call_next):
+    """
+    Возвращает отчёт профилировщика вместо ответа
+    для запросов с верным X-Profile-Token.
+    Отладочные эндпоинты не профилируются.
+    """
+    path = request.scope["path"]
+    token = request.headers.get(PROFILE_TOKEN_HEADER)
+    if path.startswith(DEBUG_PATH_PREFIX) or not is_valid_profiling_token(
+        token
+    ):
+        return await call_next(request)
+
+    with capture_profile() as profile:
+        response = await call_next(request)
+    if not profile:
+        return response
+
+    logger.info("Request profiled. path=%s", path)
+    return Response(content=profile.report, media_type="text/plain")
+
+
+def format_frame(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+def sample_stacks(duration: float, interval: float) -> str:
+    """
+    Периодически снимает стеки всех потоков процесса.
+    Вызывается в отдельном потоке, собственный стек не учитывается.
+
+    :returns: стеки в формате collapsed stacks: "f1;f2;f3 count" на строку
+    """
+    own_thread_id = threading.get_ident()
+    thread_names = {t.ident: t.name for t in threading.enumerate()}
+    samples = Counter()
+    finish_at = time.monotonic() + duration
+    while time.monotonic() < finish_at:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread_id:
+                continue
+            stack = []
+            while frame:
+                stack.append(format_frame(frame))
+                frame = frame.f_back
+            stack.append(thread_names.get(thread_id, str(thread_id)))
+            samples[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+
+    return "\n".join(f"{stack} {count}" for stack, count in samples.items())
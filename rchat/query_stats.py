@@ -0,0 +1,114 @@
+"""
+Учёт запросов к БД.
+
+К каждому соединению пула подключается логгер запросов asyncpg,
+который пишет время выполнения запросов в метрики и считает запросы
+текущего HTTP запроса или события сокета.
+Превышение допустимого числа запросов обычно означает N+1.
+"""
+
+import logging
+import re
+from contextvars import ContextVar
+from typing import Optional
+
+from asyncpg import Connection
+from asyncpg.connection import LoggedQuery
+
+from rchat.conf import QUERY_BUDGET_STRICT
+from rchat.metrics import db_query_duration, query_budget_exceeded
+
+logger = logging.getLogger(__name__)
+
+# Запрос, которым пул сбрасывает состояние соединения при возврате
+POOL_RESET_QUERY_SUFFIX = "RESET ALL;"
+STATEMENT_PATTERN = re.compile(
+    r"^\s*(?:(update)\s+|(select|insert|delete|with)\b.*?\b(?:from|into)\s+)"
+    r"\"?(\w+)",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryStats:
+    """
+    Статистика запросов к БД одного HTTP запроса или события сокета.
+    """
+
+    __slots__ = ("count", "db_time")
+
+    def __init__(self):
+        self.count = 0
+        self.db_time = 0.0
+
+
+query_stats_var: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats", default=None
+)
+
+# Метрики по тексту запроса - тексты запросов в репозиториях постоянные
+_statement_metrics = {}
+
+
+def get_statement_name(query: str) -> str:
+    """
+    Возвращает короткое имя запроса для метрик, например "select message".
+    """
+    match = STATEMENT_PATTERN.match(query)
+    if not match:
+        return "other"
+
+    verb = match.group(1) or match.group(2)
+    return f"{verb.lower()} {match.group(3)}"
+
+
+def record_query(record: LoggedQuery):
+    """
+    Логгер запросов asyncpg.
+    """
+    if record.query.endswith(POOL_RESET_QUERY_SUFFIX):
+        return
+
+    metric = _statement_metrics.get(record.query)
+    if metric is None:
+        metric = db_query_duration.labels(get_statement_name(record.query))
+        _statement_metrics[record.query] = metric
+    metric.observe(record.elapsed)
+
+    stats = query_stats_var.get()
+    if stats is not None:
+        stats.count += 1
+        stats.db_time += record.elapsed
+
+
+async def init_connection(connection: Connection):
+    """
+    Подключает учёт запросов к новому соединению пула.
+    """
+    connection.add_query_logger(record_query)
+
+
+def check_query_budget(stats: QueryStats, handler: str, budget: int):
+    """
+    Проверяет, что обработчик не превысил допустимое число запросов к БД.
+    :raises QueryBudgetExceeded: в строгом режиме при превышении
+    """
+    if stats.count <= budget:
+        return
+
+    query_budget_exceeded.labels(handler).inc()
+    logger.warning(
+        "Query budget exceeded, possible N+1."
+        " handler=%s, queries=%s, budget=%s, db_time=%.3f",
+        handler,
+        stats.count,
+        budget,
+        stats.db_time,
+    )
+    if QUERY_BUDGET_STRICT:
+        raise QueryBudgetExceeded(
+            f"{handler} made {stats.count} queries, budget is {budget}"
+        )
@@ -13,6 +13,40 @@ from rchat.schemas.chat import (
     UserChatRole,
 )
 
+# Запросы горячих путей (участники чата при отправке сообщений,
+# список чатов) вынесены в константы для прогрева соединений
+GET_CHAT_PARTICIPANT_USERS_SQL = """
+    select "user_id" from "chat_user" where "chat_id" = $1
+"""
+GET_USER_CHATS_SQL = """
+    select
+        "chat"."id",
+        "chat"."type",
+        "chat"."name",
+        "chat"."avatar_photo_id",
+        "chat"."description",
+        "chat"."is_work_chat",
+        "chat"."allow_messages_from",
+        "chat"."allow_messages_to",
+        "chat"."created_timestamp",
+        max(m."created_timestamp") as last_message_timestamp
+    from "chat"
+    left join "chat_user" on "chat"."id" = "chat_user"."chat_id"
+    left join "message" m on "chat"."id" = m."chat_id"
+    where "user_id" = $1
+    group by
+        "chat"."id",
+        "chat"."type",
+        "chat"."name",
+        "chat"."avatar_photo_id",
+        "chat"."description",
+        "chat"."is_work_chat",
+        "chat"."allow_messages_from",
+        "chat"."allow_messages_to",
+        "chat"."created_timestamp"
+    order by last_message_timestamp desc
+"""
+
 
 class ChatRepository:
     def __init__(self, db: Pool):
@@ -81,15 +115,27 @@ class ChatRepository:
 
         return Chat(**dict(row))
 
-    async def get_chat_participant_users(self, chat_id: UUID4) -> list[UUID5]:
+    async def get_by_id_list(self, id_list: list[UUID4]) -> list[Chat]:
         """
-        Получает список id пользователей чата.
+        Получает чаты по списку id одним запросом.
         """
+        if not id_list:
+            return []
+
         sql = """
-            select "user_id" from "chat_user" where "chat_id" = $1
+            select * from "chat" where "id" = any($1)
         """
         async with self._db.acquire() as c:
-            rows = await c.fetch(sql, chat_id)
+            rows = await c.fetch(sql, id_list)
+
+        return [Chat(**dict(row)) for row in rows]
+
+    async def get_chat_participant_users(self, chat_id: UUID4) -> list[UUID5]:
+        """
+        Получает список id пользователей чата.
+        """
+        async with self._db.acquire() as c:
+            rows = await c.fetch(GET_CHAT_PARTICIPANT_USERS_SQL, chat_id)
 
         return [UUID5(str(row["user_id"])) for row in rows]
 
@@ -98,36 +144,8 @@ class ChatRepository:
         Получает список чатов пользователя,
         отсортированных по времени последнего сообщения в этих чатах.
         """
-        sql = """
-            select
-                "chat"."id",
-                "chat"."type",
-                "chat"."name",
-                "chat"."avatar_photo_id",
-                "chat"."description",
-                "chat"."is_work_chat",
-                "chat"."allow_messages_from",
-                "chat"."allow_messages_to",
-                "chat"."created_timestamp",
-                max(m."created_timestamp") as last_message_timestamp
-            from "chat"
-            left join "chat_user" on "chat"."id" = "chat_user"."chat_id"
-            left join "message" m on "chat"."id" = m."chat_id"
-            where "user_id" = $1
-            group by
-                "chat"."id",
-                "chat"."type",
-                "chat"."name",
-                "chat"."avatar_photo_id",
-                "chat"."description",
-                "chat"."is_work_chat",
-                "chat"."allow_messages_from",
-                "chat"."allow_messages_to",
-                "chat"."created_timestamp"
-            order by last_message_timestamp desc
-        """
         async with self._db.acquire() as c:
-            rows = await c.fetch(sql, user_id)
+            rows = await c.fetch(GET_USER_CHATS_SQL, user_id)
 
         return [Chat(**dict(row)) for row in rows]
 
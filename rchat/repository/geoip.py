@@ -1,9 +1,9 @@
+import asyncio
+import importlib
 import logging
 from datetime import datetime
 
-import geocoder
 from asyncpg import Pool
-from requests import RequestException
 
 from rchat.repository.helpers import build_model
 from rchat.schemas.geoip import GeoIPData
@@ -36,8 +36,15 @@ class GeoIPRepository:
         """
         Получает информацию о геолокации по IP через geocoder и сохраняет ёё.
         """
+        # geocoder (вместе с requests) импортируется долго, а нужен
+        # только для новых IP, поэтому загружается при первом обращении.
+        # Импорт и запрос к geocoder блокирующие и выполняются в потоке,
+        # чтобы не останавливать event loop
+        geocoder = await asyncio.to_thread(importlib.import_module, "geocoder")
+        from requests import RequestException
+
         try:
-            geocoder_data = geocoder.ip(ip)
+            geocoder_data = await asyncio.to_thread(geocoder.ip, ip)
             if not geocoder_data.ok:
                 logger.error("IP not found in geocoder. ip=%s", ip)
                 return GeoIPData(ip=ip, updated_timestamp=datetime.now())
@@ -1,3 +1,7 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from asyncpg import Pool
 from pydantic import BaseModel
 
 
@@ -26,3 +30,23 @@ def build_model(model: BaseModel, exclude_none: bool = False) -> SQLBuild:
         placeholders=", ".join(placeholders),
         values=values,
     )
+
+
+@asynccontextmanager
+async def try_advisory_lock(db: Pool, lock_id: int) -> AsyncIterator[bool]:
+    """
+    Пытается взять сессионную advisory-блокировку Postgres без ожидания.
+    Соединение удерживается, пока блокировка взята,
+    и блокировка снимается на нём же.
+
+    :returns: True, если блокировка взята
+    """
+    async with db.acquire() as c:
+        is_locked = await c.fetchval(
+            "select pg_try_advisory_lock($1)", lock_id
+        )
+        try:
+            yield is_locked
+        finally:
+            if is_locked:
+                await c.execute("select pg_advisory_unlock($1)", lock_id)
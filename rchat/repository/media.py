@@ -3,13 +3,30 @@ from typing import Optional
 from asyncpg import Pool
 from pydantic import UUID4
 
-from rchat.schemas.media import Media
+from rchat.conf import BASE_BACKEND_URL
+from rchat.repository.helpers import build_model
+from rchat.schemas.media import Media, MediaCreate, MediaTypeEnum
 
 
 class MediaRepository:
     def __init__(self, db: Pool):
         self._db = db
 
+    async def create_media(self, create_model: MediaCreate) -> Media:
+        """
+        Добавляет запись о загруженном файле в БД.
+        """
+        model_build = build_model(create_model)
+        sql = f"""
+            insert into "media" ({model_build.field_names})
+            values ({model_build.placeholders})
+            returning *
+        """
+        async with self._db.acquire() as c:
+            row = await c.fetchrow(sql, *model_build.values)
+
+        return Media(**dict(row))
+
     async def get_media_by_id(self, id_: UUID4) -> Optional[Media]:
         sql = """
             select * from "media"
@@ -23,5 +40,33 @@ class MediaRepository:
 
         return Media(**dict(row))
 
-    def get_media_url(self, id_: UUID4):
-        return ""
+    async def get_by_content_hash(
+        self, content_hash: str, media_type: MediaTypeEnum
+    ) -> Optional[Media]:
+        """
+        Получает уже загруженный файл того же типа с таким же содержимым.
+        """
+        sql = """
+            select * from "media"
+            where "content_hash" = $1 and "type" = $2
+            order by "created_timestamp"
+            limit 1
+        """
+        async with self._db.acquire() as c:
+            row = await c.fetchrow(sql, content_hash, media_type)
+
+        if not row:
+            return
+
+        return Media(**dict(row))
+
+    def get_media_url(self, id_: UUID4, size: int | None = None) -> str:
+        """
+        Возвращает ссылку на скачивание файла.
+        :param size: размер миниатюры для изображений,
+         None - оригинальный файл
+        """
+        if size:
+            return f"{BASE_BACKEND_URL}/media/{id_}?size={size}"
+
+        return f"{BASE_BACKEND_URL}/media/{id_}"
@@ -4,7 +4,47 @@ from asyncpg import Pool
 from pydantic import UUID4, UUID5
 
 from rchat.repository.helpers import build_model
-from rchat.schemas.message import Message, MessageCreate
+from rchat.schemas.chat import UserChatRole
+from rchat.schemas.message import (
+    Message,
+    MessageChange,
+    MessageCreate,
+    MessageSearchResult,
+    MessageTypeEnum,
+)
+
+# Явный список полей, чтобы не выбирать служебные колонки (message_text_tsv)
+MESSAGE_FIELDS = ", ".join(f'm."{field}"' for field in Message.model_fields)
+# Поля результата изменения сообщения и участники чата для рассылки
+MESSAGE_CHANGE_RETURNING = """
+    m."id", m."chat_id", m."message_text", m."last_edited_at",
+    m."deleted_at",
+    array(
+        select cu."user_id" from "chat_user" cu
+        where cu."chat_id" = m."chat_id"
+    ) as "chat_participants"
+"""
+# Сообщения пользователей, которые можно удалить
+DELETABLE_MESSAGE_TYPES = [
+    MessageTypeEnum.text,
+    MessageTypeEnum.audio,
+    MessageTypeEnum.video,
+]
+# Роли, которые могут удалять чужие сообщения
+MESSAGE_MODERATOR_ROLES = [UserChatRole.owner, UserChatRole.admin]
+# Страница сообщений чата и последнее сообщение для списка чатов
+GET_CHAT_MESSAGES_SQL = f"""
+    select {MESSAGE_FIELDS} from "message" m
+    where "chat_id" = $1 and "order_id" > $2
+    order by "created_timestamp" limit $3
+"""
+GET_LAST_CHAT_MESSAGE_SQL = f"""
+    select {MESSAGE_FIELDS} from "message" m
+    where "chat_id" = $1 and "created_timestamp" = (
+        select max("created_timestamp") from "message" m2
+        where m2."chat_id" = $1
+    )
+"""
 
 
 class MessageRepository:
@@ -17,9 +57,9 @@ class MessageRepository:
         """
         model_build = build_model(message)
         sql = f"""
-            insert into "message" ({model_build.field_names})
+            insert into "message" as m ({model_build.field_names})
             values ({model_build.placeholders})
-            returning *
+            returning {MESSAGE_FIELDS}
         """
         async with self._db.acquire() as c:
             row = await c.fetchrow(sql, *model_build.values)
@@ -32,13 +72,10 @@ class MessageRepository:
         """
         Получает список сообщений чата отсортированных по дате создания.
         """
-        sql = """
-            select * from "message"
-            where "chat_id" = $1 and "order_id" > $2
-            order by "created_timestamp" limit $3
-        """
         async with self._db.acquire() as c:
-            rows = await c.fetch(sql, chat_id, last_order_id, limit)
+            rows = await c.fetch(
+                GET_CHAT_MESSAGES_SQL, chat_id, last_order_id, limit
+            )
 
         return [Message(**dict(row)) for row in rows]
 
@@ -46,8 +83,8 @@ class MessageRepository:
         """
         Получает сообщение по его id.
         """
-        sql = """
-            select * from "message"
+        sql = f"""
+            select {MESSAGE_FIELDS} from "message" m
             where "id" = $1
         """
         async with self._db.acquire() as c:
@@ -59,20 +96,89 @@ class MessageRepository:
         return Message(**dict(row))
 
     async def get_last_chat_message(self, chat_id: UUID4) -> Optional[Message]:
-        sql = """
-            select * from "message" m1
-            where "chat_id" = $1 and "created_timestamp" = (
-                select max("created_timestamp") from "message" m2
-                where m2."chat_id" = $1
+        async with self._db.acquire() as c:
+            row = await c.fetchrow(GET_LAST_CHAT_MESSAGE_SQL, chat_id)
+
+        if not row:
+            return
+
+        return Message(**dict(row))
+
+    async def update_message_text(
+        self, message_id: UUID4, user_id: UUID5, message_text: str
+    ) -> Optional[MessageChange]:
+        """
+        Изменяет текст сообщения одним запросом.
+        Изменить можно только своё неудалённое текстовое сообщение
+        в чате, участником которого пользователь остаётся.
+
+        :returns: None, если сообщение не найдено или его нельзя изменить
+        """
+        sql = f"""
+            update "message" m
+            set "message_text" = $3, "last_edited_at" = now()
+            where m."id" = $1
+            and m."sender_user_id" = $2
+            and m."type" = $4
+            and m."deleted_at" is null
+            and exists (
+                select 1 from "chat_user" cu
+                where cu."chat_id" = m."chat_id" and cu."user_id" = $2
             )
+            returning {MESSAGE_CHANGE_RETURNING}
         """
         async with self._db.acquire() as c:
-            row = await c.fetchrow(sql, chat_id)
+            row = await c.fetchrow(
+                sql, message_id, user_id, message_text, MessageTypeEnum.text
+            )
 
         if not row:
             return
 
-        return Message(**dict(row))
+        return MessageChange(**dict(row))
+
+    async def delete_message(
+        self, message_id: UUID4, user_id: UUID5
+    ) -> Optional[MessageChange]:
+        """
+        Удаляет сообщение одним запросом.
+        Строка остаётся (с deleted_at и без содержимого), чтобы не сдвигались
+        курсоры страниц по order_id. Удалить сообщение может отправитель
+        или владелец и администраторы чата.
+
+        :returns: None, если сообщение не найдено или его нельзя удалить
+        """
+        sql = f"""
+            update "message" m
+            set
+                "deleted_at" = now(),
+                "message_text" = null,
+                "audio_msg_file_id" = null,
+                "video_msg_file_id" = null,
+                "forwarded_message_id" = null
+            where m."id" = $1
+            and m."deleted_at" is null
+            and m."type" = any($3)
+            and exists (
+                select 1 from "chat_user" cu
+                where cu."chat_id" = m."chat_id" and cu."user_id" = $2
+                and (m."sender_user_id" = $2 or cu."role" = any($4))
+            )
+            returning {MESSAGE_CHANGE_RETURNING}
+        """
+        async with self._db.acquire() as c:
+            row = await c.fetchrow(
+                sql,
+                message_id,
+                user_id,
+                DELETABLE_MESSAGE_TYPES,
+                MESSAGE_MODERATOR_ROLES,
+            )
+
+        if not row:
+            return
+
+        return MessageChange(**dict(row))
 
     async def mark_message_as_read(
         self, message_id: UUID4, read_by_user: UUID5
@@ -117,3 +223,42 @@ class MessageRepository:
             rows = await c.fetch(sql, chat_id, before_message_id, user_id)
 
         return [UUID5(str(row["id"])) for row in rows]
+
+    async def search_user_messages(
+        self,
+        user_id: UUID5,
+        query: str,
+        limit: int,
+        last_rank: float | None = None,
+        last_order_id: int | None = None,
+    ) -> list[MessageSearchResult]:
+        """
+        Полнотекстовый поиск по сообщениям чатов, в которых состоит
+        пользователь.
+        Результаты отсортированы по релевантности, затем по новизне.
+        Для получения следующей страницы передаются rank и order_id
+        последнего полученного сообщения (keyset-пагинация).
+        """
+        sql = f"""
+            select * from (
+                select
+                    {MESSAGE_FIELDS},
+                    m."order_id",
+                    ts_rank(m."message_text_tsv", q) as rank
+                from "message" m,
+                    websearch_to_tsquery('simple', $2) q
+                where m."message_text_tsv" @@ q
+                and m."chat_id" in (
+                    select "chat_id" from "chat_user" where "user_id" = $1
+                )
+            ) found
+            where $4::real is null or (rank, "order_id") < ($4, $5)
+            order by rank desc, "order_id" desc
+            limit $3
+        """
+        async with self._db.acquire() as c:
+            rows = await c.fetch(
+                sql, user_id, query, limit, last_rank, last_order_id
+            )
+
+        return [MessageSearchResult(**dict(row)) for row in rows]
@@ -7,6 +7,12 @@ from pydantic import UUID4, UUID5
 from rchat.repository.helpers import build_model
 from rchat.schemas.session import Session, SessionCreate
 
+# Запрос выполняется при проверке каждого токена доступа
+GET_SESSION_BY_ID_SQL = """
+    select * from "session"
+    where "id" = $1
+"""
+
 
 class SessionRepository:
     def __init__(self, db: Pool):
@@ -52,12 +58,8 @@ class SessionRepository:
         Возвращает сессию пользователя по id сессии.
         :return: Модель сессии пользователя
         """
-        sql = """
-            select * from "session"
-            where "id" = $1
-        """
         async with self._db.acquire() as c:
-            row = await c.fetchrow(sql, id_)
+            row = await c.fetchrow(GET_SESSION_BY_ID_SQL, id_)
 
         if not row:
             return
@@ -0,0 +1,162 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from asyncpg import Pool
+from pydantic import UUID4, UUID5
+
+from rchat.repository.helpers import try_advisory_lock
+from rchat.schemas.update import Update
+
+# Ключ advisory-блокировки удаления устаревших событий
+EXPIRE_UPDATES_LOCK_ID = 5001
+
+# Ключ advisory-блокировки выдачи order_id событий
+CREATE_UPDATES_LOCK_ID = 5003
+
+# Данные события сохраняются один раз, а строки update для каждого
+# получателя ссылаются на них по общему order_id события.
+# order_id выдаётся под блокировкой до конца транзакции, поэтому события
+# фиксируются строго в порядке order_id: пока событие N не зафиксировано,
+# событие N + 1 не получит номер и не будет отправлено клиентам
+CREATE_UPDATES_SQL = f"""
+    with "lock" as (
+        select pg_advisory_xact_lock({CREATE_UPDATES_LOCK_ID})
+    ), "payload" as (
+        insert into "update_payload" ("order_id", "payload")
+        select nextval('update_order_id_seq'), $4 from "lock"
+        returning "order_id"
+    ), "inserted" as (
+        insert into "update"
+            ("id", "type", "user_id", "update_message_id", "order_id")
+        select u."id", $3, u."user_id", $5, p."order_id"
+        from unnest($1::uuid[], $2::uuid[]) as u("id", "user_id"), "payload" p
+    )
+    select "order_id" from "payload"
+"""
+GET_USER_UPDATES_SQL = """
+    select u."order_id", u."type", p."payload"
+    from "update" u
+    join "update_payload" p on p."order_id" = u."order_id"
+    where u."user_id" = $1 and u."order_id" > $2
+    order by u."order_id"
+    limit $3
+"""
+
+
+class UpdateRepository:
+    def __init__(self, db: Pool):
+        self._db = db
+
+    async def create_updates(
+        self,
+        type_: str,
+        user_id_list: list[UUID5],
+        payload: str,
+        message_id: Optional[UUID4] = None,
+    ) -> int:
+        """
+        Сохраняет событие для всех получателей одним запросом.
+        Запросы выполняются по одному (CREATE_UPDATES_LOCK_ID),
+        чтобы события фиксировались в порядке order_id.
+
+        :param payload: данные события в JSON
+        :returns: order_id события, общий для всех получателей
+        """
+        async with self._db.acquire() as c:
+            return await c.fetchval(
+                CREATE_UPDATES_SQL,
+                [uuid.uuid4() for _ in user_id_list],
+                user_id_list,
+                type_,
+                payload,
+                message_id,
+            )
+
+    async def get_user_updates(
+        self, user_id: UUID5, since: int, limit: int
+    ) -> list[Update]:
+        """
+        Возвращает события пользователя после order_id since
+        в порядке их отправки.
+        """
+        async with self._db.acquire() as c:
+            rows = await c.fetch(GET_USER_UPDATES_SQL, user_id, since, limit)
+
+        return [Update(**dict(row)) for row in rows]
+
+    async def get_last_order_id(self) -> int:
+        """
+        Возвращает order_id последнего зафиксированного события.
+        Если хранимых событий нет, возвращает order_id последнего
+        удалённого по сроку хранения события.
+        """
+        sql = """
+            select coalesce(
+                (select max("order_id") from "update_payload"),
+                (select max("order_id") from "update_expiry"),
+                0
+            )
+        """
+        async with self._db.acquire() as c:
+            return await c.fetchval(sql)
+
+    async def get_expired_order_id(self, user_id: UUID5) -> int:
+        """
+        Возвращает order_id последнего события пользователя,
+        удалённого по сроку хранения, или 0.
+        """
+        sql = """
+            select coalesce(
+                (select "order_id" from "update_expiry" where "user_id" = $1),
+                0
+            )
+        """
+        async with self._db.acquire() as c:
+            return await c.fetchval(sql, user_id)
+
+    def expiration_lock(self):
+        """
+        Блокировка удаления устаревших событий:
+        удаление выполняет только воркер, взявший её.
+        """
+        return try_advisory_lock(self._db, EXPIRE_UPDATES_LOCK_ID)
+
+    async def delete_expired(
+        self, created_before: datetime, limit: int
+    ) -> int:
+        """
+        Удаляет не больше limit событий, созданных до указанного времени.
+        Для каждого получателя запоминается order_id последнего удалённого
+        события, чтобы отличить пропуск удалённых событий от их отсутствия.
+
+        :returns: количество удалённых событий
+        """
+        sql = """
+            with "expired" as (
+                select "order_id" from "update_payload"
+                where "created_timestamp" < $1
+                order by "order_id"
+                limit $2
+            ), "deleted_updates" as (
+                delete from "update" u
+                using "expired" e
+                where u."order_id" = e."order_id"
+                returning u."user_id", u."order_id"
+            ), "expiry" as (
+                insert into "update_expiry" ("user_id", "order_id")
+                select "user_id", max("order_id") from "deleted_updates"
+                group by "user_id"
+                on conflict ("user_id") do update
+                set "order_id" = greatest(
+                    "update_expiry"."order_id", excluded."order_id"
+                )
+            ), "deleted" as (
+                delete from "update_payload"
+                where "order_id" in (select "order_id" from "expired")
+                returning 1
+            )
+            select count(*) from "deleted"
+        """
+        async with self._db.acquire() as c:
+            return await c.fetchval(sql, created_before, limit)
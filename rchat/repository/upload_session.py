@@ -0,0 +1,98 @@
+from datetime import datetime
+from typing import Optional
+
+from asyncpg import Pool
+from pydantic import UUID4
+
+from rchat.repository.helpers import build_model, try_advisory_lock
+from rchat.schemas.upload_session import UploadSession, UploadSessionCreate
+
+# Ключ advisory-блокировки удаления брошенных сессий загрузки
+EXPIRE_UPLOAD_SESSIONS_LOCK_ID = 5002
+
+
+class UploadSessionRepository:
+    def __init__(self, db: Pool):
+        self._db = db
+
+    async def create(self, create_model: UploadSessionCreate) -> UploadSession:
+        """
+        Создаёт сессию загрузки файла по частям.
+        """
+        model_build = build_model(create_model)
+        sql = f"""
+            insert into "upload_session" ({model_build.field_names})
+            values ({model_build.placeholders})
+            returning *
+        """
+        async with self._db.acquire() as c:
+            row = await c.fetchrow(sql, *model_build.values)
+
+        return UploadSession(**dict(row))
+
+    async def get_by_id(self, id_: UUID4) -> Optional[UploadSession]:
+        sql = """
+            select * from "upload_session"
+            where "id" = $1
+        """
+        async with self._db.acquire() as c:
+            row = await c.fetchrow(sql, id_)
+
+        if not row:
+            return
+
+        return UploadSession(**dict(row))
+
+    async def update_received_bytes(
+        self, id_: UUID4, offset: int, received_bytes: int
+    ) -> Optional[UploadSession]:
+        """
+        Обновляет количество полученных байт,
+        если с момента начала записи части его никто не изменил.
+        :return: обновлённая сессия или None при конкурентной записи
+        """
+        sql = """
+            update "upload_session"
+            set "received_bytes" = $3, "updated_timestamp" = now()
+            where "id" = $1 and "received_bytes" = $2
+            returning *
+        """
+        async with self._db.acquire() as c:
+            row = await c.fetchrow(sql, id_, offset, received_bytes)
+
+        if not row:
+            return
+
+        return UploadSession(**dict(row))
+
+    async def delete(self, id_: UUID4) -> bool:
+        sql = """
+            delete from "upload_session" where "id" = $1
+            returning true
+        """
+        async with self._db.acquire() as c:
+            row = await c.fetchrow(sql, id_)
+
+        return bool(row)
+
+    def expiration_lock(self):
+        """
+        Блокировка удаления брошенных сессий:
+        удаление выполняет только воркер, взявший её.
+        """
+        return try_advisory_lock(self._db, EXPIRE_UPLOAD_SESSIONS_LOCK_ID)
+
+    async def delete_expired(self, updated_before: datetime) -> list[UUID4]:
+        """
+        Удаляет сессии загрузки, не обновлявшиеся с указанного времени.
+        :return: список id удалённых сессий
+        """
+        sql = """
+            delete from "upload_session"
+            where "updated_timestamp" < $1
+            returning "id"
+        """
+        async with self._db.acquire() as c:
+            rows = await c.fetch(sql, updated_before)
+
+        return [row["id"] for row in rows]
@@ -29,6 +29,22 @@ class UserRepository:
 
         return User(**dict(row))
 
+    async def get_by_id_list(self, id_list: list[UUID5]) -> list[User]:
+        """
+        Получает пользователей по списку id одним запросом.
+        """
+        if not id_list:
+            return []
+
+        sql = """
+            select * from "user"
+            where "id" = any($1)
+        """
+        async with self._db.acquire() as c:
+            rows = await c.fetch(sql, id_list)
+
+        return [User(**dict(row)) for row in rows]
+
     async def get_by_email(self, email: str) -> Optional[User]:
         """
         Получает пользователя по его email.
@@ -0,0 +1,44 @@
+"""
+Прогрев соединений пула: подготовка запросов горячих путей.
+
+Без прогрева первые запросы на каждом соединении после деплоя
+тратят лишний раунд на подготовку запроса (Parse/Describe).
+"""
+
+import logging
+
+from asyncpg import Connection
+
+from rchat.repository.chat import (
+    GET_CHAT_PARTICIPANT_USERS_SQL,
+    GET_USER_CHATS_SQL,
+)
+from rchat.repository.message import (
+    GET_CHAT_MESSAGES_SQL,
+    GET_LAST_CHAT_MESSAGE_SQL,
+)
+from rchat.repository.session import GET_SESSION_BY_ID_SQL
+from rchat.repository.update import CREATE_UPDATES_SQL
+
+logger = logging.getLogger(__name__)
+
+HOT_STATEMENTS = [
+    GET_SESSION_BY_ID_SQL,
+    GET_CHAT_PARTICIPANT_USERS_SQL,
+    GET_CHAT_MESSAGES_SQL,
+    GET_USER_CHATS_SQL,
+    GET_LAST_CHAT_MESSAGE_SQL,
+    CREATE_UPDATES_SQL,
+]
+
+
+async def prepare_hot_statements(connection: Connection):
+    """
+    Подготавливает запросы горячих путей на соединении.
+
+    Публичный Connection.prepare не кладёт запрос в кэш соединения,
+    поэтому используется _prepare(use_cache=True) - тот же кэш,
+    что и у fetch/fetchrow/execute в репозиториях.
+    """
+    for sql in HOT_STATEMENTS:
+        await connection._prepare(sql, use_cache=True)
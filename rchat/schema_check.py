@@ -0,0 +1,106 @@
+"""
+Проверки БД при старте приложения без применения миграций.
+Используется только asyncpg, поэтому не блокирует event loop.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+
+from asyncpg import CannotConnectNowError, UndefinedTableError, connect
+
+from rchat.conf import DATABASE_DSN, DB_READY_TIMEOUT_SEC, MIGRATIONS_PATH
+
+logger = logging.getLogger(__name__)
+
+# Таблица применённых миграций yoyo
+MIGRATIONS_TABLE = "_yoyo_migration"
+ROLLBACK_SUFFIX = ".rollback.sql"
+INITIAL_RETRY_DELAY_SEC = 0.1
+MAX_RETRY_DELAY_SEC = 5
+
+
+class SchemaNotCurrentError(Exception):
+    pass
+
+
+def get_migration_ids() -> set[str]:
+    """
+    Идентификаторы миграций из MIGRATIONS_PATH (как их считает yoyo).
+    """
+    return {
+        filename.removesuffix(".sql")
+        for filename in os.listdir(MIGRATIONS_PATH)
+        if filename.endswith(".sql") and not filename.endswith(ROLLBACK_SUFFIX)
+    }
+
+
+async def get_applied_migration_ids(conn) -> set[str]:
+    try:
+        rows = await conn.fetch(
+            f'select "migration_id" from "{MIGRATIONS_TABLE}"'
+        )
+    except UndefinedTableError:
+        return set()
+
+    return {row["migration_id"] for row in rows}
+
+
+async def wait_for_database(deadline: float):
+    """
+    Подключается к БД, повторяя попытки с экспоненциальной задержкой.
+
+    :param deadline: время (time.monotonic) окончания попыток
+    :returns: соединение asyncpg
+    """
+    delay = INITIAL_RETRY_DELAY_SEC
+    while True:
+        try:
+            return await connect(
+                dsn=DATABASE_DSN,
+                timeout=max(deadline - time.monotonic(), delay),
+            )
+        except (OSError, asyncio.TimeoutError, CannotConnectNowError) as err:
+            if time.monotonic() + delay > deadline:
+                raise
+            logger.warning(
+                "Database is not ready. retry_in=%.1f, error=%s", delay, err
+            )
+        # Случайная добавка, чтобы воркеры не переподключались одновременно
+        await asyncio.sleep(delay * random.uniform(1, 1.5))
+        delay = min(delay * 2, MAX_RETRY_DELAY_SEC)
+
+
+async def wait_for_current_schema(timeout: float = DB_READY_TIMEOUT_SEC):
+    """
+    Ждёт доступности БД и применения всех миграций
+    (их может применять отдельный процесс во время деплоя).
+
+    :raises SchemaNotCurrentError: если за timeout миграции не применены
+    """
+    deadline = time.monotonic() + timeout
+    expected_migrations = get_migration_ids()
+    delay = INITIAL_RETRY_DELAY_SEC
+    while True:
+        conn = await wait_for_database(deadline)
+        try:
+            applied_migrations = await get_applied_migration_ids(conn)
+        finally:
+            await conn.close()
+
+        pending_migrations = sorted(expected_migrations - applied_migrations)
+        if not pending_migrations:
+            return
+
+        if time.monotonic() + delay > deadline:
+            raise SchemaNotCurrentError(
+                f"Pending migrations: {pending_migrations}"
+            )
+        logger.warning(
+            "Database schema is not current. pending_migrations=%s",
+            pending_migrations,
+        )
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, MAX_RETRY_DELAY_SEC)
@@ -1,7 +1,8 @@
+import uuid
 from datetime import datetime
 from enum import StrEnum
 
-from pydantic import UUID4, BaseModel
+from pydantic import UUID4, BaseModel, Field
 
 
 class MediaTypeEnum(StrEnum):
@@ -17,4 +18,13 @@ class Media(BaseModel):
     type: MediaTypeEnum
     size_bytes: int
     extension: str
+    content_hash: str | None = None
     created_timestamp: datetime
+
+
+class MediaCreate(BaseModel):
+    id: UUID4 = Field(default_factory=lambda: uuid.uuid4())
+    type: MediaTypeEnum
+    size_bytes: int
+    extension: str
+    content_hash: str
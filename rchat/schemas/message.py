@@ -29,6 +29,7 @@ class Message(BaseModel):
     user_involved_id: UUID5 | None
     is_silent: bool
     last_edited_at: datetime | None
+    deleted_at: datetime | None
     created_timestamp: datetime
 
 
@@ -46,3 +47,22 @@ class MessageCreate(BaseModel):
     user_initiated_action_id: UUID5 | None = None
     user_involved_id: UUID5 | None = None
     is_silent: bool = False
+
+
+class MessageChange(BaseModel):
+    """
+    Результат изменения или удаления сообщения
+    вместе с участниками чата для рассылки события.
+    """
+
+    id: UUID4
+    chat_id: UUID4
+    message_text: str | None
+    last_edited_at: datetime | None
+    deleted_at: datetime | None
+    chat_participants: list[UUID5]
+
+
+class MessageSearchResult(Message):
+    order_id: int
+    rank: float
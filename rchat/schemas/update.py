@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+
+class Update(BaseModel):
+    """
+    Событие, доставленное пользователю, вместе с данными события.
+    """
+
+    order_id: int
+    type: str
+    payload: str
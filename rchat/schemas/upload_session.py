@@ -0,0 +1,25 @@
+import uuid
+from datetime import datetime
+
+from pydantic import UUID4, UUID5, BaseModel, Field
+
+from rchat.schemas.media import MediaTypeEnum
+
+
+class UploadSession(BaseModel):
+    id: UUID4
+    user_id: UUID5
+    media_type: MediaTypeEnum
+    extension: str
+    size_bytes: int
+    received_bytes: int
+    updated_timestamp: datetime
+    created_timestamp: datetime
+
+
+class UploadSessionCreate(BaseModel):
+    id: UUID4 = Field(default_factory=lambda: uuid.uuid4())
+    user_id: UUID5
+    media_type: MediaTypeEnum
+    extension: str
+    size_bytes: int
@@ -1,27 +1,75 @@
-from asyncpg import create_pool
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-from rchat.conf import DATABASE_DSN
+from asyncpg import Connection, create_pool
+
+from rchat.conf import (
+    DATABASE_DSN,
+    DB_POOL_MAX_SIZE,
+    DB_POOL_MIN_SIZE,
+    THUMBNAIL_WORKERS,
+)
+from rchat.query_stats import init_connection
 from rchat.repository.chat import ChatRepository
 from rchat.repository.geoip import GeoIPRepository
 from rchat.repository.media import MediaRepository
 from rchat.repository.message import MessageRepository
 from rchat.repository.session import SessionRepository
+from rchat.repository.update import UpdateRepository
+from rchat.repository.upload_session import UploadSessionRepository
 from rchat.repository.user import UserRepository
+from rchat.repository.warmup import HOT_STATEMENTS, prepare_hot_statements
+
+logger = logging.getLogger(__name__)
+
+
+async def init_pool_connection(connection: Connection):
+    """
+    Инициализация нового соединения пула: учёт запросов и прогрев.
+    Выполняется и для соединений, открытых после старта.
+    """
+    await init_connection(connection)
+    await prepare_hot_statements(connection)
 
 
 class AppState:
     def __init__(self):
         self._db = None
         self._engine = None
+        self._process_pool = None
         self._user_repo = None
         self._session_repo = None
         self._geoip_repo = None
         self._media_repo = None
         self._chat_repo = None
         self._message_repo = None
+        self._upload_session_repo = None
+        self._update_repo = None
 
     async def startup(self):
-        self._db = await create_pool(dsn=DATABASE_DSN)
+        # spawn - чтобы не копировать в дочерние процессы
+        # сокеты пула соединений и состояние event loop
+        self._process_pool = ProcessPoolExecutor(
+            max_workers=THUMBNAIL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        # create_pool открывает min_size соединений и прогревает каждое,
+        # поэтому приложение начинает принимать запросы после прогрева
+        warmup_start = time.monotonic()
+        self._db = await create_pool(
+            dsn=DATABASE_DSN,
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE,
+            init=init_pool_connection,
+        )
+        logger.info(
+            "DB pool warmed up. connections=%s, statements=%s, duration=%.3f",
+            self._db.get_size(),
+            len(HOT_STATEMENTS),
+            time.monotonic() - warmup_start,
+        )
 
         self._user_repo = UserRepository(db=self._db)
         self._session_repo = SessionRepository(db=self._db)
@@ -29,10 +77,19 @@ class AppState:
         self._media_repo = MediaRepository(db=self._db)
         self._chat_repo = ChatRepository(db=self._db)
         self._message_repo = MessageRepository(db=self._db)
+        self._upload_session_repo = UploadSessionRepository(db=self._db)
+        self._update_repo = UpdateRepository(db=self._db)
 
     async def shutdown(self):
         if self._db:
             await self._db.close()
+        if self._process_pool:
+            self._process_pool.shutdown(cancel_futures=True)
+
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        assert self._process_pool
+        return self._process_pool
 
     @property
     def user_repo(self) -> UserRepository:
@@ -64,5 +121,15 @@ class AppState:
         assert self._message_repo
         return self._message_repo
 
+    @property
+    def upload_session_repo(self) -> UploadSessionRepository:
+        assert self._upload_session_repo
+        return self._upload_session_repo
+
+    @property
+    def update_repo(self) -> UpdateRepository:
+        assert self._update_repo
+        return self._update_repo
+
 
 app_state = AppState()
@@ -0,0 +1,36 @@
+"""
+Генерация миниатюр изображений.
+
+Функции модуля выполняются в отдельных процессах (ProcessPoolExecutor)
+и импортируются в них при распаковке задачи, поэтому модуль лежит
+вне пакета views и не импортирует ничего, кроме PIL и os.
+"""
+
+import os
+
+from PIL import Image, ImageOps
+
+THUMBNAIL_FORMAT = "webp"
+
+
+def get_thumbnail_name(size: int) -> str:
+    return f"{size}.{THUMBNAIL_FORMAT}"
+
+
+def make_thumbnails(source_path: str, target_dir: str, sizes: list[int]):
+    """
+    Создаёт миниатюры изображения для каждого размера из sizes.
+    Изображение декодируется один раз, миниатюры записываются атомарно.
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+
+        for size in sorted(sizes, reverse=True):
+            image.thumbnail((size, size))
+            target_path = os.path.join(target_dir, get_thumbnail_name(size))
+            temp_path = f"{target_path}.{os.getpid()}.tmp"
+            image.save(temp_path, format=THUMBNAIL_FORMAT, quality=80)
+            os.replace(temp_path, target_path)
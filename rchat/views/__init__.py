@@ -1,17 +1,26 @@
 from fastapi import FastAPI
 
 from rchat.clients.socketio_client import asio_app
+from rchat.conf import PROFILING_TOKEN
 from rchat.views.auth.views import router as auth_router
 from rchat.views.chat.views import router as chat_router
+from rchat.views.debug.views import router as debug_router
+from rchat.views.media.views import router as media_router
 from rchat.views.message.views import router as message_router
+from rchat.views.metrics.views import router as metrics_router
+from rchat.views.update.views import router as update_router
 from rchat.views.user.views import router as user_router
 
 
 def include_routers_and_sio(app: FastAPI):
     app.include_router(auth_router)
     app.include_router(chat_router)
+    app.include_router(media_router)
     app.include_router(message_router)
+    app.include_router(metrics_router)
+    app.include_router(update_router)
     app.include_router(user_router)
+    if PROFILING_TOKEN:
+        app.include_router(debug_router)
 
     app.mount(path="/", app=asio_app)
-
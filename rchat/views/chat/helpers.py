@@ -5,6 +5,7 @@ from fastapi import HTTPException
 from pydantic import UUID5
 from starlette import status
 
+from rchat.conf import AVATAR_THUMBNAIL_SIZE
 from rchat.schemas.chat import (
     Chat,
     ChatParticipant,
@@ -42,7 +43,9 @@ async def get_chat_name_and_avatar(
         )
         other_user = await app_state.user_repo.get_by_id(id_=other_user_id)
         chat_avatar = (
-            app_state.media_repo.get_media_url(id_=other_user.avatar_photo_id)
+            app_state.media_repo.get_media_url(
+                id_=other_user.avatar_photo_id, size=AVATAR_THUMBNAIL_SIZE
+            )
             if other_user.avatar_photo_id
             else None
         )
@@ -51,7 +54,9 @@ async def get_chat_name_and_avatar(
     assert chat.name
 
     chat_avatar = (
-        app_state.media_repo.get_media_url(id_=chat.avatar_photo_id)
+        app_state.media_repo.get_media_url(
+            id_=chat.avatar_photo_id, size=AVATAR_THUMBNAIL_SIZE
+        )
         if chat.avatar_photo_id
         else None
     )
@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import UUID4
 from starlette import status
 
+from rchat.conf import AVATAR_THUMBNAIL_SIZE
 from rchat.schemas.chat import ChatCreate, ChatTypeEnum, UserChatRole
 from rchat.schemas.message import MessageCreate, MessageTypeEnum
 from rchat.schemas.session import Session
@@ -147,7 +148,9 @@ async def create_group_chat(
     )
 
     chat_avatar = (
-        app_state.media_repo.get_media_url(id_=chat.avatar_photo_id)
+        app_state.media_repo.get_media_url(
+            id_=chat.avatar_photo_id, size=AVATAR_THUMBNAIL_SIZE
+        )
         if chat.avatar_photo_id
         else None
     )
@@ -183,7 +186,9 @@ async def get_chat_users(
             id=user.id,
             name=user.name,
             avatar_photo_url=(
-                app_state.media_repo.get_media_url(id_=user.avatar_photo_id)
+                app_state.media_repo.get_media_url(
+                    id_=user.avatar_photo_id, size=AVATAR_THUMBNAIL_SIZE
+                )
                 if user.avatar_photo_id
                 else None
             ),
@@ -0,0 +1,31 @@
+import asyncio
+import logging
+
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from starlette import status
+
+from rchat.profiling import is_valid_profiling_token, sample_stacks
+
+logger = logging.getLogger(__name__)
+router = APIRouter(tags=["Debug"])
+
+
+@router.get(path="/debug/profile", include_in_schema=False)
+async def profile_process(
+    seconds: float = Query(default=10, gt=0, le=60),
+    interval_ms: float = Query(default=5, ge=1, le=1000),
+    profile_token: str | None = Header(alias="X-Profile-Token", default=None),
+):
+    """
+    Сэмплирующее профилирование всего процесса в течение seconds секунд.
+    Возвращает стеки в формате collapsed stacks для flame graph.
+    Доступно только с токеном администратора (PROFILING_TOKEN).
+    """
+    if not is_valid_profiling_token(profile_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+
+    logger.info("Process profiling started. seconds=%s", seconds)
+    collapsed_stacks = await asyncio.to_thread(
+        sample_stacks, seconds, interval_ms / 1000
+    )
+    return Response(content=collapsed_stacks, media_type="text/plain")
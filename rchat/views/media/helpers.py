@@ -0,0 +1,510 @@
+import asyncio
+import hashlib
+import logging
+import mimetypes
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional
+
+import anyio
+from fastapi import HTTPException
+from pydantic import UUID4
+from starlette import status
+from starlette.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+from rchat.conf import (
+    MEDIA_ACCEL_REDIRECT_PREFIX,
+    MEDIA_MAX_SIZE_BYTES,
+    STORAGE_DIR,
+    THUMBNAIL_SIZES,
+    UPLOAD_SESSION_LIFETIME_HOURS,
+    UPLOAD_SESSION_SWEEP_INTERVAL_SEC,
+)
+from rchat.schemas.media import Media, MediaCreate, MediaTypeEnum
+from rchat.schemas.session import Session
+from rchat.schemas.upload_session import UploadSession
+from rchat.state import app_state
+from rchat.thumbnails import get_thumbnail_name, make_thumbnails
+from rchat.views.media.models import (
+    DownloadMediaStatusEnum,
+    UploadMediaStatusEnum,
+    UploadSessionStatusEnum,
+)
+
+logger = logging.getLogger(__name__)
+
+# Генерации миниатюр, выполняемые в данный момент, по id файла
+_thumbnail_tasks: dict[UUID4, asyncio.Task] = {}
+# Изображения, которые не удалось обработать: {media_id: время ошибки}.
+# Пока запись не устарела, генерация не запускается повторно
+_thumbnail_failures: dict[UUID4, float] = {}
+THUMBNAIL_FAILURE_TTL_SEC = 600
+
+
+def get_media_file_path(content_hash: str) -> str:
+    """
+    Возвращает путь к файлу в хранилище по хэшу его содержимого.
+    Файлы раскладываются по подпапкам по первым символам хэша.
+    """
+    return os.path.join(STORAGE_DIR, "files", content_hash[:2], content_hash)
+
+
+def get_thumbnails_dir(media_id: UUID4) -> str:
+    """
+    Возвращает папку с миниатюрами изображения.
+    Миниатюры лежат внутри files, чтобы отдаваться через nginx
+    по тому же префиксу, что и оригиналы.
+    """
+    return os.path.join(STORAGE_DIR, "files", "thumbnails", media_id.hex)
+
+
+def get_thumbnail_path(media_id: UUID4, size: int) -> str:
+    return os.path.join(get_thumbnails_dir(media_id), get_thumbnail_name(size))
+
+
+def get_temp_file_path(name: str) -> str:
+    return os.path.join(STORAGE_DIR, "temp", name)
+
+
+async def write_stream_to_temp(
+    stream: AsyncIterator[bytes],
+) -> tuple[str, str, int]:
+    """
+    Записывает поток байт во временный файл по частям,
+    параллельно вычисляя sha256 содержимого.
+    Файл целиком в память не загружается.
+
+    :returns: кортеж вида: (temp_path, content_hash, size_bytes)
+    :raises HTTPException: если файл превышает допустимый размер
+    """
+    temp_path = get_temp_file_path(uuid.uuid4().hex)
+    hasher = hashlib.sha256()
+    size_bytes = 0
+    try:
+        with open(temp_path, "wb") as file:
+            async for chunk in stream:
+                size_bytes += len(chunk)
+                if size_bytes > MEDIA_MAX_SIZE_BYTES:
+                    logger.error(
+                        "Uploaded file too large. size_bytes=%s", size_bytes
+                    )
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=UploadMediaStatusEnum.file_too_large,
+                    )
+                hasher.update(chunk)
+                await asyncio.to_thread(file.write, chunk)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+    return temp_path, hasher.hexdigest(), size_bytes
+
+
+def move_to_storage(temp_path: str, content_hash: str):
+    """
+    Атомарно перемещает временный файл в хранилище.
+    Если файл с таким содержимым уже есть, временный файл удаляется.
+    """
+    file_path = get_media_file_path(content_hash)
+    if os.path.exists(file_path):
+        os.remove(temp_path)
+        return
+
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    os.replace(temp_path, file_path)
+
+
+async def create_media_from_temp(
+    temp_path: str,
+    content_hash: str,
+    size_bytes: int,
+    media_type: MediaTypeEnum,
+    extension: str,
+) -> Media:
+    """
+    Перемещает полностью полученный файл в хранилище и создаёт запись о нём.
+    Одинаковые по содержимому файлы одного типа не дублируются -
+    возвращается уже существующая запись.
+    """
+    move_to_storage(temp_path=temp_path, content_hash=content_hash)
+
+    media = await app_state.media_repo.get_by_content_hash(
+        content_hash=content_hash, media_type=media_type
+    )
+    if media:
+        logger.info(
+            "Media deduplicated. media_id=%s, content_hash=%s",
+            media.id,
+            content_hash,
+        )
+        return media
+
+    media = await app_state.media_repo.create_media(
+        create_model=MediaCreate(
+            type=media_type,
+            size_bytes=size_bytes,
+            extension=extension.lower(),
+            content_hash=content_hash,
+        )
+    )
+    if media.type == MediaTypeEnum.photo:
+        start_thumbnails_generation(media)
+
+    return media
+
+
+def start_thumbnails_generation(media: Media) -> asyncio.Task:
+    """
+    Запускает генерацию всех миниатюр изображения в пуле процессов.
+    Если генерация уже идёт, возвращает её задачу.
+    """
+    task = _thumbnail_tasks.get(media.id)
+    if task:
+        return task
+
+    loop = asyncio.get_running_loop()
+    task = asyncio.ensure_future(
+        loop.run_in_executor(
+            app_state.process_pool,
+            make_thumbnails,
+            get_media_file_path(media.content_hash),
+            get_thumbnails_dir(media.id),
+            THUMBNAIL_SIZES,
+        )
+    )
+    _thumbnail_tasks[media.id] = task
+    task.add_done_callback(
+        lambda done_task: _on_thumbnails_generated(media.id, done_task)
+    )
+    return task
+
+
+def _on_thumbnails_generated(media_id: UUID4, task: asyncio.Future):
+    _thumbnail_tasks.pop(media_id, None)
+    if not task.cancelled() and task.exception():
+        _thumbnail_failures[media_id] = time.monotonic()
+        logger.error(
+            "Thumbnails generation failed. media_id=%s, exception=%s",
+            media_id,
+            task.exception(),
+        )
+
+
+def is_thumbnails_generation_failed(media_id: UUID4) -> bool:
+    """
+    Проверяет, что генерация миниатюр недавно завершилась ошибкой.
+    Устаревшие записи об ошибках удаляются.
+    """
+    now = time.monotonic()
+    for failed_media_id, failed_at in list(_thumbnail_failures.items()):
+        if now - failed_at > THUMBNAIL_FAILURE_TTL_SEC:
+            _thumbnail_failures.pop(failed_media_id)
+
+    return media_id in _thumbnail_failures
+
+
+async def get_or_create_thumbnail(media: Media, size: int) -> str:
+    """
+    Возвращает путь к миниатюре изображения.
+    Если миниатюры ещё нет, дожидается её генерации.
+    :raises HTTPException: если изображение не удалось обработать
+    """
+    thumbnail_path = get_thumbnail_path(media_id=media.id, size=size)
+    if os.path.exists(thumbnail_path):
+        return thumbnail_path
+
+    if is_thumbnails_generation_failed(media.id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=DownloadMediaStatusEnum.thumbnail_not_available,
+        )
+
+    try:
+        await asyncio.shield(start_thumbnails_generation(media))
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=DownloadMediaStatusEnum.thumbnail_not_available,
+        )
+
+    return thumbnail_path
+
+
+async def save_media_from_stream(
+    stream: AsyncIterator[bytes],
+    media_type: MediaTypeEnum,
+    extension: str,
+) -> Media:
+    """
+    Сохраняет загружаемый файл в хранилище и создаёт запись о нём.
+    """
+    temp_path, content_hash, size_bytes = await write_stream_to_temp(stream)
+    if not size_bytes:
+        os.remove(temp_path)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=UploadMediaStatusEnum.empty_file,
+        )
+
+    return await create_media_from_temp(
+        temp_path=temp_path,
+        content_hash=content_hash,
+        size_bytes=size_bytes,
+        media_type=media_type,
+        extension=extension,
+    )
+
+
+def get_upload_session_temp_path(upload_session_id: UUID4) -> str:
+    return get_temp_file_path(f"upload_{upload_session_id.hex}")
+
+
+async def get_user_upload_session(
+    upload_session_id: UUID4, session: Session
+) -> UploadSession:
+    """
+    Получает сессию загрузки, созданную пользователем.
+    :raises HTTPException: если сессия не найдена
+    """
+    upload_session = await app_state.upload_session_repo.get_by_id(
+        id_=upload_session_id
+    )
+    if not upload_session or upload_session.user_id != session.user_id:
+        logger.error(
+            "Upload session not found. upload_session_id=%s, session=%s",
+            upload_session_id,
+            session.id,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=UploadSessionStatusEnum.upload_session_not_found,
+        )
+
+    return upload_session
+
+
+async def write_stream_at_offset(
+    stream: AsyncIterator[bytes], path: str, offset: int, max_bytes: int
+) -> int:
+    """
+    Записывает поток байт в файл, начиная с указанного смещения.
+    Каждая часть пишется позиционной записью (pwrite),
+    ранее записанные части файла не перечитываются.
+
+    :returns: количество записанных байт
+    :raises HTTPException: если поток длиннее max_bytes
+    """
+    written = 0
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+    try:
+        async for chunk in stream:
+            if written + len(chunk) > max_bytes:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=UploadMediaStatusEnum.file_too_large,
+                )
+            await asyncio.to_thread(os.pwrite, fd, chunk, offset + written)
+            written += len(chunk)
+    finally:
+        os.close(fd)
+
+    return written
+
+
+def get_file_hash(path: str) -> str:
+    """
+    Вычисляет sha256 файла, читая его блоками.
+    """
+    hasher = hashlib.sha256()
+    with open(path, "rb") as file:
+        while block := file.read(1024 * 1024):
+            hasher.update(block)
+
+    return hasher.hexdigest()
+
+
+def remove_file_if_exists(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def expire_upload_sessions():
+    """
+    Удаляет брошенные сессии загрузки вместе с их временными файлами.
+    Воркеры, не взявшие блокировку удаления, пропускают интервал.
+    """
+    async with app_state.upload_session_repo.expiration_lock() as is_locked:
+        if not is_locked:
+            return
+
+        expired_sessions = await app_state.upload_session_repo.delete_expired(
+            updated_before=datetime.now()
+            - timedelta(hours=UPLOAD_SESSION_LIFETIME_HOURS)
+        )
+    for upload_session_id in expired_sessions:
+        remove_file_if_exists(get_upload_session_temp_path(upload_session_id))
+
+    if expired_sessions:
+        logger.info(
+            "Expired upload sessions removed. count=%s", len(expired_sessions)
+        )
+
+
+async def run_upload_sessions_sweeper():
+    """
+    Периодически удаляет брошенные сессии загрузки.
+    """
+    while True:
+        try:
+            await expire_upload_sessions()
+        except Exception as unexpected_exception:
+            logger.error(
+                "Unexpected exception on expire upload sessions."
+                " exception=%s",
+                unexpected_exception,
+            )
+        await asyncio.sleep(UPLOAD_SESSION_SWEEP_INTERVAL_SEC)
+
+
+def get_media_content_type(media: Media) -> str:
+    return (
+        mimetypes.guess_type(f"file.{media.extension}")[0]
+        or "application/octet-stream"
+    )
+
+
+def get_media_etag(media: Media, size: int | None = None) -> str:
+    """
+    Сильный ETag на основе хэша содержимого файла и размера миниатюры.
+    """
+    if size:
+        return f'"{media.content_hash}-{size}"'
+
+    return f'"{media.content_hash}"'
+
+
+def get_accel_redirect_path(file_path: str) -> str:
+    """
+    Возвращает путь для X-Accel-Redirect к файлу из папки files.
+    """
+    files_dir = os.path.join(STORAGE_DIR, "files")
+    relative_path = os.path.relpath(file_path, files_dir)
+    return f"{MEDIA_ACCEL_REDIRECT_PREFIX}/{relative_path}"
+
+
+def is_etag_matched(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Проверяет, совпадает ли ETag с одним из переданных в If-None-Match.
+    """
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    return etag in (tag.strip() for tag in if_none_match.split(","))
+
+
+def parse_range_header(
+    range_header: Optional[str], file_size: int
+) -> Optional[tuple[int, int]]:
+    """
+    Разбирает заголовок Range с одним диапазоном байт.
+    Несколько диапазонов и некорректный заголовок игнорируются -
+    в этом случае отдаётся весь файл.
+
+    :returns: кортеж вида: (start, end), границы включительно
+    :raises HTTPException: если диапазон лежит за пределами файла
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return
+
+    range_spec = range_header.removeprefix("bytes=").strip()
+    if "," in range_spec:
+        return
+
+    start_str, _, end_str = range_spec.partition("-")
+    try:
+        if not start_str:
+            suffix_length = int(end_str)
+            start, end = max(file_size - suffix_length, 0), file_size - 1
+        else:
+            start = int(start_str)
+            end = (
+                min(int(end_str), file_size - 1) if end_str else file_size - 1
+            )
+    except ValueError:
+        return
+
+    if start > end or start >= file_size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail=DownloadMediaStatusEnum.range_not_satisfiable,
+            headers={"Content-Range": f"bytes */{file_size}"},
+        )
+
+    return start, end
+
+
+class RangeFileResponse(FileResponse):
+    """
+    Ответ с частью файла (206 Partial Content).
+    Файл читается с нужного смещения по частям, целиком в память не попадает.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        start: int,
+        end: int,
+        stat_result: os.stat_result,
+        **kwargs,
+    ):
+        super().__init__(
+            path,
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            stat_result=stat_result,
+            **kwargs,
+        )
+        self.start = start
+        self.end = end
+        self.headers["content-length"] = str(end - start + 1)
+        self.headers["content-range"] = (
+            f"bytes {start}-{end}/{stat_result.st_size}"
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            remaining = self.end - self.start + 1
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": remaining > 0,
+                    }
+                )
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b""})
@@ -0,0 +1,49 @@
+from enum import StrEnum
+
+from pydantic import UUID4, BaseModel, Field
+
+from rchat.schemas.media import MediaTypeEnum
+
+
+class MediaExtensionPatternEnum(StrEnum):
+    extension = "^[A-Za-z0-9]{1,16}$"
+
+
+class UploadMediaStatusEnum(StrEnum):
+    empty_file = "empty_file"
+    file_too_large = "file_too_large"
+
+
+class UploadSessionStatusEnum(StrEnum):
+    upload_session_not_found = "upload_session_not_found"
+    invalid_offset = "invalid_offset"
+    upload_not_complete = "upload_not_complete"
+
+
+class DownloadMediaStatusEnum(StrEnum):
+    media_not_found = "media_not_found"
+    range_not_satisfiable = "range_not_satisfiable"
+    thumbnail_not_available = "thumbnail_not_available"
+    invalid_thumbnail_size = "invalid_thumbnail_size"
+
+
+class UploadMediaResponse(BaseModel):
+    id: UUID4
+    url: str
+
+
+class CreateUploadSessionBody(BaseModel):
+    media_type: MediaTypeEnum
+    extension: str = Field(pattern=MediaExtensionPatternEnum.extension)
+    size_bytes: int = Field(gt=0)
+
+
+class UploadSessionResponse(BaseModel):
+    """
+    Модель состояния загрузки файла по частям.
+    Следующая часть должна передаваться со смещением received_bytes.
+    """
+
+    id: UUID4
+    size_bytes: int
+    received_bytes: int
@@ -0,0 +1,333 @@
+import asyncio
+import logging
+import os
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from pydantic import UUID4
+from starlette import status
+from starlette.responses import FileResponse
+
+from rchat.conf import (
+    MEDIA_ACCEL_REDIRECT_PREFIX,
+    MEDIA_MAX_SIZE_BYTES,
+    THUMBNAIL_SIZES,
+)
+from rchat.schemas.media import MediaTypeEnum
+from rchat.schemas.session import Session
+from rchat.schemas.upload_session import UploadSessionCreate
+from rchat.state import app_state
+from rchat.thumbnails import THUMBNAIL_FORMAT
+from rchat.views.auth.helpers import check_access_token
+from rchat.views.media.helpers import (
+    RangeFileResponse,
+    create_media_from_temp,
+    get_accel_redirect_path,
+    get_file_hash,
+    get_media_content_type,
+    get_media_etag,
+    get_media_file_path,
+    get_or_create_thumbnail,
+    get_upload_session_temp_path,
+    get_user_upload_session,
+    is_etag_matched,
+    parse_range_header,
+    remove_file_if_exists,
+    save_media_from_stream,
+    write_stream_at_offset,
+)
+from rchat.views.media.models import (
+    CreateUploadSessionBody,
+    DownloadMediaStatusEnum,
+    MediaExtensionPatternEnum,
+    UploadMediaResponse,
+    UploadMediaStatusEnum,
+    UploadSessionResponse,
+    UploadSessionStatusEnum,
+)
+
+logger = logging.getLogger(__name__)
+router = APIRouter(tags=["Media"])
+
+
+@router.post(path="/media/upload", response_model=UploadMediaResponse)
+async def upload_media(
+    request: Request,
+    media_type: MediaTypeEnum,
+    extension: str = Query(pattern=MediaExtensionPatternEnum.extension),
+    session: Session = Depends(check_access_token),
+):
+    """
+    Загружает файл в хранилище.
+    Содержимое файла передаётся телом запроса как есть
+    и записывается на диск по мере получения.
+    """
+    media = await save_media_from_stream(
+        stream=request.stream(),
+        media_type=media_type,
+        extension=extension,
+    )
+    logger.info(
+        "Media uploaded. media_id=%s, session=%s", media.id, session.id
+    )
+
+    return UploadMediaResponse(
+        id=media.id, url=app_state.media_repo.get_media_url(id_=media.id)
+    )
+
+
+@router.post(
+    path="/media/upload_session", response_model=UploadSessionResponse
+)
+async def create_upload_session(
+    body: CreateUploadSessionBody,
+    session: Session = Depends(check_access_token),
+):
+    """
+    Создаёт сессию загрузки файла по частям.
+    Используется для больших аудио и видео сообщений,
+    загрузку которых нужно уметь продолжить после обрыва связи.
+    """
+    if body.size_bytes > MEDIA_MAX_SIZE_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=UploadMediaStatusEnum.file_too_large,
+        )
+
+    upload_session = await app_state.upload_session_repo.create(
+        create_model=UploadSessionCreate(
+            user_id=session.user_id,
+            media_type=body.media_type,
+            extension=body.extension,
+            size_bytes=body.size_bytes,
+        )
+    )
+    return UploadSessionResponse(**upload_session.model_dump())
+
+
+@router.get(
+    path="/media/upload_session/{upload_session_id}",
+    response_model=UploadSessionResponse,
+)
+async def get_upload_session_progress(
+    upload_session_id: UUID4,
+    session: Session = Depends(check_access_token),
+):
+    """
+    Возвращает, сколько байт файла уже получено.
+    """
+    upload_session = await get_user_upload_session(
+        upload_session_id=upload_session_id, session=session
+    )
+    return UploadSessionResponse(**upload_session.model_dump())
+
+
+@router.put(
+    path="/media/upload_session/{upload_session_id}",
+    response_model=UploadSessionResponse,
+)
+async def upload_chunk(
+    request: Request,
+    upload_session_id: UUID4,
+    offset: int,
+    session: Session = Depends(check_access_token),
+):
+    """
+    Принимает очередную часть файла.
+    Смещение части должно совпадать с количеством уже полученных байт.
+    """
+    upload_session = await get_user_upload_session(
+        upload_session_id=upload_session_id, session=session
+    )
+    if offset != upload_session.received_bytes:
+        logger.error(
+            "Invalid chunk offset. offset=%s, received_bytes=%s,"
+            " upload_session_id=%s",
+            offset,
+            upload_session.received_bytes,
+            upload_session.id,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=UploadSessionStatusEnum.invalid_offset,
+        )
+
+    written = await write_stream_at_offset(
+        stream=request.stream(),
+        path=get_upload_session_temp_path(upload_session.id),
+        offset=offset,
+        max_bytes=upload_session.size_bytes - offset,
+    )
+    updated_session = (
+        await app_state.upload_session_repo.update_received_bytes(
+            id_=upload_session.id,
+            offset=offset,
+            received_bytes=offset + written,
+        )
+    )
+    if not updated_session:
+        logger.error(
+            "Concurrent chunk upload. upload_session_id=%s", upload_session.id
+        )
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=UploadSessionStatusEnum.invalid_offset,
+        )
+
+    return UploadSessionResponse(**updated_session.model_dump())
+
+
+@router.post(
+    path="/media/upload_session/{upload_session_id}/finalize",
+    response_model=UploadMediaResponse,
+)
+async def finalize_upload_session(
+    upload_session_id: UUID4,
+    session: Session = Depends(check_access_token),
+):
+    """
+    Завершает загрузку по частям: файл перемещается в хранилище
+    и становится доступен как обычный медиафайл.
+    """
+    upload_session = await get_user_upload_session(
+        upload_session_id=upload_session_id, session=session
+    )
+    if upload_session.received_bytes != upload_session.size_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=UploadSessionStatusEnum.upload_not_complete,
+        )
+    if not await app_state.upload_session_repo.delete(id_=upload_session.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=UploadSessionStatusEnum.upload_session_not_found,
+        )
+
+    temp_path = get_upload_session_temp_path(upload_session.id)
+    try:
+        content_hash = await asyncio.to_thread(get_file_hash, temp_path)
+        media = await create_media_from_temp(
+            temp_path=temp_path,
+            content_hash=content_hash,
+            size_bytes=upload_session.size_bytes,
+            media_type=upload_session.media_type,
+            extension=upload_session.extension,
+        )
+    except BaseException:
+        remove_file_if_exists(temp_path)
+        raise
+
+    logger.info(
+        "Media uploaded by chunks. media_id=%s, session=%s",
+        media.id,
+        session.id,
+    )
+    return UploadMediaResponse(
+        id=media.id, url=app_state.media_repo.get_media_url(id_=media.id)
+    )
+
+
+@router.get(path="/media/{media_id}")
+async def download_media(
+    media_id: UUID4,
+    size: int | None = None,
+    range_header: str | None = Header(alias="Range", default=None),
+    if_range: str | None = Header(default=None),
+    if_none_match: str | None = Header(default=None),
+    session: Session = Depends(check_access_token),
+):
+    """
+    Отдаёт файл из хранилища.
+
+    Для изображений можно запросить миниатюру одного из размеров
+    THUMBNAIL_SIZES параметром size.
+    Поддерживает запросы части файла (Range) для перемотки аудио и видео
+    и условные запросы по ETag (If-None-Match).
+    Если настроен MEDIA_ACCEL_REDIRECT_PREFIX, приложение только
+    проверяет доступ, а сам файл отдаёт nginx.
+    """
+    media = await app_state.media_repo.get_media_by_id(id_=media_id)
+    if not media or not media.content_hash:
+        logger.error(
+            "Media not found. media_id=%s, session=%s", media_id, session.id
+        )
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=DownloadMediaStatusEnum.media_not_found,
+        )
+
+    if size and (
+        size not in THUMBNAIL_SIZES or media.type != MediaTypeEnum.photo
+    ):
+        logger.error(
+            "Invalid thumbnail size. media_id=%s, size=%s", media.id, size
+        )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=DownloadMediaStatusEnum.invalid_thumbnail_size,
+        )
+
+    etag = get_media_etag(media=media, size=size)
+    headers = {
+        "etag": etag,
+        "accept-ranges": "bytes",
+        # содержимое файла по id никогда не меняется
+        "cache-control": "private, max-age=31536000, immutable",
+    }
+    if is_etag_matched(if_none_match=if_none_match, etag=etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers=headers
+        )
+
+    if size:
+        file_path = await get_or_create_thumbnail(media=media, size=size)
+        content_type = f"image/{THUMBNAIL_FORMAT}"
+    else:
+        file_path = get_media_file_path(media.content_hash)
+        content_type = get_media_content_type(media)
+
+    if MEDIA_ACCEL_REDIRECT_PREFIX:
+        headers["x-accel-redirect"] = get_accel_redirect_path(file_path)
+        return Response(headers=headers, media_type=content_type)
+
+    try:
+        stat_result = await asyncio.to_thread(os.stat, file_path)
+    except FileNotFoundError:
+        logger.error(
+            "Media file not found in storage. media_id=%s, path=%s",
+            media.id,
+            file_path,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=DownloadMediaStatusEnum.media_not_found,
+        )
+
+    byte_range = None
+    if not if_range or if_range == etag:
+        byte_range = parse_range_header(
+            range_header=range_header, file_size=stat_result.st_size
+        )
+    if byte_range:
+        return RangeFileResponse(
+            path=file_path,
+            start=byte_range[0],
+            end=byte_range[1],
+            stat_result=stat_result,
+            headers=headers,
+            media_type=content_type,
+        )
+
+    return FileResponse(
+        path=file_path,
+        stat_result=stat_result,
+        headers=headers,
+        media_type=content_type,
+    )
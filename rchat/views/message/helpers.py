@@ -1,4 +1,5 @@
 import logging
+import time
 from typing import Optional
 
 from pydantic import UUID4, UUID5
@@ -8,8 +9,12 @@ from rchat.clients.socketio_client import (
     SocketioEventsEnum,
     sio,
 )
+from rchat.conf import AVATAR_THUMBNAIL_SIZE
+from rchat.log import DELIVERY_LOGGER
+from rchat.metrics import get_socketio_emit_metrics
 from rchat.schemas.chat import Chat, ChatCreate, ChatTypeEnum
-from rchat.schemas.message import Message, MessageCreate
+from rchat.schemas.media import MediaTypeEnum
+from rchat.schemas.message import Message, MessageCreate, MessageTypeEnum
 from rchat.state import app_state
 from rchat.views.chat.helpers import get_chat_name_and_avatar
 from rchat.views.message.models import (
@@ -22,8 +27,10 @@ from rchat.views.message.models import (
     NewMessageResponse,
     NewMessageStatusEnum,
 )
+from rchat.views.update.helpers import record_update
 
 logger = logging.getLogger(__name__)
+delivery_logger = logging.getLogger(DELIVERY_LOGGER)
 
 
 async def get_foreign_message(
@@ -41,6 +48,7 @@ async def get_foreign_message(
         id=message.id,
         type=message.type,
         message_text=message.message_text,
+        deleted_at=message.deleted_at,
         sender=message_sender,
     )
 
@@ -78,6 +86,7 @@ async def get_chat_messages_list(
     messages = await app_state.message_repo.get_chat_messages(
         chat_id=chat_id, last_order_id=last_order_id, limit=limit
     )
+    message_senders = await get_message_senders(messages)
     response_messages = []
     for message in messages:
         forwarded_message = await get_foreign_message(
@@ -87,7 +96,6 @@ async def get_chat_messages_list(
             message.reply_to_message_id
         )
 
-        message_sender = await get_message_sender(message)
         read_by_users = await app_state.message_repo.get_read_user_id_list(
             message_id=message.id
         )
@@ -101,7 +109,21 @@ async def get_chat_messages_list(
                 **message.model_dump(),
                 forwarded_message=forwarded_message,
                 reply_to_message=reply_to_message,
-                sender=message_sender,
+                sender=message_senders[message.id],
+                audio_msg_file_link=(
+                    app_state.media_repo.get_media_url(
+                        message.audio_msg_file_id
+                    )
+                    if message.audio_msg_file_id
+                    else None
+                ),
+                video_msg_file_link=(
+                    app_state.media_repo.get_media_url(
+                        message.video_msg_file_id
+                    )
+                    if message.video_msg_file_id
+                    else None
+                ),
                 created_at=message.created_timestamp,
                 read_by_users=read_by_users,
                 user_initiated_action=user_initiated_action,
@@ -118,7 +140,9 @@ async def get_message_sender(message: Message) -> MessageSender:
     if message.sender_user_id:
         user = await app_state.user_repo.get_by_id(id_=message.sender_user_id)
         avatar_url = (
-            app_state.media_repo.get_media_url(user.avatar_photo_id)
+            app_state.media_repo.get_media_url(
+                id_=user.avatar_photo_id, size=AVATAR_THUMBNAIL_SIZE
+            )
             if user.avatar_photo_id
             else None
         )
@@ -130,7 +154,9 @@ async def get_message_sender(message: Message) -> MessageSender:
 
     chat = await app_state.chat_repo.get_by_id(chat_id=message.sender_chat_id)
     avatar_url = (
-        app_state.media_repo.get_media_url(chat.avatar_photo_id)
+        app_state.media_repo.get_media_url(
+            id_=chat.avatar_photo_id, size=AVATAR_THUMBNAIL_SIZE
+        )
         if chat.avatar_photo_id
         else None
     )
@@ -141,6 +167,59 @@ async def get_message_sender(message: Message) -> MessageSender:
     )
 
 
+async def get_message_senders(
+    messages: list[Message],
+) -> dict[UUID4, MessageSender]:
+    """
+    Возвращает отправителей для списка сообщений.
+    Пользователи и чаты-отправители загружаются одним запросом каждые.
+
+    :returns: словарь вида {message_id: MessageSender}
+    """
+    users = await app_state.user_repo.get_by_id_list(
+        id_list=list({m.sender_user_id for m in messages if m.sender_user_id})
+    )
+    chats = await app_state.chat_repo.get_by_id_list(
+        id_list=list(
+            {
+                m.sender_chat_id
+                for m in messages
+                if not m.sender_user_id and m.sender_chat_id
+            }
+        )
+    )
+    senders = {}
+    for user in users:
+        senders[user.id] = MessageSender(
+            user_id=user.id,
+            name=user.first_name,
+            avatar_photo_url=(
+                app_state.media_repo.get_media_url(
+                    id_=user.avatar_photo_id, size=AVATAR_THUMBNAIL_SIZE
+                )
+                if user.avatar_photo_id
+                else None
+            ),
+        )
+    for chat in chats:
+        senders[chat.id] = MessageSender(
+            chat_id=chat.id,
+            name=chat.name,
+            avatar_photo_url=(
+                app_state.media_repo.get_media_url(
+                    id_=chat.avatar_photo_id, size=AVATAR_THUMBNAIL_SIZE
+                )
+                if chat.avatar_photo_id
+                else None
+            ),
+        )
+
+    return {
+        message.id: senders[message.sender_user_id or message.sender_chat_id]
+        for message in messages
+    }
+
+
 async def create_and_send_message(
     message_create: MessageCreate,
     chat: Chat,
@@ -152,6 +231,7 @@ async def create_and_send_message(
     message = await app_state.message_repo.create_message(
         message=message_create
     )
+    inserted_at = time.monotonic()
     chat_participants = await app_state.chat_repo.get_chat_participant_users(
         chat_id=chat.id
     )
@@ -175,25 +255,112 @@ async def create_and_send_message(
         **message.model_dump(),
         chat=chat_info,
         sender=await get_message_sender(message),
+        audio_msg_file_link=(
+            app_state.media_repo.get_media_url(message.audio_msg_file_id)
+            if message.audio_msg_file_id
+            else None
+        ),
+        video_msg_file_link=(
+            app_state.media_repo.get_media_url(message.video_msg_file_id)
+            if message.video_msg_file_id
+            else None
+        ),
         created_at=message.created_timestamp,
         user_initiated_action=user_initiated_action,
         user_involved=user_involved,
         reply_to_message=reply_to_message,
         forwarded_message=forwarded_message,
     )
-    for participant in chat_participants:
-        if participant in sio.users:
-            logger.info("Message sent to user. user_id=%s", participant)
+    if chat.type == ChatTypeEnum.private:
+        # Название и аватарка личного чата зависят от получателя,
+        # поэтому событие сохраняется для каждого получателя отдельно
+        emitted_count = 0
+        for participant in chat_participants:
             chat_data = await get_chat_name_and_avatar(
                 chat=chat, user_id=participant
             )
             message_response.chat.name = chat_data[0]
             message_response.chat.avatar_photo_url = chat_data[1]
-            await sio.emit(
+            await record_update(
                 event=SocketioEventsEnum.new_message,
-                data=message_response.model_dump_json(),
-                to=sio.users[participant],
+                data=message_response,
+                user_id_list=[participant],
+                message_id=message.id,
             )
+            if sio.should_emit_to_user(participant):
+                await sio.emit_to_user(
+                    user_id=participant,
+                    event=SocketioEventsEnum.new_message,
+                    data=message_response,
+                )
+                emitted_count += 1
+        observe_fanout_recipients(
+            event=SocketioEventsEnum.new_message, emitted_count=emitted_count
+        )
+    else:
+        chat_data = await get_chat_name_and_avatar(
+            chat=chat, user_id=message.sender_user_id
+        )
+        message_response.chat.name = chat_data[0]
+        message_response.chat.avatar_photo_url = chat_data[1]
+        emitted_count = await send_event_to_chat_participants(
+            event=SocketioEventsEnum.new_message,
+            data=message_response,
+            chat_participants=chat_participants,
+            message_id=message.id,
+        )
+
+    if emitted_count:
+        delivery_logger.info(
+            "Message emitted. message_id=%s, emitted_count=%s",
+            message.id,
+            emitted_count,
+        )
+        get_socketio_emit_metrics(SocketioEventsEnum.new_message)[1].observe(
+            time.monotonic() - inserted_at
+        )
+
+
+async def send_event_to_chat_participants(
+    event: SocketioEventsEnum,
+    data,
+    chat_participants: list[UUID5],
+    message_id: UUID4,
+) -> int:
+    """
+    Сохраняет событие для всех участников чата одним запросом
+    и отправляет его тем, кому нужно (sio.should_emit_to_user).
+    Пакет кодируется один раз и отправляется одним emit
+    в комнаты пользователей.
+
+    :returns: количество пользователей, которым отправлено событие
+    """
+    await record_update(
+        event=event,
+        data=data,
+        user_id_list=chat_participants,
+        message_id=message_id,
+    )
+    recipients = [
+        participant
+        for participant in chat_participants
+        if sio.should_emit_to_user(participant)
+    ]
+    if recipients:
+        await sio.emit_to_users(user_ids=recipients, event=event, data=data)
+
+    observe_fanout_recipients(event=event, emitted_count=len(recipients))
+    return len(recipients)
+
+
+def observe_fanout_recipients(event: SocketioEventsEnum, emitted_count: int):
+    """
+    Записывает количество получателей рассылки.
+    При нескольких воркерах событие отправляется всем участникам,
+    и количество онлайн получателей неизвестно, поэтому не записывается.
+    """
+    if sio.tracks_online_users:
+        get_socketio_emit_metrics(event)[0].observe(emitted_count)
 
 
 async def get_private_chat_for_new_message(
@@ -252,6 +419,34 @@ async def mark_unread_messages_before_as_read(
         )
 
 
+async def get_message_type_by_media(
+    message_body: CreateMessageBody,
+) -> Optional[MessageTypeEnum]:
+    """
+    Определяет тип нового сообщения по прикреплённому файлу.
+    Возвращает None, если файл не найден или не подходит по типу.
+    """
+    if message_body.audio_msg_file_id and message_body.video_msg_file_id:
+        return
+
+    if message_body.audio_msg_file_id:
+        media_id = message_body.audio_msg_file_id
+        media_type = MediaTypeEnum.audio_msg
+        message_type = MessageTypeEnum.audio
+    elif message_body.video_msg_file_id:
+        media_id = message_body.video_msg_file_id
+        media_type = MediaTypeEnum.video_msg
+        message_type = MessageTypeEnum.video
+    else:
+        return MessageTypeEnum.text
+
+    media = await app_state.media_repo.get_media_by_id(id_=media_id)
+    if not media or media.type != media_type:
+        return
+
+    return message_type
+
+
 async def validate_message_body_and_get_chat(
     message_body: CreateMessageBody, sender_user_id: UUID5, sid
 ) -> Optional[Chat]:
@@ -274,7 +469,7 @@ async def validate_message_body_and_get_chat(
             status=SocketioErrorStatusEnum.invalid_data,
             event_name=SocketioEventsEnum.new_message,
             error_msg=NewMessageStatusEnum.two_chat_identifiers_provided,
-            data=message_body.model_dump_json(),
+            data=message_body,
         )
         return
 
@@ -294,7 +489,7 @@ async def validate_message_body_and_get_chat(
                 status=SocketioErrorStatusEnum.invalid_data,
                 event_name=SocketioEventsEnum.new_message,
                 error_msg=NewMessageStatusEnum.user_not_found,
-                data=message_body.model_dump_json(),
+                data=message_body,
             )
             return
 
@@ -316,7 +511,7 @@ async def validate_message_body_and_get_chat(
                 status=SocketioErrorStatusEnum.invalid_data,
                 event_name=SocketioEventsEnum.new_message,
                 error_msg=NewMessageStatusEnum.chat_not_found,
-                data=message_body.model_dump_json(),
+                data=message_body,
             )
             return
     else:
@@ -329,7 +524,7 @@ async def validate_message_body_and_get_chat(
             status=SocketioErrorStatusEnum.invalid_data,
             event_name=SocketioEventsEnum.new_message,
             error_msg=NewMessageStatusEnum.no_message_sender_provided,
-            data=message_body.model_dump_json(),
+            data=message_body,
         )
         return
 
@@ -1,7 +1,7 @@
 from datetime import datetime, time
 from enum import StrEnum
 
-from pydantic import UUID4, UUID5, BaseModel
+from pydantic import UUID4, UUID5, BaseModel, Field
 
 from rchat.schemas.chat import ChatTypeEnum
 from rchat.schemas.message import MessageTypeEnum
@@ -15,6 +15,8 @@ class CreateMessageBody(BaseModel):
     chat_id: UUID4 | None = None
     other_user_public_id: str | None = None
     message_text: str | None = None
+    audio_msg_file_id: UUID4 | None = None
+    video_msg_file_id: UUID4 | None = None
     reply_to_message_id: UUID4 | None = None
     forwarded_message_id: UUID4 | None = None
     is_silent: bool = False
@@ -43,6 +45,7 @@ class ForeignMessage(BaseModel):
     id: UUID4
     type: MessageTypeEnum
     message_text: str | None = None
+    deleted_at: datetime | None = None
     sender: MessageSender
 
 
@@ -83,6 +86,7 @@ class MessageResponse(BaseModel):
     user_involved: ActionUserParticipant | None = None
     is_silent: bool
     last_edited_at: datetime | None = None
+    deleted_at: datetime | None = None
     created_at: datetime
     read_by_users: list[UUID5] = []
 
@@ -91,8 +95,40 @@ class ChatMessagesResponse(BaseModel):
     messages: list[MessageResponse]
 
 
+class FoundMessage(BaseModel):
+    """
+    Модель сообщения, найденного полнотекстовым поиском.
+    """
+
+    id: UUID4
+    chat_id: UUID4
+    type: MessageTypeEnum
+    sender: MessageSender
+    message_text: str | None = None
+    created_at: datetime
+    rank: float
+    order_id: int
+
+
+class SearchMessagesResponse(BaseModel):
+    """
+    Модель результатов поиска сообщений.
+    Для получения следующей страницы last_rank и last_order_id
+    передаются в следующий запрос.
+    """
+
+    messages: list[FoundMessage]
+    last_rank: float | None = None
+    last_order_id: int | None = None
+
+
+class SearchMessagesStatusEnum(StrEnum):
+    incomplete_cursor = "incomplete_cursor"
+
+
 class NewMessageResponse(MessageResponse):
     chat: ChatInfo
+    update_order_id: int | None = None
 
 
 class ChatMessagesStatusEnum(StrEnum):
@@ -107,6 +143,7 @@ class NewMessageStatusEnum(StrEnum):
     two_chat_identifiers_provided = "two_chat_identifiers_provided"
     cannot_reply_this_message = "cannot_reply_this_message"
     cannot_forward_this_message = "cannot_forward_this_message"
+    invalid_media_file = "invalid_media_file"
 
 
 class ReadMessageBody(BaseModel):
@@ -125,3 +162,36 @@ class ReadMessageResponse(BaseModel):
     chat_id: UUID4
     message_id: UUID4
     read_by_user: UUID5
+    update_order_id: int | None = None
+
+
+class UpdateMessageBody(BaseModel):
+    message_id: UUID4
+    message_text: str = Field(min_length=1, max_length=4096)
+
+
+class UpdateMessageStatusEnum(StrEnum):
+    cannot_update_message = "cannot_update_message"
+
+
+class UpdateMessageResponse(BaseModel):
+    chat_id: UUID4
+    message_id: UUID4
+    message_text: str
+    last_edited_at: datetime
+    update_order_id: int | None = None
+
+
+class DeleteMessageBody(BaseModel):
+    message_id: UUID4
+
+
+class DeleteMessageStatusEnum(StrEnum):
+    cannot_delete_message = "cannot_delete_message"
+
+
+class DeleteMessageResponse(BaseModel):
+    chat_id: UUID4
+    message_id: UUID4
+    deleted_at: datetime
+    update_order_id: int | None = None
@@ -1,6 +1,6 @@
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import UUID4
 from starlette import status
 
@@ -10,25 +10,36 @@ from rchat.clients.socketio_client import (
     sio,
 )
 from rchat.repository.message import MessageCreate
-from rchat.schemas.message import MessageTypeEnum
 from rchat.schemas.session import Session
 from rchat.state import app_state
 from rchat.views.auth.helpers import check_access_token
 from rchat.views.message.helpers import (
     create_and_send_message,
     get_chat_messages_list,
+    get_message_senders,
+    get_message_type_by_media,
     get_user_id_from_socket_session,
     mark_unread_messages_before_as_read,
+    send_event_to_chat_participants,
     validate_message_body_and_get_chat,
 )
 from rchat.views.message.models import (
     ChatMessagesResponse,
     ChatMessagesStatusEnum,
     CreateMessageBody,
+    DeleteMessageBody,
+    DeleteMessageResponse,
+    DeleteMessageStatusEnum,
+    FoundMessage,
     NewMessageStatusEnum,
     ReadMessageBody,
     ReadMessageResponse,
     ReadMessageStatusEnum,
+    SearchMessagesResponse,
+    SearchMessagesStatusEnum,
+    UpdateMessageBody,
+    UpdateMessageResponse,
+    UpdateMessageStatusEnum,
 )
 
 logger = logging.getLogger(__name__)
@@ -80,6 +91,64 @@ async def get_chat_messages(
     return ChatMessagesResponse(messages=response_messages)
 
 
+@router.get(path="/message/search", response_model=SearchMessagesResponse)
+async def search_messages(
+    query: str,
+    limit: int = Query(gt=0, le=100),
+    last_rank: float | None = None,
+    last_order_id: int | None = None,
+    session: Session = Depends(check_access_token),
+):
+    """
+    Полнотекстовый поиск по сообщениям всех чатов пользователя.
+
+    Сообщения отсортированы по релевантности, затем по новизне.
+    Для получения следующей страницы передаются last_rank и last_order_id
+    из предыдущего ответа, только вместе.
+    """
+    if (last_rank is None) != (last_order_id is None):
+        logger.error(
+            "Incomplete search cursor. last_rank=%s, last_order_id=%s,"
+            " session=%s",
+            last_rank,
+            last_order_id,
+            session.id,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=SearchMessagesStatusEnum.incomplete_cursor,
+        )
+
+    query = query.strip()
+    if not query:
+        return SearchMessagesResponse(messages=[])
+
+    found_messages = await app_state.message_repo.search_user_messages(
+        user_id=session.user_id,
+        query=query,
+        limit=limit,
+        last_rank=last_rank,
+        last_order_id=last_order_id,
+    )
+    message_senders = await get_message_senders(found_messages)
+
+    response = SearchMessagesResponse(
+        messages=[
+            FoundMessage(
+                **message.model_dump(),
+                sender=message_senders[message.id],
+                created_at=message.created_timestamp,
+            )
+            for message in found_messages
+        ]
+    )
+    if found_messages:
+        response.last_rank = found_messages[-1].rank
+        response.last_order_id = found_messages[-1].order_id
+
+    return response
+
+
 @sio.on(SocketioEventsEnum.new_message)
 async def handle_new_message(sid, message_body: CreateMessageBody):
     """
@@ -110,7 +179,7 @@ async def handle_new_message(sid, message_body: CreateMessageBody):
             status=SocketioErrorStatusEnum.invalid_data,
             event_name=SocketioEventsEnum.new_message,
             error_msg=NewMessageStatusEnum.chat_not_found,
-            data=message_body.model_dump_json(),
+            data=message_body,
         )
         return
 
@@ -125,7 +194,7 @@ async def handle_new_message(sid, message_body: CreateMessageBody):
             status=SocketioErrorStatusEnum.invalid_data,
             event_name=SocketioEventsEnum.new_message,
             error_msg=NewMessageStatusEnum.cannot_reply_this_message,
-            data=message_body.model_dump_json(),
+            data=message_body,
         )
         return
 
@@ -133,7 +202,11 @@ async def handle_new_message(sid, message_body: CreateMessageBody):
         message = await app_state.message_repo.get_by_id(
             id_=message_body.reply_to_message_id
         )
-        if not message or message.chat_id != chat.id:
+        if (
+            not message
+            or message.chat_id != chat.id
+            or message.deleted_at is not None
+        ):
             logger.error(
                 "Cannot reply to this message. "
                 "provided_message_id=%s, found_message=%s, user_id=%s",
@@ -146,7 +219,7 @@ async def handle_new_message(sid, message_body: CreateMessageBody):
                 status=SocketioErrorStatusEnum.invalid_data,
                 event_name=SocketioEventsEnum.new_message,
                 error_msg=NewMessageStatusEnum.cannot_reply_this_message,
-                data=message_body.model_dump_json(),
+                data=message_body,
             )
             return
 
@@ -162,7 +235,7 @@ async def handle_new_message(sid, message_body: CreateMessageBody):
                 )
             )
             is_in_chat = sender_user_id in chat_participants
-        if not message or not is_in_chat:
+        if not message or not is_in_chat or message.deleted_at is not None:
             logger.error(
                 "Cannot forward this message. "
                 "provided_message_id=%s, found_message=%s, user_id=%s",
@@ -175,14 +248,32 @@ async def handle_new_message(sid, message_body: CreateMessageBody):
                 status=SocketioErrorStatusEnum.invalid_data,
                 event_name=SocketioEventsEnum.new_message,
                 error_msg=NewMessageStatusEnum.cannot_forward_this_message,
-                data=message_body.model_dump_json(),
+                data=message_body,
             )
             return
 
+    message_type = await get_message_type_by_media(message_body)
+    if not message_type:
+        logger.error(
+            "Invalid media file. audio_msg_file_id=%s, video_msg_file_id=%s,"
+            " user_id=%s",
+            message_body.audio_msg_file_id,
+            message_body.video_msg_file_id,
+            sender_user_id,
+        )
+        await sio.emit_error_event(
+            to_sid=sid,
+            status=SocketioErrorStatusEnum.invalid_data,
+            event_name=SocketioEventsEnum.new_message,
+            error_msg=NewMessageStatusEnum.invalid_media_file,
+            data=message_body,
+        )
+        return
+
     message_create_model = MessageCreate(
         **message_body.model_dump(exclude={"chat_id"}),
         chat_id=chat.id,
-        type=MessageTypeEnum.text,
+        type=message_type,
         sender_user_id=sender_user_id,
     )
     await create_and_send_message(
@@ -214,7 +305,7 @@ async def handle_read_message(sid, read_message_body: ReadMessageBody):
             status=SocketioErrorStatusEnum.invalid_data,
             event_name=SocketioEventsEnum.read_message,
             error_msg=ReadMessageStatusEnum.message_not_found,
-            data=read_message_body.model_dump_json(),
+            data=read_message_body,
         )
         return
 
@@ -232,7 +323,7 @@ async def handle_read_message(sid, read_message_body: ReadMessageBody):
             status=SocketioErrorStatusEnum.invalid_data,
             event_name=SocketioEventsEnum.read_message,
             error_msg=ReadMessageStatusEnum.user_not_in_chat,
-            data=read_message_body.model_dump_json(),
+            data=read_message_body,
         )
         return
 
@@ -247,7 +338,7 @@ async def handle_read_message(sid, read_message_body: ReadMessageBody):
             status=SocketioErrorStatusEnum.invalid_data,
             event_name=SocketioEventsEnum.read_message,
             error_msg=ReadMessageStatusEnum.user_cannot_read_own_message,
-            data=read_message_body.model_dump_json(),
+            data=read_message_body,
         )
         return
 
@@ -266,7 +357,7 @@ async def handle_read_message(sid, read_message_body: ReadMessageBody):
             status=SocketioErrorStatusEnum.invalid_data,
             event_name=SocketioEventsEnum.read_message,
             error_msg=ReadMessageStatusEnum.user_already_read_the_message,
-            data=read_message_body.model_dump_json(),
+            data=read_message_body,
         )
         return
 
@@ -279,10 +370,93 @@ async def handle_read_message(sid, read_message_body: ReadMessageBody):
     read_message_response = ReadMessageResponse(
         chat_id=message.chat_id, message_id=message.id, read_by_user=user_id
     )
-    for user in chat_participants:
-        if user in sio.users:
-            await sio.emit(
-                event=SocketioEventsEnum.read_message,
-                to=sio.users[user],
-                data=read_message_response.model_dump_json(),
-            )
+    await send_event_to_chat_participants(
+        event=SocketioEventsEnum.read_message,
+        data=read_message_response,
+        chat_participants=chat_participants,
+        message_id=message.id,
+    )
+
+
+@sio.on(SocketioEventsEnum.update_message)
+async def handle_update_message(sid, update_message_body: UpdateMessageBody):
+    """
+    Изменяет текст своего текстового сообщения
+    и отправляет изменение всем участникам чата.
+
+    Права проверяются в том же запросе, который изменяет сообщение.
+    """
+    user_id = await get_user_id_from_socket_session(sid)
+
+    message_change = await app_state.message_repo.update_message_text(
+        message_id=update_message_body.message_id,
+        user_id=user_id,
+        message_text=update_message_body.message_text,
+    )
+    if not message_change:
+        logger.error(
+            "Cannot update message. message_id=%s, user_id=%s",
+            update_message_body.message_id,
+            user_id,
+        )
+        await sio.emit_error_event(
+            to_sid=sid,
+            status=SocketioErrorStatusEnum.invalid_data,
+            event_name=SocketioEventsEnum.update_message,
+            error_msg=UpdateMessageStatusEnum.cannot_update_message,
+            data=update_message_body,
+        )
+        return
+
+    await send_event_to_chat_participants(
+        event=SocketioEventsEnum.update_message,
+        data=UpdateMessageResponse(
+            chat_id=message_change.chat_id,
+            message_id=message_change.id,
+            message_text=message_change.message_text,
+            last_edited_at=message_change.last_edited_at,
+        ),
+        chat_participants=message_change.chat_participants,
+        message_id=message_change.id,
+    )
+
+
+@sio.on(SocketioEventsEnum.delete_message)
+async def handle_delete_message(sid, delete_message_body: DeleteMessageBody):
+    """
+    Удаляет сообщение и отправляет удаление всем участникам чата.
+
+    Удалить сообщение может его отправитель, а также владелец
+    и администраторы чата. Сообщение остаётся в чате без содержимого,
+    поэтому курсоры пагинации по order_id не сдвигаются.
+    """
+    user_id = await get_user_id_from_socket_session(sid)
+
+    message_change = await app_state.message_repo.delete_message(
+        message_id=delete_message_body.message_id, user_id=user_id
+    )
+    if not message_change:
+        logger.error(
+            "Cannot delete message. message_id=%s, user_id=%s",
+            delete_message_body.message_id,
+            user_id,
+        )
+        await sio.emit_error_event(
+            to_sid=sid,
+            status=SocketioErrorStatusEnum.invalid_data,
+            event_name=SocketioEventsEnum.delete_message,
+            error_msg=DeleteMessageStatusEnum.cannot_delete_message,
+            data=delete_message_body,
+        )
+        return
+
+    await send_event_to_chat_participants(
+        event=SocketioEventsEnum.delete_message,
+        data=DeleteMessageResponse(
+            chat_id=message_change.chat_id,
+            message_id=message_change.id,
+            deleted_at=message_change.deleted_at,
+        ),
+        chat_participants=message_change.chat_participants,
+        message_id=message_change.id,
+    )
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Response
+
+from rchat.metrics import generate_metrics
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get(path="/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    Метрики в формате Prometheus.
+    Метод внутренний - снаружи закрыт на nginx.
+    """
+    body, content_type = generate_metrics()
+    return Response(content=body, media_type=content_type)
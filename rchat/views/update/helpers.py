@@ -0,0 +1,192 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+import orjson
+from pydantic import UUID4, UUID5, BaseModel
+
+from rchat.clients.socketio_client import SocketioEventsEnum, sio
+from rchat.conf import (
+    UPDATES_RESUME_LIMIT,
+    UPDATES_RETENTION_DAYS,
+    UPDATES_SWEEP_INTERVAL_SEC,
+)
+from rchat.schemas.update import Update
+from rchat.state import app_state
+from rchat.views.message.models import (
+    DeleteMessageResponse,
+    NewMessageResponse,
+    ReadMessageResponse,
+    UpdateMessageResponse,
+)
+from rchat.views.update.models import ResumeResponse, UpdateItem, UpdatesPage
+
+logger = logging.getLogger(__name__)
+
+UPDATES_PAGE_SIZE = 100
+UPDATES_MAX_PAGE_SIZE = 1000
+UPDATES_SWEEP_BATCH_SIZE = 10000
+# Модели событий для повторной отправки в сокет
+UPDATE_EVENT_MODELS: dict[str, type[BaseModel]] = {
+    SocketioEventsEnum.new_message: NewMessageResponse,
+    SocketioEventsEnum.update_message: UpdateMessageResponse,
+    SocketioEventsEnum.delete_message: DeleteMessageResponse,
+    SocketioEventsEnum.read_message: ReadMessageResponse,
+}
+
+
+async def record_update(
+    event: SocketioEventsEnum,
+    data: BaseModel,
+    user_id_list: list[UUID5],
+    message_id: Optional[UUID4] = None,
+):
+    """
+    Сохраняет событие для получателей перед отправкой
+    и записывает в модель его update_order_id.
+    """
+    data.update_order_id = await app_state.update_repo.create_updates(
+        type_=event,
+        user_id_list=user_id_list,
+        payload=data.model_dump_json(exclude={"update_order_id"}),
+        message_id=message_id,
+    )
+
+
+async def get_updates_page(
+    user_id: UUID5, since: int, limit: int
+) -> UpdatesPage:
+    """
+    Возвращает страницу событий пользователя после since.
+
+    resync_required - часть событий этого пользователя после since
+    уже удалена по сроку хранения, тогда события не возвращаются.
+    Если событий больше нет, курсор переносится на последнее
+    зафиксированное событие: события фиксируются в порядке order_id,
+    поэтому событий пользователя до него больше не появится.
+    """
+    # Курсор читается до событий: событие, зафиксированное между
+    # запросами, окажется после курсора и не будет пропущено
+    last_order_id = await app_state.update_repo.get_last_order_id()
+    updates = await app_state.update_repo.get_user_updates(
+        user_id=user_id, since=since, limit=limit + 1
+    )
+    # Удаление по сроку хранения проверяется после чтения событий,
+    # чтобы учесть и события, удалённые между запросами
+    expired_order_id = await app_state.update_repo.get_expired_order_id(
+        user_id=user_id
+    )
+    if since < expired_order_id:
+        return UpdatesPage(
+            updates=[],
+            has_more=False,
+            resync_required=True,
+            last_order_id=max(since, last_order_id),
+        )
+
+    has_more = len(updates) > limit
+    updates = updates[:limit]
+    if has_more:
+        last_order_id = updates[-1].order_id
+    elif updates:
+        last_order_id = max(since, last_order_id, updates[-1].order_id)
+    else:
+        last_order_id = max(since, last_order_id)
+
+    return UpdatesPage(
+        updates=updates,
+        has_more=has_more,
+        resync_required=False,
+        last_order_id=last_order_id,
+    )
+
+
+def get_update_item(update: Update) -> UpdateItem:
+    data = orjson.loads(update.payload)
+    data["update_order_id"] = update.order_id
+    return UpdateItem(order_id=update.order_id, type=update.type, data=data)
+
+
+async def replay_updates(
+    sid: str, user_id: UUID5, since: int
+) -> ResumeResponse:
+    """
+    Повторно отправляет в сокет события, пропущенные после since.
+    Если пропущено больше UPDATES_RESUME_LIMIT событий или часть из них
+    уже удалена, клиент должен загрузить данные заново и продолжить
+    с возвращённого last_order_id.
+    """
+    last_order_id = since
+    replayed_count = 0
+    has_more = True
+    resync_required = False
+    while has_more and not resync_required:
+        page = await get_updates_page(
+            user_id=user_id,
+            since=last_order_id,
+            limit=min(
+                UPDATES_PAGE_SIZE, UPDATES_RESUME_LIMIT - replayed_count
+            ),
+        )
+        updates = page.updates
+        has_more = page.has_more
+        resync_required = page.resync_required
+        last_order_id = page.last_order_id
+        for update in updates:
+            model = UPDATE_EVENT_MODELS[update.type].model_validate_json(
+                update.payload
+            )
+            model.update_order_id = update.order_id
+            await sio.emit(
+                event=update.type, data=sio.prepare_payload(model), to=sid
+            )
+
+        replayed_count += len(updates)
+        if has_more and replayed_count >= UPDATES_RESUME_LIMIT:
+            resync_required = True
+            last_order_id = await app_state.update_repo.get_last_order_id()
+
+    return ResumeResponse(
+        last_order_id=last_order_id,
+        replayed_count=replayed_count,
+        resync_required=resync_required,
+    )
+
+
+async def expire_updates():
+    """
+    Удаляет события старше UPDATES_RETENTION_DAYS пачками,
+    чтобы не держать долгие блокировки.
+    Воркеры, не взявшие блокировку удаления, пропускают интервал.
+    """
+    created_before = datetime.now() - timedelta(days=UPDATES_RETENTION_DAYS)
+    deleted_count = UPDATES_SWEEP_BATCH_SIZE
+    total_count = 0
+    async with app_state.update_repo.expiration_lock() as is_locked:
+        if not is_locked:
+            return
+
+        while deleted_count == UPDATES_SWEEP_BATCH_SIZE:
+            deleted_count = await app_state.update_repo.delete_expired(
+                created_before=created_before, limit=UPDATES_SWEEP_BATCH_SIZE
+            )
+            total_count += deleted_count
+
+    if total_count:
+        logger.info("Expired updates removed. count=%s", total_count)
+
+
+async def run_updates_sweeper():
+    """
+    Периодически удаляет устаревшие события.
+    """
+    while True:
+        try:
+            await expire_updates()
+        except Exception as unexpected_exception:
+            logger.error(
+                "Unexpected exception on expire updates. exception=%s",
+                unexpected_exception,
+            )
+        await asyncio.sleep(UPDATES_SWEEP_INTERVAL_SEC)
@@ -0,0 +1,39 @@
+from pydantic import BaseModel, Field
+
+from rchat.schemas.update import Update
+
+
+class UpdateItem(BaseModel):
+    order_id: int
+    type: str
+    data: dict
+
+
+class UpdatesPage(BaseModel):
+    """
+    Страница событий пользователя.
+    last_order_id - курсор, с которого продолжается получение событий,
+    в том числе после повторной загрузки данных при resync_required.
+    """
+
+    updates: list[Update]
+    has_more: bool
+    resync_required: bool
+    last_order_id: int
+
+
+class UpdatesResponse(BaseModel):
+    updates: list[UpdateItem]
+    last_order_id: int
+    has_more: bool
+    resync_required: bool
+
+
+class ResumeBody(BaseModel):
+    since: int = Field(ge=0)
+
+
+class ResumeResponse(BaseModel):
+    last_order_id: int
+    replayed_count: int
+    resync_required: bool
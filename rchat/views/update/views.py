@@ -0,0 +1,77 @@
+import logging
+
+from fastapi import APIRouter, Depends, Query
+
+from rchat.clients.socketio_client import SocketioEventsEnum, sio
+from rchat.schemas.session import Session
+from rchat.views.auth.helpers import check_access_token
+from rchat.views.message.helpers import get_user_id_from_socket_session
+from rchat.views.update.helpers import (
+    UPDATES_MAX_PAGE_SIZE,
+    UPDATES_PAGE_SIZE,
+    get_update_item,
+    get_updates_page,
+    replay_updates,
+)
+from rchat.views.update.models import ResumeBody, UpdatesResponse
+
+logger = logging.getLogger(__name__)
+router = APIRouter(tags=["Update"])
+
+
+@router.get(path="/updates", response_model=UpdatesResponse)
+async def get_updates(
+    since: int = Query(ge=0),
+    limit: int = Query(UPDATES_PAGE_SIZE, gt=0, le=UPDATES_MAX_PAGE_SIZE),
+    session: Session = Depends(check_access_token),
+):
+    """
+    Получает события пользователя после order_id since
+    (новые, изменённые, удалённые и прочитанные сообщения).
+
+    Для следующей страницы передаётся last_order_id из ответа.
+    Если resync_required, часть событий уже удалена: данные чатов
+    нужно загрузить заново и продолжить с last_order_id из ответа.
+    """
+    page = await get_updates_page(
+        user_id=session.user_id, since=since, limit=limit
+    )
+    return UpdatesResponse(
+        updates=[get_update_item(update) for update in page.updates],
+        last_order_id=page.last_order_id,
+        has_more=page.has_more,
+        resync_required=page.resync_required,
+    )
+
+
+@sio.on(SocketioEventsEnum.resume)
+async def handle_resume(sid, resume_body: ResumeBody):
+    """
+    Повторно отправляет события, пропущенные клиентом
+    после update_order_id последнего полученного события.
+
+    События фиксируются строго в порядке order_id
+    (UpdateRepository.create_updates), поэтому если клиент получил
+    событие N, все события пользователя до N уже сохранены:
+    повторяются только события после since, без пропусков.
+    События, отправленные во время повтора, могут прийти дважды,
+    клиент пропускает их по update_order_id.
+    """
+    user_id = await get_user_id_from_socket_session(sid)
+
+    resume_response = await replay_updates(
+        sid=sid, user_id=user_id, since=resume_body.since
+    )
+    logger.info(
+        "Updates replayed. user_id=%s, since=%s, count=%s,"
+        " resync_required=%s",
+        user_id,
+        resume_body.since,
+        resume_response.replayed_count,
+        resume_response.resync_required,
+    )
+    await sio.emit(
+        event=SocketioEventsEnum.resume,
+        data=sio.prepare_payload(resume_response),
+        to=sid,
+    )
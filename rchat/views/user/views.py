@@ -3,6 +3,7 @@ import logging
 from fastapi import APIRouter, Depends, HTTPException
 from starlette import status
 
+from rchat.conf import AVATAR_THUMBNAIL_SIZE
 from rchat.schemas.media import MediaTypeEnum
 from rchat.schemas.session import Session
 from rchat.state import app_state
@@ -105,7 +106,7 @@ async def get_match_users(
                 ),
                 avatar_url=(
                     app_state.media_repo.get_media_url(
-                        id_=user.avatar_photo_id
+                        id_=user.avatar_photo_id, size=AVATAR_THUMBNAIL_SIZE
                     )
                     if user.avatar_photo_id
                     else None
@@ -0,0 +1,70 @@
+"""
+Протокол websocket uvicorn (wsproto) с настраиваемым уровнем сжатия
+permessage-deflate (WS_COMPRESSION_LEVEL).
+
+Расширение согласуется, только если клиент его предлагает.
+"""
+
+import zlib
+
+import wsproto
+from uvicorn.protocols.utils import get_path_with_query_string
+from uvicorn.protocols.websockets.wsproto_impl import WSProtocol
+from wsproto.extensions import PerMessageDeflate
+from wsproto.frame_protocol import Opcode
+
+from rchat.conf import WS_COMPRESSION_LEVEL
+
+
+class LeveledPerMessageDeflate(PerMessageDeflate):
+    """
+    PerMessageDeflate создаёт компрессор с уровнем по умолчанию,
+    здесь компрессор создаётся заранее с уровнем WS_COMPRESSION_LEVEL.
+    """
+
+    def frame_outbound(self, proto, opcode, rsv, data, fin):
+        if (
+            self._compressor is None
+            and self._compressible_opcode(opcode)
+            and opcode is not Opcode.CONTINUATION
+        ):
+            bits = (
+                self.client_max_window_bits
+                if proto.client
+                else self.server_max_window_bits
+            )
+            self._compressor = zlib.compressobj(
+                WS_COMPRESSION_LEVEL, zlib.DEFLATED, -int(bits)
+            )
+        return super().frame_outbound(proto, opcode, rsv, data, fin)
+
+
+class DeflateWSProtocol(WSProtocol):
+    async def send(self, message):
+        """
+        Принятие соединения повторяет WSProtocol.send,
+        но с LeveledPerMessageDeflate, остальное - без изменений.
+        """
+        if self.handshake_complete or message["type"] != "websocket.accept":
+            return await super().send(message)
+
+        await self.writable.wait()
+        self.logger.info(
+            '%s - "WebSocket %s" [accepted]',
+            self.scope["client"],
+            get_path_with_query_string(self.scope),
+        )
+        extensions = []
+        if self.config.ws_per_message_deflate:
+            extensions.append(LeveledPerMessageDeflate())
+        if not self.transport.is_closing():
+            self.handshake_complete = True
+            output = self.conn.send(
+                wsproto.events.AcceptConnection(
+                    subprotocol=message.get("subprotocol"),
+                    extensions=extensions,
+                    extra_headers=self.default_headers
+                    + list(message.get("headers", [])),
+                )
+            )
+            self.transport.write(output)